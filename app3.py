@@ -3,52 +3,23 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import io
 from datetime import datetime
 import time
+from tramos import generar_tramos_ejemplo, huella, AlmacenResultados, metricas_lote, resultado_df, barrido_perfiles
+from ingesta import leer_tramos_csv, ErrorIngesta
+from exportacion import formatos_disponibles, descarga_diferida, nombre_archivo, tipo_mime
+from cinematica import ParametrosCinematicos, resultado_df_cinematico
+from montecarlo import ParametrosIncertidumbre, simular_incertidumbre
+from perfiles import (V_MIN, V_MAX, V_DEFECTO, ErrorPerfil, perfil_uniforme, acotar,
+                      rellenar_rango, escalar_rango, pegar_columna, importar_csv)
+from reduccion import lttb, velocidad_por_bloques, cuartiles_caja, MAX_PUNTOS_LINEA, MAX_BARRAS, MAX_PUNTOS_CAJA
+import instrumentacion
+from instrumentacion import etapa
 
 st.set_page_config(page_title="Simulador avanzado de tramos", layout="wide")
+instrumentacion.iniciar_rerun("app3")
 
-# ---------------------------
-# Funciones utilitarias
-# ---------------------------
-def generar_tramos_ejemplo(preset):
-    if preset == "Ruta urbana":
-        return pd.DataFrame({"tramo": [1,2,3,4,5], "distancia_m": [120, 300, 80, 200, 150]})
-    if preset == "Ruta deportiva":
-        return pd.DataFrame({"tramo": [1,2,3,4], "distancia_m": [500, 800, 400, 600]})
-    if preset == "Ruta mixta":
-        return pd.DataFrame({"tramo": [1,2,3,4,5,6], "distancia_m": [100, 250, 50, 400, 180, 220]})
-    return pd.DataFrame({"tramo":[1,2,3], "distancia_m":[100,100,100]})
-
-def calcular_tiempos(df, velocidades_m_s):
-    df = df.copy()
-    df["velocidad_m_s"] = velocidades_m_s
-    # proteger división por cero
-    df["velocidad_m_s"] = df["velocidad_m_s"].replace(0, np.nan)
-    df["tiempo_s"] = df["distancia_m"] / df["velocidad_m_s"]
-    df["tiempo_s"] = df["tiempo_s"].fillna(np.inf)
-    df["tiempo_acum_s"] = df["tiempo_s"].cumsum()
-    df["velocidad_kmh"] = df["velocidad_m_s"] * 3.6
-    return df
-
-def resumen_metrics(df):
-    total_time = df["tiempo_s"].replace(np.inf, np.nan).sum()
-    avg_speed = (df["distancia_m"].sum() / total_time) if total_time and total_time>0 else 0
-    max_speed = df["velocidad_m_s"].max()
-    min_speed = df["velocidad_m_s"].min()
-    return {
-        "Tiempo total (s)": total_time if not np.isnan(total_time) else float("nan"),
-        "Velocidad media (m/s)": avg_speed,
-        "Velocidad máxima (m/s)": max_speed,
-        "Velocidad mínima (m/s)": min_speed
-    }
-
-def df_to_csv_bytes(df):
-    towrite = io.BytesIO()
-    df.to_csv(towrite, index=False)
-    towrite.seek(0)
-    return towrite
+MAX_FILAS_VISTA = 1000
 
 # ---------------------------
 # Sidebar: datos, presets, controls
@@ -61,19 +32,24 @@ df_base = None  # inicializar
 if modo_entrada == "Cargar CSV":
     uploaded = st.sidebar.file_uploader("Sube CSV con columnas: tramo, distancia_m", type=["csv"])
     if uploaded is not None:
-        try:
-            df_base = pd.read_csv(uploaded)
-        except Exception as e:
-            st.sidebar.error(f"No se pudo leer el CSV: {e}")
-            st.stop()
-        required = {"tramo", "distancia_m"}
-        if not required.issubset(set(df_base.columns)):
-            st.sidebar.error("El CSV debe tener columnas 'tramo' y 'distancia_m'.")
-            st.stop()
-        df_base["distancia_m"] = pd.to_numeric(df_base["distancia_m"], errors="coerce")
-        if df_base["distancia_m"].isna().any():
-            st.sidebar.error("La columna 'distancia_m' contiene valores no numéricos.")
+        # La ruta se lee por bloques una sola vez por archivo subido
+        if st.session_state.get("ruta_csv_id") != uploaded.file_id:
+            try:
+                ruta = leer_tramos_csv(uploaded)
+            except ErrorIngesta as e:
+                st.sidebar.error(str(e))
+                st.stop()
+            except Exception as e:
+                st.sidebar.error(f"No se pudo leer el CSV: {e}")
+                st.stop()
+            st.session_state["ruta_csv_id"] = uploaded.file_id
+            st.session_state["ruta_csv"] = ruta
+        ruta = st.session_state["ruta_csv"]
+        if ruta.filas_invalidas:
+            detalle = "\n".join(f"- fila {fila}: {motivo}" for fila, motivo in ruta.errores)
+            st.sidebar.error(f"El CSV tiene {ruta.filas_invalidas} filas inválidas:\n{detalle}")
             st.stop()
+        df_base = ruta.a_dataframe()
     else:
         st.sidebar.warning("Aún no ha subido un CSV. Cambia a 'Usar preset' o sube un archivo.")
         st.stop()
@@ -111,13 +87,40 @@ for i in range(1, num_configs+1):
         speeds = None
     configs[i] = {"name": name, "mode": mode, "speeds": speeds}
 
+st.sidebar.markdown("---")
+st.sidebar.subheader("Modelo de tramo")
+modelo_tramo = st.sidebar.radio("Modelo", ["Velocidad constante", "Cinemático"],
+                                help="Cinemático: la velocidad de cada tramo es un tope y se respetan "
+                                     "la aceleración y el frenado máximos.")
+modelo = None
+if modelo_tramo == "Cinemático":
+    a_max = st.sidebar.slider("Aceleración máx. (m/s²)", 0.2, 5.0, 1.5, 0.1)
+    b_max = st.sidebar.slider("Frenado máx. (m/s²)", 0.2, 8.0, 2.0, 0.1)
+    pendiente_pct = st.sidebar.slider("Pendiente uniforme (%)", -10.0, 10.0, 0.0, 0.5)
+    masa = st.sidebar.number_input("Masa (kg)", 50.0, 40000.0, 1200.0, step=50.0)
+    modelo = (ParametrosCinematicos(a_max=a_max, b_max=b_max, masa=masa), pendiente_pct / 100)
+
+# Modo estocástico: velocidades sorteadas alrededor de las configuradas
+incertidumbre = None
+if modelo is None and st.sidebar.checkbox("Modo estocástico (Monte Carlo)", value=False):
+    incertidumbre = ParametrosIncertidumbre(
+        n_replicas=st.sidebar.select_slider("Réplicas", [1_000, 5_000, 10_000, 50_000, 100_000], value=10_000),
+        cv=st.sidebar.slider("Variación de la velocidad (CV)", 0.0, 0.5, 0.15, 0.01),
+        prob_demora=st.sidebar.slider("Probabilidad de demora por tramo", 0.0, 0.5, 0.0, 0.01),
+        demora_media_s=st.sidebar.number_input("Demora media (s)", 0.0, 600.0, 30.0, step=5.0),
+        semilla=int(st.sidebar.number_input("Semilla Monte Carlo", value=42, step=1))
+    )
+elif modelo is not None:
+    st.sidebar.caption("El modo estocástico usa el modelo de velocidad constante.")
+
 st.sidebar.markdown("---")
 st.sidebar.subheader("Acciones")
 if st.sidebar.button("Cargar presets por defecto"):
     st.experimental_set_query_params(_preset_load=int(time.time()))
     st.experimental_rerun_available = False  # no-op flag for clarity
 
-export_csv = st.sidebar.checkbox("Habilitar exportar CSV", value=True)
+export_csv = st.sidebar.checkbox("Habilitar exportar resultados", value=True)
+formato_export = st.sidebar.selectbox("Formato de exportación", formatos_disponibles())
 st.sidebar.info("Usa el panel principal para ajustar velocidades manuales si eliges ese modo.")
 
 # ---------------------------
@@ -130,7 +133,10 @@ col1, col2 = st.columns([2,1])
 
 with col1:
     st.subheader("Datos base")
-    st.dataframe(df_base.reset_index(drop=True), width="stretch")
+    # En rutas largas solo se envía al navegador una vista previa
+    st.dataframe(df_base.head(MAX_FILAS_VISTA).reset_index(drop=True), width="stretch")
+    if len(df_base) > MAX_FILAS_VISTA:
+        st.caption(f"Mostrando los primeros {MAX_FILAS_VISTA} de {len(df_base)} tramos.")
 
 with col2:
     st.subheader("Resumen base")
@@ -140,7 +146,23 @@ with col2:
 st.markdown("---")
 st.subheader("Ajuste de velocidades por configuración")
 
-# Panel para editar velocidades manualmente si corresponde
+# Panel para editar velocidades manualmente si corresponde. Cada configuración
+# guarda su perfil como un arreglo en session_state; se edita con un solo
+# st.data_editor (por ventanas en rutas largas) y operaciones masivas, así el
+# costo de cada rerun no crece con el número de tramos.
+MAX_FILAS_EDITOR = 500
+OPERACIONES_MASIVAS = ["Rellenar rango", "Escalar rango", "Pegar columna", "Importar CSV"]
+n_ruta = len(df_base)
+h_ruta = huella(df_base["tramo"].to_numpy(), df_base["distancia_m"].to_numpy())
+
+def perfil_sesion(i):
+    # El perfil se reinicia si cambia la ruta
+    estado = st.session_state.get(f"perfil_{i}")
+    if estado is None or estado["ruta"] != h_ruta:
+        estado = {"ruta": h_ruta, "v": perfil_uniforme(n_ruta), "version": 0}
+        st.session_state[f"perfil_{i}"] = estado
+    return estado
+
 manual_inputs = {}
 for i in range(1, num_configs+1):
     cfg = configs[i]
@@ -148,29 +170,95 @@ for i in range(1, num_configs+1):
     if cfg["mode"] == "Velocidad uniforme":
         st.write(f"Velocidad uniforme: **{cfg['speeds'][0]} m/s**")
         manual_inputs[i] = cfg['speeds']
-    else:
-        st.write("Ingrese velocidad por tramo (m/s):")
-        n_cols = min(len(df_base), 6)
-        cols = st.columns(n_cols)
-        speeds = []
-        for idx, tramo in enumerate(df_base["tramo"].tolist()):
-            col = cols[idx % n_cols]
-            default_v = 8.0
-            key_input = f"t{tramo}_i{i}"
-            v = col.number_input(key_input, min_value=0.1, max_value=50.0, value=float(default_v), step=0.1, key=key_input+"_ui")
-            speeds.append(v)
-        manual_inputs[i] = speeds
+        continue
+
+    estado = perfil_sesion(i)
+    with st.expander("Operaciones masivas"):
+        with st.form(f"masivo_{i}"):
+            op = st.selectbox("Operación", OPERACIONES_MASIVAS, key=f"op_{i}")
+            c1, c2, c3 = st.columns(3)
+            desde = c1.number_input("Desde tramo nº", 1, n_ruta, 1, key=f"desde_{i}")
+            hasta = c2.number_input("Hasta tramo nº", 1, n_ruta, n_ruta, key=f"hasta_{i}")
+            valor = c3.number_input("Valor (m/s) o factor", 0.01, 50.0, V_DEFECTO, step=0.1, key=f"valor_{i}")
+            texto = st.text_area("Columna a pegar (se pega desde 'Desde tramo nº')", key=f"pegar_{i}")
+            archivo = st.file_uploader("CSV con velocidad_m_s (y opcionalmente tramo)", type=["csv"], key=f"csv_vel_{i}")
+            if st.form_submit_button("Aplicar"):
+                try:
+                    if op == "Rellenar rango":
+                        nuevo = rellenar_rango(estado["v"], desde, hasta, valor)
+                    elif op == "Escalar rango":
+                        nuevo = escalar_rango(estado["v"], desde, hasta, valor)
+                    elif op == "Pegar columna":
+                        nuevo = pegar_columna(estado["v"], texto, desde)
+                    elif archivo is not None:
+                        nuevo = importar_csv(estado["v"], archivo.getvalue(), df_base["tramo"].to_numpy())
+                    else:
+                        raise ErrorPerfil("Sube un CSV para importar.")
+                    # Nueva versión: las ediciones pendientes del editor ya no aplican
+                    estado["v"], estado["version"] = nuevo, estado["version"] + 1
+                except ErrorPerfil as e:
+                    st.error(str(e))
+
+    inicio = 0
+    if n_ruta > MAX_FILAS_EDITOR:
+        pagina = st.number_input(f"Página del editor (de {int(np.ceil(n_ruta / MAX_FILAS_EDITOR))})",
+                                 1, int(np.ceil(n_ruta / MAX_FILAS_EDITOR)), 1, key=f"pagina_{i}")
+        inicio = (int(pagina) - 1) * MAX_FILAS_EDITOR
+    fin = min(n_ruta, inicio + MAX_FILAS_EDITOR)
+    ventana = pd.DataFrame({
+        "tramo": df_base["tramo"].to_numpy()[inicio:fin],
+        "distancia_m": df_base["distancia_m"].to_numpy()[inicio:fin],
+        "velocidad_m_s": estado["v"][inicio:fin]
+    })
+    editado = st.data_editor(
+        ventana, key=f"editor_{i}_{estado['version']}_{inicio}", hide_index=True, width="stretch",
+        disabled=["tramo", "distancia_m"],
+        column_config={"velocidad_m_s": st.column_config.NumberColumn(
+            "Velocidad (m/s)", min_value=V_MIN, max_value=V_MAX, step=0.1, format="%.1f")}
+    )
+    v_ventana = editado["velocidad_m_s"].to_numpy(dtype=float)
+    v_ventana = np.where(np.isnan(v_ventana), estado["v"][inicio:fin], v_ventana)
+    if not np.array_equal(v_ventana, estado["v"][inicio:fin]):
+        estado["v"] = estado["v"].copy()
+        estado["v"][inicio:fin] = acotar(v_ventana)
+    manual_inputs[i] = estado["v"]
 
 # ---------------------------
 # Cálculo de resultados por configuración
 # ---------------------------
-results = {}
+# Solo se simulan las configuraciones cuyas velocidades (o la ruta) cambiaron;
+# el resto sale del almacén de la sesión junto con sus reducciones para gráficas.
+velocidades = []
 for i in range(1, num_configs+1):
     speeds = manual_inputs.get(i)
     if speeds is None or len(speeds) != len(df_base):
         speeds = [8.0] * len(df_base)
-    df_res = calcular_tiempos(df_base, speeds)
-    results[i] = df_res
+    velocidades.append(speeds)
+tramos = df_base["tramo"].to_numpy()
+distancias = df_base["distancia_m"].to_numpy()
+almacen = st.session_state.setdefault("almacen_resultados", AlmacenResultados())
+claves = almacen.calcular(tramos, distancias, velocidades, modelo)
+filas = {i: almacen.fila(claves[i-1]) for i in range(1, num_configs+1)}
+bandas_mc = {}
+if incertidumbre is not None:
+    for i in range(1, num_configs+1):
+        bandas_mc[i] = almacen.derivado(claves[i-1], ("montecarlo", incertidumbre),
+                                        lambda r: simular_incertidumbre(distancias, r.velocidades[0], incertidumbre))
+
+def tabla_resultados(i):
+    res_cin = almacen.cinematico(claves[i-1])
+    with etapa("app3.tabla_resultados"):
+        if res_cin is None:
+            return resultado_df(df_base, filas[i], 0)
+        return resultado_df_cinematico(df_base, filas[i], res_cin)
+
+def figura_memo(nombre, clave, construir):
+    # Reutiliza la figura si no cambió ninguna de sus entradas (resultados, nombres, colores)
+    memo = st.session_state.setdefault("figuras_memo", {})
+    if nombre not in memo or memo[nombre][0] != clave:
+        with etapa(f"figura.{nombre}"):
+            memo[nombre] = (clave, construir())
+    return memo[nombre][1]
 
 # ---------------------------
 # Mostrar métricas comparativas
@@ -182,11 +270,17 @@ metrics_cols = st.columns(num_configs)
 for i, col in enumerate(metrics_cols, start=1):
     with col:
         st.markdown(f"**{configs[i]['name']}**")
-        mets = resumen_metrics(results[i])
+        mets = metricas_lote(filas[i], 0)
         total_display = "N/A" if not np.isfinite(mets["Tiempo total (s)"]) else f"{mets['Tiempo total (s)']:.2f}"
         st.metric("Tiempo total (s)", total_display)
         st.metric("Vel media (m/s)", f"{mets['Velocidad media (m/s)']:.2f}")
         st.metric("Vel máx (m/s)", f"{mets['Velocidad máxima (m/s)']:.2f}")
+        res_cin = almacen.cinematico(claves[i-1])
+        if res_cin is not None:
+            st.metric("Energía (kWh)", f"{res_cin.energia_J.sum() / 3.6e6:.3f}")
+        if i in bandas_mc:
+            p50, p90, p99 = bandas_mc[i].total_percentiles
+            st.metric("Tiempo P50 / P90 / P99 (s)", f"{p50:.0f} / {p90:.0f} / {p99:.0f}")
 
 # ---------------------------
 # Visualizaciones interactivas
@@ -194,34 +288,103 @@ for i, col in enumerate(metrics_cols, start=1):
 st.markdown("---")
 st.subheader("Visualizaciones")
 
-fig1 = go.Figure()
+# El nivel de detalle depende del número de tramos: rutas cortas se dibujan
+# tal cual; en rutas largas se reducen los datos antes de enviarlos.
+n_tramos = len(tramos)
 colors = ["#1f77b4", "#ff7f0e", "#2ca02c"]
-for i in range(1, num_configs+1):
-    df_r = results[i]
-    fig1.add_trace(go.Scatter(x=df_r["tramo"], y=df_r["tiempo_acum_s"], mode="lines+markers",
-                              name=configs[i]["name"], marker=dict(color=colors[i-1])))
-fig1.update_layout(title="Tiempo acumulado por tramo", xaxis_title="Tramo", yaxis_title="Tiempo acumulado (s)")
-st.plotly_chart(fig1, width="stretch")
+clave_figuras = (tuple(claves), tuple(configs[i]["name"] for i in range(1, num_configs+1)))
 
-fig2 = go.Figure()
-for i in range(1, num_configs+1):
-    df_r = results[i]
-    fig2.add_trace(go.Bar(x=df_r["tramo"], y=df_r["velocidad_kmh"], name=configs[i]["name"], marker_color=colors[i-1], opacity=0.7))
-fig2.update_layout(barmode='group', title="Velocidad por tramo (km/h)", xaxis_title="Tramo", yaxis_title="Velocidad (km/h)")
-st.plotly_chart(fig2, width="stretch")
+def rgba(color_hex, alfa):
+    r, g, b = (int(color_hex[k:k+2], 16) for k in (1, 3, 5))
+    return f"rgba({r},{g},{b},{alfa})"
 
-fig3 = go.Figure()
-for i in range(1, num_configs+1):
-    fig3.add_trace(go.Box(y=results[i]["tiempo_s"].replace(np.inf, np.nan), name=configs[i]["name"], marker_color=colors[i-1]))
-fig3.update_layout(title="Distribución de tiempo por tramo", yaxis_title="Tiempo por tramo (s)")
-st.plotly_chart(fig3, width="stretch")
+def construir_fig1():
+    fig1 = go.Figure()
+    for i in range(1, num_configs+1):
+        x_l, y_l = almacen.derivado(claves[i-1], "linea", lambda r: lttb(tramos, r.tiempo_acum[0], MAX_PUNTOS_LINEA))
+        fig1.add_trace(go.Scatter(x=x_l, y=y_l, mode="lines+markers" if n_tramos <= MAX_PUNTOS_LINEA else "lines",
+                                  name=configs[i]["name"], marker=dict(color=colors[i-1])))
+        if i in bandas_mc:
+            # Bandas P50–P90 y P90–P99 del tiempo acumulado
+            b = bandas_mc[i]
+            x_b = tramos[b.posiciones]
+            for (lo, hi), alfa in (((0, 1), 0.25), ((1, 2), 0.12)):
+                fig1.add_trace(go.Scatter(x=x_b, y=b.bandas[lo], mode="lines", line=dict(width=0),
+                                          showlegend=False, hoverinfo="skip"))
+                fig1.add_trace(go.Scatter(x=x_b, y=b.bandas[hi], mode="lines", line=dict(width=0),
+                                          fill="tonexty", fillcolor=rgba(colors[i-1], alfa),
+                                          name=f"{configs[i]['name']} P{b.percentiles[lo]}–P{b.percentiles[hi]}"))
+    fig1.update_layout(title="Tiempo acumulado por tramo", xaxis_title="Tramo", yaxis_title="Tiempo acumulado (s)")
+    return fig1
+
+def construir_fig2():
+    fig2 = go.Figure()
+    for i in range(1, num_configs+1):
+        if n_tramos <= MAX_BARRAS:
+            fig2.add_trace(go.Bar(x=tramos, y=filas[i].velocidades[0] * 3.6, name=configs[i]["name"], marker_color=colors[i-1], opacity=0.7))
+        else:
+            desde, hasta, v_bloque = almacen.derivado(claves[i-1], "barras", lambda r: velocidad_por_bloques(tramos, distancias, r.tiempos[0]))
+            fig2.add_trace(go.Bar(x=desde, y=v_bloque * 3.6, customdata=np.column_stack([desde, hasta]),
+                                  hovertemplate="Tramos %{customdata[0]}–%{customdata[1]}: %{y:.1f} km/h",
+                                  name=configs[i]["name"], marker_color=colors[i-1], opacity=0.7))
+    titulo_x2 = "Tramo" if n_tramos <= MAX_BARRAS else f"Tramo (bloques de ~{int(np.ceil(n_tramos / MAX_BARRAS))} tramos)"
+    fig2.update_layout(barmode='group', title="Velocidad por tramo (km/h)", xaxis_title=titulo_x2, yaxis_title="Velocidad (km/h)")
+    return fig2
+
+def construir_fig3():
+    fig3 = go.Figure()
+    for i in range(1, num_configs+1):
+        tiempos_i = np.where(np.isinf(filas[i].tiempos[0]), np.nan, filas[i].tiempos[0])
+        caja = almacen.derivado(claves[i-1], "caja", lambda r: cuartiles_caja(tiempos_i)) if n_tramos > MAX_PUNTOS_CAJA else None
+        if caja is None:
+            fig3.add_trace(go.Box(y=tiempos_i, name=configs[i]["name"], marker_color=colors[i-1]))
+        else:
+            fig3.add_trace(go.Box(x=[configs[i]["name"]], name=configs[i]["name"], marker_color=colors[i-1], **caja))
+    fig3.update_layout(title="Distribución de tiempo por tramo", yaxis_title="Tiempo por tramo (s)")
+    return fig3
+
+instrumentacion.plotly_chart("plotly_chart.fig1", figura_memo("fig1", (clave_figuras, incertidumbre), construir_fig1), width="stretch")
+instrumentacion.plotly_chart("plotly_chart.fig2", figura_memo("fig2", clave_figuras, construir_fig2), width="stretch")
+instrumentacion.plotly_chart("plotly_chart.fig3", figura_memo("fig3", clave_figuras, construir_fig3), width="stretch")
 
 # Tabla detallada por configuración con opción de selección
 st.markdown("---")
 st.subheader("Tabla detallada (selecciona configuración)")
 sel = st.selectbox("Mostrar resultados de:", [configs[i]["name"] for i in range(1, num_configs+1)], index=0)
 sel_idx = next(i for i in range(1, num_configs+1) if configs[i]["name"] == sel)
-st.dataframe(results[sel_idx].reset_index(drop=True), width="stretch")
+tabla_sel = almacen.derivado(claves[sel_idx-1], "tabla", lambda r: tabla_resultados(sel_idx).reset_index(drop=True))
+st.dataframe(tabla_sel.head(MAX_FILAS_VISTA), width="stretch")
+
+# ---------------------------
+# Barrido de perfiles de velocidad
+# ---------------------------
+st.markdown("---")
+st.subheader("Barrido de perfiles de velocidad")
+if st.checkbox("Buscar entre miles de perfiles aleatorios", value=False):
+    cb1, cb2, cb3 = st.columns(3)
+    n_candidatos = cb1.number_input("Perfiles candidatos", min_value=100, max_value=200_000, value=10_000, step=1000)
+    v_rango = cb2.slider("Rango de velocidad por tramo (m/s)", 0.5, 50.0, (4.0, 12.0))
+    top_k = cb3.slider("Mostrar los mejores (top-k)", 1, 20, 5)
+    criterio = st.radio("Criterio", ["Menor tiempo total", "Más cercano a un tiempo objetivo"], horizontal=True)
+    objetivo = None
+    if criterio == "Más cercano a un tiempo objetivo":
+        objetivo = st.number_input("Tiempo objetivo (s)", min_value=1.0, value=float(np.nanmedian([filas[i].tiempo_total[0] for i in filas])))
+    semilla_barrido = st.number_input("Semilla del barrido", value=42, step=1)
+
+    mejores = barrido_perfiles(df_base["distancia_m"].to_numpy(), int(n_candidatos), v_rango[0], v_rango[1],
+                               top_k=top_k, semilla=int(semilla_barrido), tiempo_objetivo=objetivo)
+    st.dataframe(pd.DataFrame({
+        "Puesto": np.arange(1, len(mejores.tiempo_total) + 1),
+        "Tiempo total (s)": mejores.tiempo_total,
+        "Vel media (m/s)": mejores.velocidad_media,
+        "Vel mín (m/s)": mejores.velocidad_min,
+        "Vel máx (m/s)": mejores.velocidad_max
+    }), width="stretch", hide_index=True)
+    fig_top = go.Figure()
+    for k in range(len(mejores.tiempo_total)):
+        fig_top.add_trace(go.Scatter(x=tramos, y=mejores.velocidades[k], mode="lines+markers", name=f"#{k+1}"))
+    fig_top.update_layout(title="Perfiles de velocidad de los mejores candidatos", xaxis_title="Tramo", yaxis_title="Velocidad (m/s)")
+    instrumentacion.plotly_chart("plotly_chart.fig_top", fig_top, width="stretch")
 
 # ---------------------------
 # Exportar resultados y opciones de presentación
@@ -230,10 +393,12 @@ st.markdown("---")
 st.subheader("Exportar y presentación")
 
 if export_csv:
+    # Los bytes se generan al pulsar el botón y se reutilizan por contenido
     for i in range(1, num_configs+1):
-        csv_bytes = df_to_csv_bytes(results[i])
-        filename = f"{configs[i]['name'].replace(' ', '_')}_resultados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        st.download_button(label=f"Descargar CSV - {configs[i]['name']}", data=csv_bytes, file_name=filename, mime="text/csv")
+        filename = nombre_archivo(f"{configs[i]['name'].replace(' ', '_')}_resultados_{datetime.now().strftime('%Y%m%d_%H%M%S')}", formato_export)
+        datos = descarga_diferida(lambda i=i: tabla_resultados(i), formato_export)
+        st.download_button(label=f"Descargar {formato_export} - {configs[i]['name']}", data=datos, file_name=filename,
+                           mime=tipo_mime(formato_export), key=f"descarga_{i}")
 
 st.markdown("**Controles rápidos para exposición:**")
 if st.button("Restablecer valores (recargar página)"):
@@ -247,3 +412,4 @@ st.info("Para la exposición prepara 3 presets con datos reales y usa el compara
 
 st.markdown("---")
 st.caption("Versión demostrativa. Adapta variables, presets y visualizaciones según el objetivo pedagógico.")
+instrumentacion.panel()
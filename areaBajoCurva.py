@@ -1,9 +1,16 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from sympy import sympify, lambdify, symbols, integrate
+from matplotlib.collections import PolyCollection
+import uuid
+from simbolico import limpiar_entrada, cache_simbolico
+from integracion import integral_definida, convergida
+from muestreo import muestrear
+from riemann import suma_riemann, estudio_convergencia, secuencia_n, orden_observado, MAX_FRANJAS, METODOS_CONVERGENCIA
+from render import servicio_render
+import instrumentacion
 
 st.set_page_config(page_title="Simulador de Cálculo", layout="wide")
+instrumentacion.iniciar_rerun("areaBajoCurva")
 
 st.title("Visualizador de Integrales y Sumas de Riemann")
 
@@ -12,59 +19,133 @@ with st.sidebar:
     st.header("Parámetros")
     formula = st.text_input("Función f(x):", value="x**2 + 2")
     rango = st.slider("Intervalo [a, b]", -10.0, 10.0, (0.0, 4.0))
-    n_rects = st.slider("Número de rectángulos (n)", 1, 50, 10)
+    n_rects = int(st.number_input("Número de rectángulos (n)", 1, 10_000_000, 10, step=1))
     tipo_suma = st.selectbox("Punto de evaluación", ["Izquierda", "Derecha", "Punto Medio"])
+    convergencia = st.checkbox("Estudio de convergencia")
+    if convergencia:
+        n_max_conv = st.select_slider("n máximo del estudio", [10**3, 10**4, 10**5, 10**6], value=10**5)
 
 try:
     # 1. Preparación Matemática
-    x_sym = symbols('x')
-    f_sym = sympify(formula)
-    f_num = lambdify(x_sym, f_sym, "numpy")
+    id_sesion = st.session_state.setdefault("id_sesion", uuid.uuid4().hex)
+    # La fórmula normalizada es la clave de las imágenes y el texto de la leyenda:
+    # "X^2" y "x**2" comparten dibujo, así que deben mostrar la misma etiqueta
+    expresion = limpiar_entrada(formula)
+    entrada = cache_simbolico.obtener(expresion, clave=f"{id_sesion}:area")
+    if entrada.error:
+        raise ValueError(entrada.error)
+    f_num = entrada.f
     
     a, b = rango
-    dx = (b - a) / n_rects
     
-    # 2. Cálculo de la Integral Exacta
-    area_exacta = float(integrate(f_sym, (x_sym, a, b)))
+    # 2. Cálculo de la Integral (antiderivada cacheada o cuadratura numérica)
+    resultado = integral_definida(entrada, a, b)
+    area_exacta = resultado.valor
 
-    # 3. Cálculo de la Suma de Riemann
-    if tipo_suma == "Izquierda":
-        x_riemann = np.linspace(a, b - dx, n_rects)
-    elif tipo_suma == "Derecha":
-        x_riemann = np.linspace(a + dx, b, n_rects)
-    else: # Punto Medio
-        x_riemann = np.linspace(a + dx/2, b - dx/2, n_rects)
-    
-    y_riemann = f_num(x_riemann)
-    suma_area = np.sum(y_riemann * dx)
+    # 3. Cálculo de la Suma de Riemann (por bloques, válido hasta n = 10⁷)
+    riemann = suma_riemann(f_num, a, b, n_rects, tipo_suma)
+    suma_area = riemann.suma
 
-    # 4. Visualización
-    fig, ax = plt.subplots(figsize=(10, 5))
-    
-    # Curva suave
-    x_plot = np.linspace(a - 1, b + 1, 400)
-    ax.plot(x_plot, f_num(x_plot), 'r', lw=2, label=f"f(x) = {formula}")
-    
-    # Dibujar Rectángulos
-    ax.bar(x_riemann, y_riemann, width=dx, align='center' if tipo_suma=="Punto Medio" else ('edge' if tipo_suma=="Izquierda" else 'edge'), 
-           alpha=0.3, color='green', edgecolor='black', label=f'Suma de Riemann: {suma_area:.4f}')
-    
-    # Ajustar alineación de 'edge' para Derecha (Matplotlib por defecto usa borde izquierdo)
-    if tipo_suma == "Derecha":
-        for rect in ax.patches:
-            rect.set_x(rect.get_x() - dx)
+    # 4. Visualización: figura persistente actualizada en sitio; la imagen se
+    # guarda por (función, intervalo, n, tipo) y un rerun repetido no redibuja
+    def preparar_area(fig):
+        ax = fig.subplots()
+        curva, = ax.plot([], [], 'r', lw=2)
+        poligonos = PolyCollection([], facecolors='green', edgecolors='black', alpha=0.3)
+        ax.add_collection(poligonos)
+        escalon = ax.stairs([0.0], [0.0, 1.0], baseline=0, fill=True, color='green', alpha=0.3)
+        banda = ax.stairs([0.0], [0.0, 1.0], baseline=0, fill=True, color='green', alpha=0.15)
+        ax.axhline(0, color='black', lw=1)
+        ax.set_title("Aproximación del área bajo la curva")
+        return {"ax": ax, "curva": curva, "poligonos": poligonos, "escalon": escalon, "banda": banda}
 
-    ax.axhline(0, color='black', lw=1)
-    ax.set_title(f"Aproximación del área bajo la curva")
-    ax.legend()
-    
-    # Mostrar resultados en Streamlit
-    st.pyplot(fig)
+    def dibujar_area(fig, art):
+        x_plot, y_plot = muestrear(f_num, a - 1, b + 1)
+        art["curva"].set_data(x_plot, y_plot)
+        art["curva"].set_label(f"f(x) = {expresion}")
+        x0, x1 = riemann.bordes[:-1], riemann.bordes[1:]
+        alto = np.nan_to_num(riemann.y_min)
+        # Rectángulos: una sola PolyCollection; con más de MAX_FRANJAS cada franja
+        # agrupa varios rectángulos y se sombrea el rango mín–máx de sus alturas
+        detallado = n_rects <= MAX_FRANJAS
+        if detallado:
+            ceros = np.zeros_like(x0)
+            verts = np.stack([np.column_stack([x0, ceros]), np.column_stack([x0, alto]),
+                              np.column_stack([x1, alto]), np.column_stack([x1, ceros])], axis=1)
+            art["poligonos"].set_verts(verts)
+            art["poligonos"].set_linewidth(0.8 if n_rects <= 200 else 0.2)
+        else:
+            art["escalon"].set_data(alto, riemann.bordes, baseline=0)
+            art["banda"].set_data(np.nan_to_num(riemann.y_max), riemann.bordes, baseline=alto)
+        art["poligonos"].set_visible(detallado)
+        art["escalon"].set_visible(not detallado)
+        art["banda"].set_visible(not detallado)
+        rects = art["poligonos"] if detallado else art["escalon"]
+        rects.set_label(f'Suma de Riemann: {suma_area:.4f}')
+        ax = art["ax"]
+        ax.legend(handles=[art["curva"], rects])
+        alturas = np.concatenate([y_plot[np.isfinite(y_plot)], alto, np.nan_to_num(riemann.y_max), [0.0]])
+        y_lo, y_hi = alturas.min(), alturas.max()
+        margen = 0.05 * max(y_hi - y_lo, 1e-9)
+        ax.set_xlim(a - 1, b + 1)
+        ax.set_ylim(y_lo - margen, y_hi + margen)
+
+    st.image(servicio_render.imagen("area.riemann", (expresion, a, b, n_rects, tipo_suma),
+                                    preparar_area, dibujar_area), width="stretch")
+    if n_rects > MAX_FRANJAS:
+        st.caption(f"n = {n_rects:,}: cada franja del dibujo agrupa ~{n_rects // MAX_FRANJAS:,} rectángulos "
+                   "(sombreado claro = rango de alturas dentro de la franja).")
     
     col1, col2, col3 = st.columns(3)
-    col1.metric("Área Exacta (Cálculo)", f"{area_exacta:.4f}")
     col2.metric("Suma de Riemann", f"{suma_area:.4f}")
-    col3.metric("Error", f"{abs(area_exacta - suma_area):.4f}")
+    if resultado.metodo == "divergente":
+        col1.metric("Integral impropia", "diverge")
+        col3.metric("Error", "—")
+        st.warning("f no está acotada en [a, b] y la integral impropia diverge: "
+                   "la suma de Riemann no aproxima ningún área.")
+    else:
+        etiqueta = "Área Exacta (Cálculo)" if resultado.metodo == "antiderivada" else "Área (cuadratura numérica)"
+        col1.metric(etiqueta, f"{area_exacta:.4f}")
+        col3.metric("Error", f"{abs(area_exacta - suma_area):.4f}")
+        metodo = "F(b) − F(a)" if resultado.metodo == "antiderivada" else "cuadratura numérica"
+        st.caption(f"Integral calculada por {metodo} · error estimado ≈ {resultado.error_estimado:.1e}")
+        if not convergida(resultado):
+            st.warning(f"La cuadratura no convergió (error estimado ≈ {resultado.error_estimado:.1e}): "
+                       "el valor no es fiable; puede haber una singularidad en [a, b].")
+
+    # 5. Convergencia: todos los métodos y todos los n en una evaluación por lotes
+    if convergencia and not convergida(resultado):
+        st.info("El estudio de convergencia necesita una integral de referencia fiable.")
+    elif convergencia:
+        st.subheader("Convergencia del error")
+        def preparar_convergencia(fig):
+            ax = fig.subplots()
+            lineas = {m: ax.plot([], [], 'o-', ms=3)[0] for m in METODOS_CONVERGENCIA}
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+            ax.set_xlabel("n")
+            ax.set_ylabel("|error|")
+            ax.grid(True, which="both", alpha=0.3)
+            return {"ax": ax, "lineas": lineas}
+
+        def dibujar_convergencia(fig, art):
+            ns = secuencia_n(n_max_conv)
+            errores = estudio_convergencia(f_num, a, b, ns, area_exacta)
+            for metodo_c, err in errores.items():
+                orden = orden_observado(ns, err)
+                linea = art["lineas"][metodo_c]
+                linea.set_data(ns, np.where(err > 0, err, np.nan))
+                linea.set_label(f"{metodo_c} (orden ≈ {orden:.2f})" if np.isfinite(orden) else metodo_c)
+            art["ax"].relim()
+            art["ax"].autoscale_view()
+            art["ax"].legend()
+
+        st.image(servicio_render.imagen("area.convergencia", (expresion, a, b, n_max_conv, area_exacta),
+                                        preparar_convergencia, dibujar_convergencia, figsize=(10, 4)), width="stretch")
+        if resultado.metodo == "cuadratura":
+            st.caption("La referencia es numérica: por debajo de su error estimado las curvas se aplanan.")
 
 except Exception as e:
-    st.error(f"Error: {e}. Revisa que la función sea válida para Python.")
\ No newline at end of file
+    st.error(f"Error: {e}. Revisa que la función sea válida para Python.")
+
+instrumentacion.panel()
@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# SUITE DE BENCHMARKS SIN NAVEGADOR
+# =============================
+# Ejecuta los núcleos de cálculo de cada simulador (los mismos módulos que
+# importan las páginas) con tamaños crecientes y mide tiempo, rendimiento
+# (elementos/s) y pico de memoria (tracemalloc, en una pasada aparte para no
+# distorsionar el tiempo). Cada ejecución se añade a un historial JSON-lines
+# y se compara con la última medición de cada caso en la misma máquina:
+#
+#   python benchmarks.py                 # tamaños completos (hasta 10M puntos / 1M tramos)
+#   python benchmarks.py --rapido        # tamaños ≤ 100k, para CI
+#   python benchmarks.py --filtro tramos --estricto   # sale con 1 si hay regresiones
+
+HISTORIAL = "benchmarks_historial.jsonl"
+TOLERANCIA_REGRESION = 1.25     # más de un 25 % más lento que la ejecución anterior
+MIN_S_REGRESION = 1e-3          # por debajo de 1 ms el ruido domina
+TAMANO_MAX_RAPIDO = 100_000
+TIEMPO_MIN_S = 0.2              # repetir hasta acumular este tiempo (mínimo de las repeticiones)
+
+PUNTOS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+TRAMOS = (10, 1_000, 100_000, 1_000_000)
+EXPRESIONES = ("x^2 - 4", "x**2 + 2", "sin(x)*exp(-x^2)", "ln(x) + sqrt(x)", "tan(x)/x", "x^5 - 3x^3 + x")
+
+
+class Caso(NamedTuple):
+    nombre: str
+    tamanos: tuple
+    preparar: Callable      # n -> callable sin argumentos
+    unidad: str
+
+
+# =============================
+# NÚCLEOS
+# =============================
+def _analizar(n):
+    from simbolico import limpiar_entrada, trabajo_analizar
+    exprs = [limpiar_entrada(e) for e in EXPRESIONES[:n]]
+    return lambda: [trabajo_analizar(e) for e in exprs]
+
+
+def _antiderivada(n):
+    from simbolico import limpiar_entrada, trabajo_antiderivada
+    exprs = [limpiar_entrada(e) for e in EXPRESIONES[:n]]
+    return lambda: [trabajo_antiderivada(e) for e in exprs]
+
+
+def _funcion_compilada(expr="sin(x)*exp(-x^2) + x^3"):
+    from simbolico import limpiar_entrada, parsear_funcion, lambdify_seguro
+    f_sym, _ = parsear_funcion(limpiar_entrada(expr))
+    return lambdify_seguro(f_sym, backend="fusionado")
+
+
+def _evaluar_expresion(n):
+    f = _funcion_compilada()
+    x = np.linspace(-6, 6, n)
+    return lambda: f(x)
+
+
+def _cuadratura(n):
+    from integracion import cuadratura_adaptativa
+    f = _funcion_compilada("sin(10x)*exp(-x^2)")
+    return lambda: [cuadratura_adaptativa(f, -5.0, 5.0, presupuesto_s=10.0) for _ in range(n)]
+
+
+def _suma_riemann(n):
+    from riemann import suma_riemann
+    f = _funcion_compilada("x^2 + 2")
+    return lambda: suma_riemann(f, 0.0, 4.0, n, "Punto Medio")
+
+
+def _combinada(n):
+    from combinada import funcion_combinada
+    x = np.linspace(-10, 10, n)
+    return lambda: funcion_combinada(x, 1.0, 3.0, 5.0)
+
+
+def _ruta(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({"tramo": np.arange(1, n + 1), "distancia_m": rng.uniform(50, 800, n)})
+    return df, rng.uniform(4, 12, n)
+
+
+def _calcular_tiempos(n):
+    from tramos import calcular_tiempos, resumen_metrics
+    df, v = _ruta(n)
+    return lambda: resumen_metrics(calcular_tiempos(df, v))
+
+
+def _simular_lote(n):
+    from tramos import simular_lote
+    df, v = _ruta(n)
+    d = df["distancia_m"].to_numpy()
+    # 8 configuraciones a la vez, como el comparador de app3.py
+    vs = np.tile(v, (8, 1)) * np.linspace(0.8, 1.2, 8)[:, None]
+    return lambda: simular_lote(d, vs)
+
+
+def _escenarios_mezcla(n, n_liquidos=50, semilla=0):
+    from mezclas import RegistroLiquidos
+    rng = np.random.default_rng(semilla)
+    reg = RegistroLiquidos([f"L{k}" for k in range(n_liquidos)], rng.uniform(0.6, 2.0, n_liquidos),
+                           ["gray"] * n_liquidos)
+    m = rng.random((n_liquidos, n_liquidos)) < 0.05
+    reg.miscible = m | m.T | np.eye(n_liquidos, dtype=bool)
+    vols = rng.uniform(0, 500, (n, n_liquidos)) * (rng.random((n, n_liquidos)) < 0.2)
+    return reg, vols
+
+
+def _densidad_mezcla(n):
+    from mezclas import densidad_mezcla
+    reg, vols = _escenarios_mezcla(n)
+    return lambda: densidad_mezcla(vols, reg.densidades)
+
+
+def _capas_lote(n):
+    from mezclas import capas_lote
+    reg, vols = _escenarios_mezcla(n)
+    return lambda: capas_lote(vols, reg)
+
+
+def _crecimiento(n):
+    from crecimiento import ParametrosCrecimiento, tamano, tasa
+    p = ParametrosCrecimiento()
+    t = np.linspace(0, p.dias, n)
+    r_ef = p.r * p.L * p.N * p.W
+    return lambda: tasa(tamano(t, *p[:6]), r_ef, p.Pmax)
+
+
+def _sensibilidad(n):
+    from crecimiento import ParametrosCrecimiento, derivadas
+    p = ParametrosCrecimiento()
+    lado = int(round(np.sqrt(n)))
+    L = np.linspace(0, 1, lado)[None, :]
+    W = np.linspace(0, 1, lado)[:, None]
+    return lambda: derivadas(p.r, L, p.N, W, p.P0, p.Pmax, p.dias)
+
+
+CASOS = (
+    Caso("simbolico.analizar", (len(EXPRESIONES),), _analizar, "expr"),
+    Caso("simbolico.antiderivada", (len(EXPRESIONES),), _antiderivada, "expr"),
+    Caso("simbolico.evaluar", PUNTOS, _evaluar_expresion, "puntos"),
+    Caso("integracion.cuadratura", (10,), _cuadratura, "integrales"),
+    Caso("riemann.suma_riemann", PUNTOS, _suma_riemann, "rectángulos"),
+    Caso("combinada.funcion_combinada", PUNTOS, _combinada, "puntos"),
+    Caso("tramos.calcular_tiempos", TRAMOS, _calcular_tiempos, "tramos"),
+    Caso("tramos.simular_lote", TRAMOS, _simular_lote, "tramos"),
+    Caso("mezclas.densidad_mezcla", (10, 1_000, 100_000), _densidad_mezcla, "escenarios"),
+    Caso("mezclas.capas_lote", (10, 1_000, 100_000), _capas_lote, "escenarios"),
+    Caso("crecimiento.tamano", PUNTOS, _crecimiento, "puntos"),
+    Caso("crecimiento.derivadas", (10_000, 1_000_000), _sensibilidad, "celdas"),
+)
+
+
+# =============================
+# MEDICIÓN E HISTORIAL
+# =============================
+def medir(fn) -> dict:
+    """Mínimo de varias repeticiones (tras una de calentamiento) y pico de memoria."""
+    fn()
+    tiempos = []
+    inicio = time.perf_counter()
+    while not tiempos or (time.perf_counter() - inicio < TIEMPO_MIN_S and len(tiempos) < 50):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        pico = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return {"s": min(tiempos), "repeticiones": len(tiempos), "pico_bytes": pico}
+
+
+def ejecutar(casos=CASOS, rapido: bool = False, filtro: str = ""):
+    """Genera un resultado por (caso, tamaño) a medida que se mide."""
+    for caso in casos:
+        if filtro and filtro not in caso.nombre:
+            continue
+        for n in caso.tamanos:
+            if rapido and n > TAMANO_MAX_RAPIDO:
+                continue
+            m = medir(caso.preparar(n))
+            yield {"caso": caso.nombre, "n": n, "unidad": caso.unidad, **m,
+                   "por_s": n / m["s"] if m["s"] > 0 else float("inf")}
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _maquina() -> str:
+    return f"{platform.node()}|{platform.machine()}|{platform.python_version()}|numpy {np.__version__}"
+
+
+def anteriores(ruta: str, maquina: str) -> dict:
+    """Último tiempo registrado en esta máquina por (caso, n)."""
+    base = {}
+    if not os.path.exists(ruta):
+        return base
+    with open(ruta, encoding="utf-8") as fh:
+        for linea in fh:
+            registro = json.loads(linea)
+            if registro.get("maquina") == maquina:
+                base.update({(r["caso"], r["n"]): r["s"] for r in registro["resultados"]})
+    return base
+
+
+def regresiones(actual: list, base: dict, tolerancia: float = TOLERANCIA_REGRESION) -> list:
+    lentos = []
+    for r in actual:
+        s_prev = base.get((r["caso"], r["n"]))
+        if s_prev and r["s"] > MIN_S_REGRESION and r["s"] > tolerancia * s_prev:
+            lentos.append((r["caso"], r["n"], s_prev, r["s"]))
+    return lentos
+
+
+def _legible(b: float) -> str:
+    for unidad in ("B", "KB", "MB", "GB"):
+        if abs(b) < 1024:
+            return f"{b:.0f} {unidad}"
+        b /= 1024
+    return f"{b:.0f} TB"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de los núcleos de cálculo")
+    parser.add_argument("--rapido", action="store_true", help=f"solo tamaños ≤ {TAMANO_MAX_RAPIDO}")
+    parser.add_argument("--filtro", default="", help="subcadena del nombre del caso")
+    parser.add_argument("--historial", default=HISTORIAL, help="archivo JSON-lines ('' para no guardar)")
+    parser.add_argument("--estricto", action="store_true", help="salir con 1 si hay regresiones")
+    args = parser.parse_args()
+
+    maquina = _maquina()
+    base = anteriores(args.historial, maquina) if args.historial else {}
+    print(f"{'caso':<30}{'n':>12}{'ms':>12}{'elementos/s':>14}{'pico':>10}{'vs. anterior':>14}")
+    resultados = []
+    for r in ejecutar(rapido=args.rapido, filtro=args.filtro):
+        resultados.append(r)
+        s_prev = base.get((r["caso"], r["n"]))
+        cambio = f"{r['s'] / s_prev:.2f}×" if s_prev else "—"
+        print(f"{r['caso']:<30}{r['n']:>12,}{1000 * r['s']:>12.3f}{r['por_s']:>14.3g}"
+              f"{_legible(r['pico_bytes']):>10}{cambio:>14}", flush=True)
+
+    if args.historial:
+        registro = {"ts": time.time(), "commit": _commit(), "maquina": maquina, "rapido": args.rapido,
+                    "resultados": resultados}
+        with open(args.historial, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    lentos = regresiones(resultados, base)
+    for caso, n, s_prev, s in lentos:
+        print(f"REGRESIÓN {caso} n={n:,}: {1000 * s_prev:.3f} ms -> {1000 * s:.3f} ms")
+    if lentos and args.estricto:
+        sys.exit(1)
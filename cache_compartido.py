@@ -0,0 +1,302 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# =============================
+# CACHÉ COMPARTIDA ENTRE SESIONES
+# =============================
+# Resultados puros (misma entrada -> misma salida) direccionados por el
+# contenido de sus parámetros y compartidos por todas las sesiones del
+# proceso: si 40 alumnos escriben x^2 - 4 o eligen "Ruta urbana", se calcula
+# una vez por servidor. Dos niveles:
+#   - memoria: LRU acotado por bytes aproximados;
+#   - disco (opcional, SQLite): sobrevive a reinicios y se comparte entre
+#     procesos; se activa con SIMULADORES_CACHE_DISCO=/ruta/cache.sqlite.
+# Una petición concurrente de la misma clave espera al cálculo en curso en
+# lugar de repetirlo. Los arreglos guardados quedan de solo lectura: el
+# mismo objeto se entrega a todas las sesiones.
+#
+# VERSION forma parte de la clave: hay que subirla si cambia el resultado de
+# algún cálculo cacheado, para que el nivel de disco no sirva datos viejos.
+
+VERSION = 3
+MAX_BYTES_MEMORIA = int(float(os.environ.get("SIMULADORES_CACHE_MB", 256)) * 2**20)
+MAX_BYTES_DISCO = int(float(os.environ.get("SIMULADORES_CACHE_DISCO_MB", 1024)) * 2**20)
+RUTA_DISCO = os.environ.get("SIMULADORES_CACHE_DISCO") or None
+
+AUSENTE = object()
+
+
+def huella_contenido(*partes) -> str:
+    """Hash estable de escalares, cadenas, tuplas (anidadas) y arreglos."""
+    h = hashlib.blake2b(digest_size=20)
+
+    def agregar(p):
+        if isinstance(p, np.ndarray):
+            h.update(b"A" + str((p.dtype.str, p.shape)).encode())
+            h.update(np.ascontiguousarray(p).tobytes())
+        elif isinstance(p, (tuple, list)):
+            h.update(b"(" + type(p).__name__.encode())
+            for q in p:
+                agregar(q)
+            h.update(b")")
+        else:
+            h.update(b"R" + repr(p).encode())
+        h.update(b"\0")
+
+    for p in partes:
+        agregar(p)
+    return h.hexdigest()
+
+
+def _congelar(valor):
+    # Arreglos de solo lectura dentro de tuplas, listas y dicts
+    if isinstance(valor, np.ndarray):
+        valor.flags.writeable = False
+    elif isinstance(valor, (tuple, list)):
+        for v in valor:
+            _congelar(v)
+    elif isinstance(valor, dict):
+        for v in valor.values():
+            _congelar(v)
+    return valor
+
+
+def tamano_aprox(valor) -> int:
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (tuple, list)):
+        return 64 + sum(tamano_aprox(v) for v in valor)
+    if isinstance(valor, dict):
+        return 64 + sum(tamano_aprox(v) for v in valor.values())
+    if isinstance(valor, (int, float, bool, type(None))):
+        return 32
+    if isinstance(valor, (str, bytes)):
+        return 64 + len(valor)
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+
+class _NivelDisco:
+    """Tabla SQLite (clave, espacio, valor serializado, bytes, último uso)."""
+
+    def __init__(self, ruta: str, max_bytes: int):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(ruta, timeout=30, check_same_thread=False, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute("CREATE TABLE IF NOT EXISTS entradas (clave TEXT PRIMARY KEY, espacio TEXT, "
+                          "valor BLOB, bytes INTEGER, uso REAL)")
+        self._con.execute("CREATE INDEX IF NOT EXISTS entradas_uso ON entradas (uso)")
+
+    def leer(self, clave: str):
+        with self._lock:
+            fila = self._con.execute("SELECT valor FROM entradas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                return AUSENTE
+            self._con.execute("UPDATE entradas SET uso = ? WHERE clave = ?", (time.time(), clave))
+        try:
+            return pickle.loads(fila[0])
+        except Exception:  # entrada corrupta o de otra versión de una librería
+            self.borrar(clave)
+            return AUSENTE
+
+    def escribir(self, clave: str, espacio: str, valor):
+        try:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        if len(datos) > self.max_bytes:
+            return
+        with self._lock:
+            self._con.execute("INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?, ?)",
+                              (clave, espacio, datos, len(datos), time.time()))
+            total = self._con.execute("SELECT COALESCE(SUM(bytes), 0) FROM entradas").fetchone()[0]
+            while total > self.max_bytes:
+                viejas = self._con.execute("SELECT clave, bytes FROM entradas ORDER BY uso LIMIT 64").fetchall()
+                if not viejas:
+                    break
+                self._con.executemany("DELETE FROM entradas WHERE clave = ?", [(c,) for c, _ in viejas])
+                total -= sum(b for _, b in viejas)
+
+    def borrar(self, clave: str):
+        with self._lock:
+            self._con.execute("DELETE FROM entradas WHERE clave = ?", (clave,))
+
+    def limpiar(self):
+        with self._lock:
+            self._con.execute("DELETE FROM entradas")
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            n, b = self._con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entradas").fetchone()
+        return {"entradas": n, "bytes": b}
+
+
+class CacheCompartida:
+    """LRU en memoria por bytes, con nivel SQLite opcional y métricas por espacio."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES_MEMORIA, ruta_disco: str = RUTA_DISCO,
+                 max_bytes_disco: int = MAX_BYTES_DISCO):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()   # clave -> (espacio, valor, bytes)
+        self._bytes = 0
+        self._en_curso = {}              # clave -> threading.Event
+        self._metricas = {}
+        self._lock = threading.Lock()
+        self.disco = _NivelDisco(ruta_disco, max_bytes_disco) if ruta_disco else None
+
+    def _contar(self, espacio: str, campo: str):
+        m = self._metricas.setdefault(espacio, {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "esperas": 0})
+        m[campo] += 1
+
+    def _guardar_memoria(self, clave, espacio, valor):
+        tam = tamano_aprox(valor)
+        if tam > self.max_bytes:
+            return
+        viejo = self._entradas.pop(clave, None)
+        if viejo is not None:
+            self._bytes -= viejo[2]
+        self._entradas[clave] = (espacio, valor, tam)
+        self._bytes += tam
+        while self._bytes > self.max_bytes and self._entradas:
+            _, (_, _, b) = self._entradas.popitem(last=False)
+            self._bytes -= b
+
+    def _de_memoria(self, clave, espacio, contar):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return AUSENTE
+            self._entradas.move_to_end(clave)
+            if contar:
+                self._contar(espacio, "hits_memoria")
+            return entrada[1]
+
+    def _de_disco(self, clave, espacio, contar):
+        if self.disco is None:
+            return AUSENTE
+        valor = self.disco.leer(clave)
+        if valor is not AUSENTE:
+            _congelar(valor)
+            with self._lock:
+                self._guardar_memoria(clave, espacio, valor)
+                if contar:
+                    self._contar(espacio, "hits_disco")
+        return valor
+
+    def consultar(self, espacio: str, parametros):
+        """Valor guardado o AUSENTE (sin calcular)."""
+        clave = huella_contenido(VERSION, espacio, parametros)
+        valor = self._de_memoria(clave, espacio, True)
+        if valor is AUSENTE:
+            valor = self._de_disco(clave, espacio, True)
+        if valor is AUSENTE:
+            with self._lock:
+                self._contar(espacio, "misses")
+        return valor
+
+    def guardar(self, espacio: str, parametros, valor):
+        clave = huella_contenido(VERSION, espacio, parametros)
+        _congelar(valor)
+        with self._lock:
+            self._guardar_memoria(clave, espacio, valor)
+        if self.disco is not None:
+            self.disco.escribir(clave, espacio, valor)
+        return valor
+
+    def obtener(self, espacio: str, parametros, calcular, cacheable=None):
+        """Valor para (espacio, parametros); `calcular()` solo se llama si no
+        está en ningún nivel ni lo está calculando otra sesión. Con
+        `cacheable(valor) -> bool` se descartan resultados parciales."""
+        clave = huella_contenido(VERSION, espacio, parametros)
+        valor = self._de_memoria(clave, espacio, True)
+        if valor is not AUSENTE:
+            return valor
+        with self._lock:
+            evento = self._en_curso.get(clave)
+            propio = evento is None
+            if propio:
+                evento = self._en_curso[clave] = threading.Event()
+            else:
+                self._contar(espacio, "esperas")
+        if not propio:
+            evento.wait()
+            valor = self._de_memoria(clave, espacio, False)
+            # El cálculo en curso falló o no era cacheable: se calcula aquí
+            return calcular() if valor is AUSENTE else valor
+        try:
+            # Una sola lectura de disco (o cálculo) por clave aunque esperen varias sesiones
+            valor = self._de_disco(clave, espacio, True)
+            if valor is not AUSENTE:
+                return valor
+            with self._lock:
+                self._contar(espacio, "misses")
+            valor = calcular()
+            if cacheable is None or cacheable(valor):
+                self.guardar(espacio, parametros, valor)
+            return valor
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+    def limpiar(self, disco: bool = False):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+            self._metricas.clear()
+        if disco and self.disco is not None:
+            self.disco.limpiar()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            espacios = {}
+            for e, m in self._metricas.items():
+                # Una espera resuelta por el cálculo de otra sesión también ahorra el cálculo
+                pedidos = m["hits_memoria"] + m["hits_disco"] + m["misses"] + m["esperas"]
+                espacios[e] = dict(m, tasa_acierto=1 - m["misses"] / pedidos if pedidos else 0.0)
+            res = {"entradas": len(self._entradas), "bytes": self._bytes, "espacios": espacios}
+        if self.disco is not None:
+            res["disco"] = self.disco.estadisticas()
+        return res
+
+
+cache_compartido = CacheCompartida()
+
+
+if __name__ == "__main__":
+    # python cache_compartido.py [ruta.sqlite]: 40 "sesiones" pidiendo la misma curva
+    import sys
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from crecimiento import ParametrosCrecimiento, tamano
+
+    ruta = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    p = ParametrosCrecimiento()
+    llamadas = []
+
+    def curva_lenta():
+        llamadas.append(1)
+        time.sleep(0.2)
+        return tamano(np.linspace(0, p.dias, 1_000_001), *p[:6])
+
+    for etiqueta in ("en frío", "tras reinicio"):
+        cache = CacheCompartida(ruta_disco=ruta)
+        llamadas.clear()
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(40) as pool:
+            list(pool.map(lambda _: cache.obtener("demo.curva", tuple(p), curva_lenta), range(40)))
+        m = cache.estadisticas()["espacios"]["demo.curva"]
+        print(f"{etiqueta}: {len(llamadas)} cálculo(s) para 40 sesiones en {time.perf_counter() - inicio:.2f} s; "
+              f"memoria {m['hits_memoria']}, disco {m['hits_disco']}, misses {m['misses']}, esperas {m['esperas']}")
@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+# =============================
+# PRUEBA DE CARGA: UN AULA DE SESIONES CONCURRENTES
+# =============================
+# Cada sesión simulada es un AppTest (sin navegador ni red) que reproduce una
+# traza de interacciones; cada paso es un rerun y se mide su latencia. Todas
+# las sesiones arrancan a la vez tras una barrera, como 60 alumnos abriendo
+# la página en el mismo minuto. Se reporta p50/p95/p99 de latencia por
+# traza, ocupación de CPU (del proceso y de la máquina) y memoria por
+# sesión, y el resultado se puede guardar como línea base y comparar:
+#
+#   python carga.py --sesiones 60 --trazas calculo app3 --guardar base.json
+#   python carga.py --sesiones 60 --trazas calculo app3 --base base.json
+#
+# Los valores de texto de una traza admiten {s} (índice de la sesión) para
+# que cada alumno escriba una expresión distinta y no acierte en caché.
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+class Paso(NamedTuple):
+    widget: str             # atributo de AppTest: slider, text_input, radio, selectbox, checkbox, button...
+    etiqueta: str = None    # se busca por etiqueta...
+    key: str = None         # ...o por key
+    valor: object = None    # None con button = click
+    pausa_s: float = 0.0    # "tiempo de pensar" antes del paso
+
+
+TRAZAS = {
+    "calculo": ("calculo.py", [
+        Paso("text_input", "Ingresa f(x):", valor="sin(x)*x^2 + {s}*x"),
+        *[Paso("slider", "Punto x₀ (Tangente)", valor=x0) for x0 in (0.5, 1.0, 1.5, 2.0, 2.5, 3.0)],
+        Paso("checkbox", "Visualizar Área Bajo la Curva", valor=True),
+        *[Paso("slider", "Punto x₀ (Tangente)", valor=x0) for x0 in (2.0, 1.0, 0.0)],
+    ]),
+    "app3": ("app3.py", [
+        Paso("radio", "Origen de datos", valor="Usar preset"),
+        Paso("selectbox", "Modo velocidad 1", valor="Velocidad uniforme"),
+        *[Paso("slider", key="vu1", valor=v) for v in (9.0, 10.0, 11.0, 12.0, 13.0)],
+        Paso("radio", "Modelo", valor="Cinemático"),
+        *[Paso("slider", "Aceleración máx. (m/s²)", valor=a) for a in (1.0, 2.0, 3.0)],
+    ]),
+    "area": ("areaBajoCurva.py", [
+        Paso("text_input", "Función f(x):", valor="x**2 + {s}"),
+        *[Paso("number_input", "Número de rectángulos (n)", valor=n) for n in (50, 500, 5000, 50_000)],
+    ]),
+    "densidad": ("densidad.py", [
+        *[Paso("slider", "Volumen de Agua (ml)", valor=v) for v in (150, 200, 250, 300)],
+    ]),
+}
+
+
+def cargar_trazas(ruta: str) -> dict:
+    """Trazas grabadas: {"nombre": {"pagina": "app.py", "pasos": [{"widget": ..., ...}]}}."""
+    with open(ruta, encoding="utf-8") as fh:
+        datos = json.load(fh)
+    return {nombre: (t["pagina"], [Paso(**p) for p in t["pasos"]]) for nombre, t in datos.items()}
+
+
+def _widget(at, paso: Paso):
+    if paso.key is not None:
+        return getattr(at, paso.widget)(key=paso.key)
+    for w in getattr(at, paso.widget):
+        if w.label == paso.etiqueta:
+            return w
+    raise LookupError(f"No hay {paso.widget} con etiqueta {paso.etiqueta!r}")
+
+
+def aplicar(at, paso: Paso, sesion: int):
+    w = _widget(at, paso)
+    valor = paso.valor.format(s=sesion) if isinstance(paso.valor, str) else paso.valor
+    if valor is None:
+        w.click()
+    else:
+        w.set_value(valor)
+
+
+# =============================
+# MONITOR DE CPU Y MEMORIA
+# =============================
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _cpu_maquina():
+    # (ocupado, total) en jiffies desde /proc/stat; None fuera de Linux
+    try:
+        with open("/proc/stat") as fh:
+            campos = [int(c) for c in fh.readline().split()[1:]]
+        inactivo = campos[3] + (campos[4] if len(campos) > 4 else 0)
+        return sum(campos) - inactivo, sum(campos)
+    except (OSError, ValueError):
+        return None
+
+
+class Monitor(threading.Thread):
+    """Muestrea el RSS del proceso para quedarse con el pico."""
+
+    def __init__(self, intervalo_s: float = 0.05):
+        super().__init__(daemon=True)
+        self.intervalo_s = intervalo_s
+        self.pico_mb = _rss_mb()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo_s):
+            self.pico_mb = max(self.pico_mb, _rss_mb())
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+        self.pico_mb = max(self.pico_mb, _rss_mb())
+
+
+# =============================
+# EJECUCIÓN
+# =============================
+_bytecode = {}
+_lock_bytecode = threading.Lock()
+_runtime = [None]
+
+
+def _preparar_apptest_concurrente():
+    """AppTest está pensado para una app a la vez; para varias sesiones en
+    hilos del mismo proceso se ajusta lo global que toca en cada run():
+
+    - Crea un ScriptCache nuevo en cada run() y recompila el script, mientras
+      el servidor compila cada página una vez por proceso. Además, ast.parse
+      concurrente falla en CPython 3.11 ("AST constructor recursion depth
+      mismatch"). Se comparte un caché de bytecode.
+    - Pone Runtime._instance a su runtime simulado y lo borra al terminar,
+      lo que deja sin runtime a los scripts de otras sesiones. Se conserva
+      el último runtime, y todas las sesiones comparten uno, como en el
+      servidor.
+    - Activa global.appTest solo durante su run(); se deja activo.
+    """
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    if getattr(ScriptCache.get_bytecode, "_compartido", False):
+        return
+    config.set_option("global.appTest", True)
+    original = ScriptCache.get_bytecode
+
+    def get_bytecode(self, script_path):
+        with _lock_bytecode:
+            clave = (script_path, os.path.getmtime(script_path))
+            if clave not in _bytecode:
+                _bytecode[clave] = original(self, script_path)
+            return _bytecode[clave]
+
+    def instance(cls):
+        if cls._instance is not None:
+            _runtime[0] = cls._instance
+        if _runtime[0] is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return _runtime[0]
+
+    def exists(cls):
+        return cls._instance is not None or _runtime[0] is not None
+
+    get_bytecode._compartido = True
+    ScriptCache.get_bytecode = get_bytecode
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+
+def _sesion(i, nombre, pagina, pasos, barrera, latencias, errores, timeout_s):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(DIRECTORIO, pagina), default_timeout=timeout_s)
+    barrera.wait()
+    try:
+        t0 = time.perf_counter()
+        at.run()
+        # Una página que falla al abrir no es una "carga" válida ni tiene widgets que mover
+        if at.exception:
+            errores.append((nombre, i, at.exception[0].value))
+            return
+        latencias.append((nombre, "carga", time.perf_counter() - t0))
+        for paso in pasos:
+            if paso.pausa_s:
+                time.sleep(paso.pausa_s)
+            aplicar(at, paso, i)
+            t0 = time.perf_counter()
+            at.run()
+            latencias.append((nombre, paso.widget, time.perf_counter() - t0))
+            if at.exception:
+                errores.append((nombre, i, at.exception[0].value))
+                return
+    except Exception as e:
+        errores.append((nombre, i, repr(e)))
+
+
+def ejecutar(n_sesiones: int, trazas: dict, timeout_s: float = 300.0, en_frio: bool = False) -> dict:
+    """Lanza n_sesiones (trazas asignadas en ronda) y devuelve el informe.
+
+    Salvo `en_frio`, cada página se abre una vez antes de medir: los módulos
+    importados no cuentan como memoria por sesión ni como latencia.
+    """
+    _preparar_apptest_concurrente()
+    if not en_frio:
+        from streamlit.testing.v1 import AppTest
+        for pagina, _ in trazas.values():
+            AppTest.from_file(os.path.join(DIRECTORIO, pagina), default_timeout=timeout_s).run()
+    nombres = list(trazas)
+    latencias, errores = [], []
+    barrera = threading.Barrier(n_sesiones + 1)
+    hilos = []
+    for i in range(n_sesiones):
+        nombre = nombres[i % len(nombres)]
+        pagina, pasos = trazas[nombre]
+        hilos.append(threading.Thread(target=_sesion, args=(i, nombre, pagina, pasos, barrera, latencias,
+                                                             errores, timeout_s), daemon=True))
+    for h in hilos:
+        h.start()
+    rss_base = _rss_mb()
+    monitor = Monitor()
+    monitor.start()
+    cpu0, maq0 = os.times(), _cpu_maquina()
+    barrera.wait()
+    t0 = time.perf_counter()
+    for h in hilos:
+        h.join()
+    pared = time.perf_counter() - t0
+    cpu1, maq1 = os.times(), _cpu_maquina()
+    monitor.parar()
+
+    cpu_proceso = (cpu1.user - cpu0.user) + (cpu1.system - cpu0.system)
+    por_traza = {}
+    for nombre in nombres + ["total"]:
+        lat = np.array([s for t, _, s in latencias if nombre in (t, "total")])
+        if lat.size == 0:
+            continue
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        por_traza[nombre] = {"reruns": int(lat.size), "p50_s": float(p50), "p95_s": float(p95),
+                             "p99_s": float(p99), "max_s": float(lat.max())}
+    return {
+        "sesiones": n_sesiones,
+        "en_frio": en_frio,
+        "trazas": nombres,
+        "pared_s": pared,
+        "reruns_por_s": len(latencias) / pared if pared > 0 else 0.0,
+        # núcleos ocupados por este proceso (los trabajadores de evaluador.py van aparte)
+        "nucleos_proceso": cpu_proceso / pared if pared > 0 else 0.0,
+        "cpu_maquina_pct": (100 * (maq1[0] - maq0[0]) / max(maq1[1] - maq0[1], 1)) if maq0 and maq1 else None,
+        "nucleos_disponibles": os.cpu_count(),
+        "rss_base_mb": rss_base,
+        "rss_pico_mb": monitor.pico_mb,
+        "mb_por_sesion": (monitor.pico_mb - rss_base) / n_sesiones,
+        "latencia": por_traza,
+        "errores": [f"{t} #{i}: {e}" for t, i, e in errores],
+    }
+
+
+def imprimir(informe: dict, base: dict = None):
+    def cambio(actual, previo):
+        return f"  ({actual / previo:.2f}× base)" if previo else ""
+
+    print(f"{informe['sesiones']} sesiones ({', '.join(informe['trazas'])}) en {informe['pared_s']:.1f} s, "
+          f"{informe['reruns_por_s']:.1f} reruns/s")
+    cpu_maq = informe["cpu_maquina_pct"]
+    print(f"CPU: {informe['nucleos_proceso']:.2f} núcleos del proceso de {informe['nucleos_disponibles']}"
+          + (f", máquina al {cpu_maq:.0f} %" if cpu_maq is not None else ""))
+    print(f"Memoria: RSS {informe['rss_base_mb']:.0f} -> {informe['rss_pico_mb']:.0f} MB, "
+          f"{informe['mb_por_sesion']:.1f} MB por sesión" + cambio(informe["mb_por_sesion"], (base or {}).get("mb_por_sesion")))
+    print(f"  {'traza':<10}{'reruns':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    for nombre, l in informe["latencia"].items():
+        previo = (base or {}).get("latencia", {}).get(nombre, {})
+        print(f"  {nombre:<10}{l['reruns']:>8}{1000 * l['p50_s']:>10.0f}{1000 * l['p95_s']:>10.0f}"
+              f"{1000 * l['p99_s']:>10.0f}{1000 * l['max_s']:>10.0f}" + cambio(l["p95_s"], previo.get("p95_s")))
+    for e in informe["errores"][:10]:
+        print("  ERROR", e)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sesiones concurrentes simuladas con AppTest")
+    parser.add_argument("--sesiones", type=int, default=60)
+    parser.add_argument("--trazas", nargs="+", default=["calculo", "app3"], help="nombres de TRAZAS o del archivo")
+    parser.add_argument("--archivo-trazas", help="JSON con trazas grabadas (ver cargar_trazas)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="límite por rerun (s)")
+    parser.add_argument("--en-frio", action="store_true", help="no abrir cada página antes de medir")
+    parser.add_argument("--guardar", help="escribir el informe JSON (línea base)")
+    parser.add_argument("--base", help="informe JSON con el que comparar")
+    args = parser.parse_args()
+
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    disponibles = dict(TRAZAS, **(cargar_trazas(args.archivo_trazas) if args.archivo_trazas else {}))
+    trazas = {n: disponibles[n] for n in args.trazas}
+    informe = ejecutar(args.sesiones, trazas, args.timeout, args.en_frio)
+    base = None
+    if args.base:
+        with open(args.base, encoding="utf-8") as fh:
+            base = json.load(fh)
+    imprimir(informe, base)
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as fh:
+            json.dump(informe, fh, ensure_ascii=False, indent=2)
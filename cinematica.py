@@ -0,0 +1,152 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from instrumentacion import instrumentado
+from tramos import ResultadosLote, resultado_df
+
+# =============================
+# MODELO CINEMÁTICO DE TRAMOS
+# =============================
+# Perfil de velocidad con aceleración y frenado limitados: la velocidad de
+# cada tramo es un tope, no un valor instantáneo. Se resuelve con la pasada
+# hacia adelante (límite de aceleración) y hacia atrás (límite de frenado)
+# sobre las fronteras entre tramos. Con u = v² ambas recurrencias son
+# u[k+1] = min(c[k+1], u[k] + e[k]); restando la suma acumulada de e queda un
+# mínimo acumulado, así que las dos pasadas son O(n) sin bucles de Python.
+
+G = 9.81
+
+
+class ParametrosCinematicos(NamedTuple):
+    a_max: float = 1.5           # m/s², aceleración máxima en llano
+    b_max: float = 2.0           # m/s², frenado máximo en llano
+    v_inicial: float = 0.0       # m/s
+    v_final: float = 0.0         # m/s
+    masa: float = 1200.0         # kg
+    c_rodadura: float = 0.012
+    cda: float = 0.65            # m², coeficiente aerodinámico × área frontal
+    rho_aire: float = 1.2        # kg/m³
+
+
+class ResultadosCinematicos(NamedTuple):
+    v_entrada: np.ndarray        # (n_tramos,) m/s
+    v_salida: np.ndarray
+    v_pico: np.ndarray           # velocidad máxima alcanzada dentro del tramo
+    tiempos: np.ndarray          # s; inf si el vehículo no puede avanzar
+    tiempo_acum: np.ndarray
+    energia_J: np.ndarray        # energía de tracción estimada por tramo (sin regeneración)
+
+
+def _minimo_acumulado(c, e):
+    # u[k] = min_{j<=k} (c[j] + S[k] - S[j]) con S = suma acumulada de e
+    s = np.concatenate([[0.0], np.cumsum(e)])
+    return s + np.minimum.accumulate(c - s)
+
+
+@instrumentado("cinematica.simular_cinematico")
+def simular_cinematico(distancias, velocidades_max, pendientes=None,
+                       parametros: ParametrosCinematicos = ParametrosCinematicos()) -> ResultadosCinematicos:
+    """Tiempos de un recorrido con límites de aceleración/frenado.
+
+    `velocidades_max` es el tope de cada tramo (m/s) y `pendientes` la
+    pendiente de cada tramo como fracción (0.05 = 5 % de subida). En subidas
+    la aceleración disponible baja y el frenado sube; si la pendiente supera
+    lo que permite a_max, el vehículo no gana velocidad en ese tramo.
+    """
+    p = parametros
+    d = np.asarray(distancias, dtype=float)
+    cap = np.clip(np.asarray(velocidades_max, dtype=float), 0.0, None)
+    cap = np.where(np.isfinite(cap), cap, 0.0)
+    n = d.size
+    pend = np.zeros(n) if pendientes is None else np.broadcast_to(np.asarray(pendientes, dtype=float), (n,))
+    seno = pend / np.sqrt(1.0 + pend**2)
+    a = np.clip(p.a_max - G * seno, 0.0, None)
+    b = np.clip(p.b_max + G * seno, 0.0, None)
+
+    # Tope en cada frontera: el menor de los dos tramos que comparte
+    c = np.empty(n + 1)
+    c[1:-1] = np.minimum(cap[:-1], cap[1:]) ** 2
+    c[0] = min(p.v_inicial, cap[0]) ** 2
+    c[-1] = min(p.v_final, cap[-1]) ** 2
+    u = _minimo_acumulado(c, 2 * a * d)
+    u = _minimo_acumulado(u[::-1], (2 * b * d)[::-1])[::-1]
+    u = np.clip(u, 0.0, None)
+
+    u0, u1 = u[:-1], u[1:]
+    v0, v1 = np.sqrt(u0), np.sqrt(u1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Cruce de la curva de aceleración desde u0 con la de frenado hacia u1
+        u_cruce = np.where(a + b > 0, (b * u0 + a * u1 + 2 * a * b * d) / (a + b), u0)
+        vp = np.minimum(np.sqrt(np.clip(u_cruce, 0.0, None)), cap)
+        vp = np.maximum(vp, np.maximum(v0, v1))
+        d_acel = np.where(a > 0, (vp**2 - u0) / (2 * a), 0.0)
+        d_fren = np.where(b > 0, (vp**2 - u1) / (2 * b), 0.0)
+        d_cruc = np.clip(d - d_acel - d_fren, 0.0, None)
+        t = (np.where(a > 0, (vp - v0) / a, 0.0)
+             + np.where(b > 0, (vp - v1) / b, 0.0)
+             + np.where(vp > 0, d_cruc / vp, np.where(d_cruc > 0, np.inf, 0.0)))
+
+    # Energía de tracción: ganancia cinética en aceleración, subida, rodadura y
+    # arrastre (v² medio por fase, exacto para aceleración constante en v²)
+    v2_dist = d_acel * (u0 + vp**2) / 2 + d_fren * (vp**2 + u1) / 2 + d_cruc * vp**2
+    resistencia = p.masa * G * p.c_rodadura * d + 0.5 * p.rho_aire * p.cda * v2_dist
+    energia = 0.5 * p.masa * (vp**2 - u0) + p.masa * G * seno * d + resistencia
+    energia = np.clip(energia, 0.0, None)
+
+    return ResultadosCinematicos(
+        v_entrada=v0, v_salida=v1, v_pico=vp,
+        tiempos=t, tiempo_acum=np.cumsum(t), energia_J=energia
+    )
+
+
+def a_lote(distancias, res: ResultadosCinematicos) -> ResultadosLote:
+    """Resultado de una configuración en el formato de simular_lote: la
+    velocidad de cada tramo es la media (distancia / tiempo) y la máxima es la
+    velocidad pico, para que métricas, gráficas y exportación no cambien."""
+    d = np.asarray(distancias, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = np.where(np.isfinite(res.tiempos) & (res.tiempos > 0), d / res.tiempos, np.nan)
+    total = np.where(np.isfinite(res.tiempos), res.tiempos, 0.0).sum()
+    media = d.sum() / total if total > 0 else 0.0
+    return ResultadosLote(
+        velocidades=v[None, :],
+        tiempos=res.tiempos[None, :],
+        tiempo_acum=res.tiempo_acum[None, :],
+        tiempo_total=np.array([total]),
+        velocidad_media=np.array([media]),
+        velocidad_max=np.array([np.nanmax(res.v_pico) if res.v_pico.size else np.nan]),
+        velocidad_min=np.array([np.fmin.reduce(v) if v.size else np.nan])
+    )
+
+
+def resultado_df_cinematico(df, lote: ResultadosLote, res: ResultadosCinematicos):
+    # Mismas columnas que resultado_df más el detalle cinemático y la energía
+    df = resultado_df(df, lote, 0)
+    df["v_entrada_m_s"] = res.v_entrada
+    df["v_salida_m_s"] = res.v_salida
+    df["v_pico_m_s"] = res.v_pico
+    df["energia_kJ"] = res.energia_J / 1000
+    return df
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    n = 100_000
+    d = rng.uniform(20, 500, n)
+    topes = rng.uniform(5, 30, n)
+    pend = rng.normal(0, 0.03, n)
+    t0 = time.perf_counter()
+    res = simular_cinematico(d, topes, pend)
+    print(f"{n} tramos: {1000 * (time.perf_counter() - t0):.1f} ms, "
+          f"tiempo total {res.tiempo_acum[-1]:.0f} s, energía {res.energia_J.sum() / 3.6e6:.1f} kWh")
+    # Verificación contra la pasada escalar en una ruta corta
+    d, topes = d[:200], topes[:200]
+    r = simular_cinematico(d, topes)
+    u = [0.0]
+    for k in range(200):
+        u.append(min(min(topes[k], topes[k + 1]) ** 2 if k < 199 else 0.0, u[-1] + 2 * 1.5 * d[k]))
+    for k in range(199, -1, -1):
+        u[k] = min(u[k], u[k + 1] + 2 * 2.0 * d[k])
+    print("máx. diferencia con la pasada escalar:", np.abs(r.v_entrada - np.sqrt(u[:-1])).max())
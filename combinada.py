@@ -0,0 +1,9 @@
+import numpy as np
+
+# =============================
+# FUNCIÓN COMBINADA: CUADRÁTICA + SENOIDAL
+# =============================
+def funcion_combinada(x, a: float, b: float, c: float):
+    """a·x² + b·sin(c·x), con broadcasting sobre x y los coeficientes."""
+    x = np.asarray(x, dtype=float)
+    return a * x**2 + b * np.sin(c * x)
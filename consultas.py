@@ -0,0 +1,273 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# ALMACÉN COLUMNAR DE CORRIDAS DE SIMULACIÓN
+# =============================
+# Las corridas (con el esquema de simulacion_crecimiento_resultados.csv) se
+# guardan concatenadas en un archivo binario por columna: métricas en
+# float32, día en uint16 y BBCH como código uint8 (la etiqueta de texto se
+# guarda una sola vez). `desplazamientos` marca dónde empieza cada corrida.
+# Al abrir, cada columna es un np.memmap: una consulta solo lee las páginas
+# que toca, así se comparan miles de corridas sin cargarlas en RAM.
+#
+# Al escribir se precalculan las fronteras de etapa (posición y código de
+# cada cambio de BBCH) y qué columnas son monótonas dentro de cada corrida;
+# en esas columnas los umbrales se resuelven con búsqueda binaria.
+
+COLUMNA_DIA = "Día"
+COLUMNA_BBCH = "BBCH"
+COLUMNAS_METRICAS = ["GDD_Acumulado", "Tmax", "Tmin", "Altura (cm)", "LAI (m2/m2)",
+                     "Luz_Interceptada (f)", "ET_Diaria (mm)"]
+ARCHIVO_META = "meta.json"
+
+
+def codigo_bbch(etiqueta: str) -> int:
+    m = re.match(r"\s*(\d{1,3})", str(etiqueta))
+    if m is None:
+        raise ValueError(f"Etiqueta BBCH sin código numérico: {etiqueta!r}")
+    return int(m.group(1))
+
+
+def _umbral_en(dtype, umbral: float):
+    """Mayor valor de `dtype` que no supera `umbral`: para v de ese tipo,
+    v > umbral equivale a v > resultado. None si todos lo superan."""
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        u = dtype.type(umbral)
+        # float(u): comparar en float64, no en el tipo de u (NEP 50)
+        return np.nextafter(u, dtype.type(-np.inf)) if float(u) > umbral else u
+    info = np.iinfo(dtype)
+    if umbral < info.min:
+        return None
+    return dtype.type(min(np.floor(umbral), info.max))
+
+
+def _archivo(nombre: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_]+", "_", nombre).strip("_") + ".bin"
+
+
+class EscritorCorridas:
+    """Agrega corridas al almacén por bloques, sin retenerlas en memoria."""
+
+    def __init__(self, directorio: str):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self._columnas = [COLUMNA_DIA, COLUMNA_BBCH] + COLUMNAS_METRICAS
+        self._tipos = {COLUMNA_DIA: "uint16", COLUMNA_BBCH: "uint8", **{c: "float32" for c in COLUMNAS_METRICAS}}
+        self._fh = {c: open(os.path.join(directorio, _archivo(c)), "wb") for c in self._columnas}
+        self._fh_trans = {n: open(os.path.join(directorio, f"transiciones_{n}.bin"), "wb")
+                          for n in ("posicion", "codigo")}
+        self._desplazamientos = [0]
+        self._n_transiciones = [0]
+        self._monotona = {c: True for c in COLUMNAS_METRICAS + [COLUMNA_BBCH, COLUMNA_DIA]}
+        self._etiquetas = {}
+
+    def agregar_arreglos(self, columnas: dict, bbch_codigos, etiquetas: dict = None):
+        """Corridas de igual longitud: cada valor de `columnas` (y los códigos
+        BBCH) es (n_corridas, n_dias). El día se numera 1..n_dias si falta."""
+        codigos = np.atleast_2d(np.asarray(bbch_codigos, dtype=np.uint8))
+        n_corridas, n_dias = codigos.shape
+        datos = {COLUMNA_BBCH: codigos}
+        datos[COLUMNA_DIA] = np.atleast_2d(columnas.get(COLUMNA_DIA, np.broadcast_to(np.arange(1, n_dias + 1),
+                                                                                      (n_corridas, n_dias))))
+        for c in COLUMNAS_METRICAS:
+            datos[c] = np.atleast_2d(np.asarray(columnas[c]))
+        for c in self._columnas:
+            a = np.ascontiguousarray(datos[c], dtype=self._tipos[c])
+            self._fh[c].write(a.tobytes())
+            if c in self._monotona and self._monotona[c]:
+                # Comparar vecinos, no np.diff: en uint8/uint16 la resta da la vuelta
+                self._monotona[c] = bool((a[:, 1:] >= a[:, :-1]).all())
+
+        # Fronteras de etapa: primera fila de cada corrida y cada cambio de código
+        cambio = np.ones_like(codigos, dtype=bool)
+        cambio[:, 1:] = codigos[:, 1:] != codigos[:, :-1]
+        filas, cols = np.nonzero(cambio)
+        base = self._desplazamientos[-1] + np.arange(n_corridas, dtype=np.int64) * n_dias
+        self._fh_trans["posicion"].write((base[filas] + cols).astype(np.int64).tobytes())
+        self._fh_trans["codigo"].write(codigos[filas, cols].tobytes())
+        por_corrida = np.bincount(filas, minlength=n_corridas)
+        self._n_transiciones.extend((self._n_transiciones[-1] + np.cumsum(por_corrida)).tolist())
+        self._desplazamientos.extend((self._desplazamientos[-1] + n_dias * np.arange(1, n_corridas + 1)).tolist())
+        if etiquetas:
+            self._etiquetas.update({int(k): v for k, v in etiquetas.items()})
+
+    def agregar_df(self, df: pd.DataFrame):
+        etiquetas = df[COLUMNA_BBCH].astype("category")
+        codigos = {e: codigo_bbch(e) for e in etiquetas.cat.categories}
+        self.agregar_arreglos(
+            {c: df[c].to_numpy()[None, :] for c in COLUMNAS_METRICAS + [COLUMNA_DIA]},
+            etiquetas.map(codigos).to_numpy(dtype=np.uint8)[None, :],
+            {v: k for k, v in codigos.items()}
+        )
+
+    def cerrar(self):
+        for fh in list(self._fh.values()) + list(self._fh_trans.values()):
+            fh.close()
+        meta = {
+            "columnas": {c: {"archivo": _archivo(c), "dtype": self._tipos[c]} for c in self._columnas},
+            "desplazamientos": self._desplazamientos,
+            "transiciones": self._n_transiciones,
+            "monotona": self._monotona,
+            "etiquetas": {str(k): v for k, v in sorted(self._etiquetas.items())},
+        }
+        with open(os.path.join(self.directorio, ARCHIVO_META), "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def convertir_csv(rutas_csv, directorio: str):
+    """Convierte uno o varios CSV de resultados al almacén columnar."""
+    if isinstance(rutas_csv, (str, os.PathLike)):
+        rutas_csv = [rutas_csv]
+    with EscritorCorridas(directorio) as escritor:
+        for ruta in rutas_csv:
+            escritor.agregar_df(pd.read_csv(ruta))
+    return AlmacenConsultas(directorio)
+
+
+class AlmacenConsultas:
+    """Consultas sobre un almacén escrito por EscritorCorridas (solo lectura)."""
+
+    def __init__(self, directorio: str):
+        with open(os.path.join(directorio, ARCHIVO_META), encoding="utf-8") as fh:
+            meta = json.load(fh)
+        self.desplazamientos = np.array(meta["desplazamientos"], dtype=np.int64)
+        self.monotona = meta["monotona"]
+        self.etiquetas = {int(k): v for k, v in meta["etiquetas"].items()}
+        n = int(self.desplazamientos[-1])
+        self._cols = {}
+        for c, info in meta["columnas"].items():
+            self._cols[c] = np.memmap(os.path.join(directorio, info["archivo"]), dtype=info["dtype"],
+                                      mode="r", shape=(n,)) if n else np.empty(0, dtype=info["dtype"])
+        self._trans_ini = np.array(meta["transiciones"], dtype=np.int64)
+        n_t = int(self._trans_ini[-1])
+        self._trans_pos = np.fromfile(os.path.join(directorio, "transiciones_posicion.bin"), dtype=np.int64, count=n_t)
+        self._trans_cod = np.fromfile(os.path.join(directorio, "transiciones_codigo.bin"), dtype=np.uint8, count=n_t)
+
+    @property
+    def n_corridas(self) -> int:
+        return self.desplazamientos.size - 1
+
+    def _tramo(self, i: int) -> slice:
+        return slice(int(self.desplazamientos[i]), int(self.desplazamientos[i + 1]))
+
+    def corrida(self, i: int, columnas=None) -> pd.DataFrame:
+        sl = self._tramo(i)
+        columnas = columnas or [COLUMNA_DIA] + COLUMNAS_METRICAS + [COLUMNA_BBCH]
+        datos = {c: np.asarray(self._cols[c][sl]) for c in columnas}
+        if COLUMNA_BBCH in datos:
+            # Categorías a partir de los códigos presentes; sin etiqueta se muestra el código
+            cat = pd.Categorical(datos[COLUMNA_BBCH])
+            datos[COLUMNA_BBCH] = cat.rename_categories([self.etiquetas.get(int(k), str(k)) for k in cat.categories])
+        return pd.DataFrame(datos)
+
+    def rango_dias(self, i: int, desde: int, hasta: int, columnas=None) -> pd.DataFrame:
+        # Con el día ordenado en todas las corridas (lo normal) búsqueda binaria;
+        # si no (o en almacenes sin ese dato), máscara
+        sl = self._tramo(i)
+        dias = self._cols[COLUMNA_DIA][sl]
+        df = self.corrida(i, columnas)
+        if self.monotona.get(COLUMNA_DIA):
+            a, b = np.searchsorted(dias, desde, side="left"), np.searchsorted(dias, hasta, side="right")
+            return df.iloc[a:b].reset_index(drop=True)
+        return df[(dias >= desde) & (dias <= hasta)].reset_index(drop=True)
+
+    def primer_dia(self, columna: str, umbral: float, corridas=None) -> np.ndarray:
+        """Primer día con `columna` > umbral en cada corrida (0 si nunca).
+
+        En columnas monótonas es una búsqueda binaria por corrida; si no, se
+        recorre la corrida.
+        """
+        corridas = range(self.n_corridas) if corridas is None else corridas
+        col, dias = self._cols[columna], self._cols[COLUMNA_DIA]
+        res = np.zeros(len(corridas), dtype=np.int64)
+        # Mismo umbral en ambos caminos, ya en el tipo de la columna
+        u = _umbral_en(col.dtype, umbral)
+        for k, i in enumerate(corridas):
+            sl = self._tramo(i)
+            valores = col[sl]
+            if u is None:
+                j = 0
+            elif self.monotona.get(columna):
+                j = int(np.searchsorted(valores, u, side="right"))
+            else:
+                mayores = np.flatnonzero(valores > u)
+                j = int(mayores[0]) if mayores.size else valores.size
+            if j < valores.size:
+                res[k] = dias[sl.start + j]
+        return res
+
+    def transiciones(self, i: int = None) -> pd.DataFrame:
+        """Fronteras de etapa precalculadas con día y GDD acumulado en cada
+        cambio; sin `i`, las de todas las corridas."""
+        if i is None:
+            ini, fin = 0, int(self._trans_ini[-1])
+        else:
+            ini, fin = int(self._trans_ini[i]), int(self._trans_ini[i + 1])
+        pos = self._trans_pos[ini:fin]
+        cod = self._trans_cod[ini:fin]
+        return pd.DataFrame({
+            "corrida": np.searchsorted(self.desplazamientos, pos, side="right") - 1,
+            "codigo": cod,
+            "etapa": [self.etiquetas.get(int(c), str(c)) for c in cod],
+            "dia": np.asarray(self._cols[COLUMNA_DIA][pos]),
+            "GDD_Acumulado": np.asarray(self._cols["GDD_Acumulado"][pos]),
+        })
+
+    def dias_en_etapa(self, i: int, codigo_desde: int, codigo_hasta: int) -> np.ndarray:
+        """Días de la corrida i con BBCH en [codigo_desde, codigo_hasta]."""
+        ini, fin = int(self._trans_ini[i]), int(self._trans_ini[i + 1])
+        pos = self._trans_pos[ini:fin]
+        cod = self._trans_cod[ini:fin]
+        fin_tramo = np.append(pos[1:], self.desplazamientos[i + 1])
+        dentro = (cod >= codigo_desde) & (cod <= codigo_hasta)
+        dias = self._cols[COLUMNA_DIA]
+        partes = [np.asarray(dias[a:b]) for a, b in zip(pos[dentro], fin_tramo[dentro])]
+        return np.concatenate(partes) if partes else np.empty(0, dtype=np.uint16)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from cultivo import simular_cultivo, clima_sintetico, ETAPAS_BBCH
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = convertir_csv(os.path.join(base, "simulacion_crecimiento_resultados.csv"), os.path.join(tmp, "csv"))
+        print("Primer día con LAI > 3:", almacen.primer_dia("LAI (m2/m2)", 3)[0])
+        print(almacen.transiciones(0))
+
+        # 10k corridas sintéticas escritas por bloques
+        etiquetas = {codigo_bbch(e): e for _, e in ETAPAS_BBCH}
+        codigos = np.array([codigo_bbch(e) for _, e in ETAPAS_BBCH], dtype=np.uint8)
+        t0 = time.perf_counter()
+        with EscritorCorridas(os.path.join(tmp, "lote")) as escritor:
+            for bloque in range(10):
+                tmax, tmin, et0 = clima_sintetico((1000, 90), semilla=bloque)
+                r = simular_cultivo(tmax, tmin, et0)
+                escritor.agregar_arreglos({"GDD_Acumulado": r.gdd_acumulado, "Tmax": tmax, "Tmin": tmin,
+                                           "Altura (cm)": r.altura_cm, "LAI (m2/m2)": r.lai,
+                                           "Luz_Interceptada (f)": r.luz_interceptada, "ET_Diaria (mm)": r.et_mm},
+                                          codigos[r.etapa], etiquetas)
+        print(f"10k corridas escritas en {time.perf_counter() - t0:.2f} s")
+        almacen = AlmacenConsultas(os.path.join(tmp, "lote"))
+        t0 = time.perf_counter()
+        dias = almacen.primer_dia("LAI (m2/m2)", 3)
+        print(f"Primer día LAI > 3 en {almacen.n_corridas} corridas: {1000 * (time.perf_counter() - t0):.0f} ms, "
+              f"mediana día {np.median(dias):.0f}")
+        t0 = time.perf_counter()
+        trans = almacen.transiciones()
+        print(f"Transiciones de etapa de todas las corridas: {1000 * (time.perf_counter() - t0):.0f} ms, "
+              f"GDD medio al pasar a BBCH 30: {trans.loc[trans.codigo == 30, 'GDD_Acumulado'].mean():.1f}")
+        print("Días en BBCH 30–39 de la corrida 0:", almacen.dias_en_etapa(0, 30, 39)[[0, -1]])
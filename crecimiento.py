@@ -0,0 +1,133 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from cache_compartido import cache_compartido
+from instrumentacion import instrumentado
+
+# =============================
+# MOTOR DE CRECIMIENTO LOGÍSTICO
+# =============================
+# P(t) = Pmax / (1 + A·e^(−r_ef·t)), con A = (Pmax − P0)/P0 y r_ef = r·L·N·W.
+# Todas las funciones aceptan arreglos que se combinan por broadcasting, así
+# una malla de millones de combinaciones se evalúa en unas pocas pasadas de
+# NumPy. Las cantidades derivadas salen de la forma cerrada, no de muestrear.
+
+# Rango de cada parámetro en la interfaz (para los ejes de sensibilidad)
+RANGOS = {
+    "r": (0.01, 1.0),
+    "L": (0.0, 1.0),
+    "N": (0.0, 1.0),
+    "W": (0.0, 1.0),
+    "P0": (0.01, 5.0),
+    "Pmax": (0.5, 10.0),
+}
+
+CANTIDADES = {
+    "tamano_final": "Tamaño final (m)",
+    "dia_inflexion": "Día de inflexión",
+    "dias_90": "Días al 90 % de Pmax",
+    "tasa_max": "Tasa máxima (m/día)",
+}
+
+
+class ParametrosCrecimiento(NamedTuple):
+    r: float = 0.1
+    L: float = 1.0
+    N: float = 1.0
+    W: float = 1.0
+    P0: float = 0.1
+    Pmax: float = 2.0
+    dias: float = 100.0
+
+
+class Derivadas(NamedTuple):
+    tamano_final: np.ndarray     # P(dias)
+    dia_inflexion: np.ndarray    # P = Pmax/2; 0 si ya se pasó, inf si r_ef = 0
+    dias_90: np.ndarray          # P = 0.9·Pmax; 0 si ya se alcanzó, inf si nunca
+    tasa_max: np.ndarray         # máximo de dP/dt en [0, dias]
+
+
+def tamano(t, r, L, N, W, P0, Pmax):
+    r_ef = r * L * N * W
+    return Pmax / (1 + ((Pmax - P0) / P0) * np.exp(-r_ef * t))
+
+
+def tasa(P, r_ef, Pmax):
+    return r_ef * P * (1 - P / Pmax)
+
+
+def derivadas(r, L, N, W, P0, Pmax, dias) -> Derivadas:
+    r_ef = np.asarray(r * L * N * W, dtype=float)
+    A = (Pmax - P0) / P0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # ln(A)/r_ef y ln(9A)/r_ef; sin raíz real (A ≤ 1 o 9A ≤ 1) el umbral ya se cruzó
+        t_inf = np.where(A > 1, np.log(A) / r_ef, 0.0)
+        t_90 = np.where(9 * A > 1, np.log(9 * A) / r_ef, 0.0)
+        t_inf = np.where(np.isnan(t_inf), np.inf, t_inf)
+        t_90 = np.where(np.isnan(t_90), np.inf, t_90)
+        final = Pmax / (1 + A * np.exp(-r_ef * dias))
+        # dP/dt en t es unimodal (o monótona): el máximo está en 0, en dias o en la inflexión
+        t_pico = np.clip(t_inf, 0.0, dias)
+        candidatos = [tasa(P0, r_ef, Pmax), tasa(final, r_ef, Pmax),
+                      tasa(Pmax / (1 + A * np.exp(-r_ef * t_pico)), r_ef, Pmax)]
+        tasa_max = np.fmax.reduce(np.broadcast_arrays(*candidatos))
+    return Derivadas(tamano_final=final, dia_inflexion=t_inf, dias_90=t_90, tasa_max=tasa_max)
+
+
+@lru_cache(maxsize=256)
+def metricas(p: ParametrosCrecimiento) -> dict:
+    d = derivadas(*p)
+    return {campo: float(v) for campo, v in zip(Derivadas._fields, d)}
+
+
+def curva(p: ParametrosCrecimiento, dt: float):
+    """(t, P, dP/dt) cada `dt` días; compartida entre sesiones (solo lectura)."""
+    def calcular():
+        t = np.linspace(0, p.dias, int(p.dias / dt) + 1)
+        P = tamano(t, *p[:6])
+        return t, P, tasa(P, p.r * p.L * p.N * p.W, p.Pmax)
+    return cache_compartido.obtener("crecimiento.curva", (tuple(p), dt), calcular)
+
+
+def _eje(nombre: str, n: int) -> np.ndarray:
+    lo, hi = RANGOS[nombre]
+    return np.linspace(lo, hi, int(n))
+
+
+def mapa_sensibilidad(base: ParametrosCrecimiento, eje_x: str, eje_y: str, cantidad: str, n: int = 300):
+    """Malla n×n de `cantidad` variando eje_x y eje_y en su rango de la
+    interfaz; el resto de parámetros queda en `base`. Devuelve (x, y, z) con
+    z[j, i] para y[j], x[i]; los arreglos son de solo lectura: viven en la
+    cache compartida, acotada por bytes (una malla de 1000×1000 ocupa 8 MB)."""
+    if eje_x == eje_y:
+        raise ValueError("Los ejes deben ser parámetros distintos.")
+    return cache_compartido.obtener("crecimiento.mapa_sensibilidad", (tuple(base), eje_x, eje_y, cantidad, int(n)),
+                                    lambda: _mapa_sensibilidad(base, eje_x, eje_y, cantidad, int(n)))
+
+
+@instrumentado("crecimiento.mapa_sensibilidad")
+def _mapa_sensibilidad(base: ParametrosCrecimiento, eje_x: str, eje_y: str, cantidad: str, n: int):
+    x = _eje(eje_x, n)
+    y = _eje(eje_y, n)
+    valores = base._asdict()
+    valores[eje_x] = x[None, :]
+    valores[eje_y] = y[:, None]
+    z = np.broadcast_to(getattr(derivadas(**valores), cantidad), (y.size, x.size)).copy()
+    return x, y, z
+
+
+if __name__ == "__main__":
+    import time
+    p = ParametrosCrecimiento()
+    t = np.linspace(0, p.dias, 100_001)
+    P = tamano(t, *p[:6])
+    m = metricas(p)
+    print("analítico:", {k: round(v, 4) for k, v in m.items()})
+    print("muestreado:", {"dia_inflexion": round(t[np.argmax(tasa(P, p.r, p.Pmax))], 4),
+                          "tasa_max": round(tasa(P, p.r, p.Pmax).max(), 4)})
+    for n in (300, 1000):
+        t0 = time.perf_counter()
+        _mapa_sensibilidad(p, "L", "W", "tamano_final", n)
+        print(f"malla {n}×{n}: {1000 * (time.perf_counter() - t0):.1f} ms")
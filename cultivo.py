@@ -0,0 +1,125 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# SIMULACIÓN DIARIA DE CULTIVO
+# =============================
+# Reconstruye el modelo con el que se generó simulacion_crecimiento_resultados.csv
+# (el cuaderno Sim_PlantasV14.ipynb al que apunta baldomero.py no está en el repo):
+#   GDD diario   = max(0, (Tmax + Tmin)/2 − T_base), acumulado
+#   Altura, LAI  = curvas de Gompertz en GDD: K·exp(−b·exp(−c·GDD))
+#   Luz          = 1 − exp(−k·LAI)                    (ley de Beer)
+#   ET           = ET0 · LAI / LAI_max                (Kc proporcional al dosel)
+#   BBCH         = etapa según umbrales de GDD
+# Las series pueden tener dimensiones de lote delante del eje de días
+# (campos × temporadas × días): todo se calcula con operaciones de arreglo.
+
+ETAPAS_BBCH = (
+    (0.0, "10 - Emergencia/Inicio de Hoja"),
+    (500.0, "30 - Desarrollo de Tallo/Macollamiento"),
+)
+
+
+class ParametrosCultivo(NamedTuple):
+    t_base: float = 8.0          # °C
+    t_tope: Optional[float] = None  # °C; si se indica, Tmax y Tmin se recortan a este valor
+    altura_max: float = 200.0    # cm
+    altura_b: float = 4.0
+    altura_c: float = 0.015      # 1/GDD
+    lai_max: float = 7.0         # m²/m²
+    lai_b: float = 5.0
+    lai_c: float = 0.02          # 1/GDD
+    k_extincion: float = 0.6
+
+
+class ResultadosCultivo(NamedTuple):
+    gdd_acumulado: np.ndarray    # (..., n_dias)
+    altura_cm: np.ndarray
+    lai: np.ndarray
+    luz_interceptada: np.ndarray
+    et_mm: np.ndarray
+    etapa: np.ndarray            # índice en ETAPAS_BBCH
+
+
+def radiacion_extraterrestre(latitud_grados, dia_juliano):
+    """Ra en mm/día equivalentes (FAO-56, ec. 21 × 0.408)."""
+    phi = np.radians(latitud_grados)
+    j = np.asarray(dia_juliano, dtype=float)
+    dr = 1 + 0.033 * np.cos(2 * np.pi * j / 365)
+    delta = 0.409 * np.sin(2 * np.pi * j / 365 - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(delta), -1.0, 1.0))
+    ra = 24 * 60 / np.pi * 0.0820 * dr * (ws * np.sin(phi) * np.sin(delta) + np.cos(phi) * np.cos(delta) * np.sin(ws))
+    return 0.408 * ra
+
+
+def et0_hargreaves(tmax, tmin, latitud_grados: float = 17.0, dia_juliano_inicio: int = 1):
+    """ET0 de Hargreaves-Samani para cuando la serie no trae ET0 medida."""
+    tmax = np.asarray(tmax, dtype=float)
+    tmin = np.asarray(tmin, dtype=float)
+    dias = dia_juliano_inicio + np.arange(tmax.shape[-1])
+    ra = radiacion_extraterrestre(latitud_grados, (dias - 1) % 365 + 1)
+    return 0.0023 * ra * ((tmax + tmin) / 2 + 17.8) * np.sqrt(np.clip(tmax - tmin, 0.0, None))
+
+
+def simular_cultivo(tmax, tmin, et0=None, parametros: ParametrosCultivo = ParametrosCultivo(),
+                    latitud_grados: float = 17.0, dia_juliano_inicio: int = 1) -> ResultadosCultivo:
+    """Simula todas las series a la vez; el último eje es el día.
+
+    Sin `et0` se estima con Hargreaves a partir de la temperatura.
+    """
+    p = parametros
+    tmax = np.asarray(tmax, dtype=float)
+    tmin = np.asarray(tmin, dtype=float)
+    if p.t_tope is not None:
+        tmax, tmin = np.minimum(tmax, p.t_tope), np.minimum(tmin, p.t_tope)
+    gdd = np.cumsum(np.clip((tmax + tmin) / 2 - p.t_base, 0.0, None), axis=-1)
+    altura = p.altura_max * np.exp(-p.altura_b * np.exp(-p.altura_c * gdd))
+    lai = p.lai_max * np.exp(-p.lai_b * np.exp(-p.lai_c * gdd))
+    luz = 1 - np.exp(-p.k_extincion * lai)
+    if et0 is None:
+        et0 = et0_hargreaves(tmax, tmin, latitud_grados, dia_juliano_inicio)
+    et = np.asarray(et0, dtype=float) * lai / p.lai_max
+    umbrales = np.array([u for u, _ in ETAPAS_BBCH])
+    etapa = np.searchsorted(umbrales, gdd, side="right") - 1
+    return ResultadosCultivo(gdd, altura, lai, luz, et, etapa)
+
+
+def a_dataframe(res: ResultadosCultivo, tmax, tmin, indice=()) -> pd.DataFrame:
+    """Una serie del lote (`indice` sobre las dimensiones de lote) con las
+    columnas y el redondeo de simulacion_crecimiento_resultados.csv."""
+    def serie(a):
+        return np.asarray(a, dtype=float)[indice] if np.ndim(a) > 1 else np.asarray(a, dtype=float)
+    etiquetas = np.array([e for _, e in ETAPAS_BBCH])
+    gdd = serie(res.gdd_acumulado)
+    return pd.DataFrame({
+        "Día": np.arange(1, gdd.size + 1),
+        "GDD_Acumulado": gdd.round(2),
+        "Tmax": serie(tmax).round(2),
+        "Tmin": serie(tmin).round(2),
+        "Altura (cm)": serie(res.altura_cm).round(2),
+        "LAI (m2/m2)": serie(res.lai).round(2),
+        "Luz_Interceptada (f)": serie(res.luz_interceptada).round(2),
+        "ET_Diaria (mm)": serie(res.et_mm).round(2),
+        "BBCH": etiquetas[np.asarray(res.etapa)[indice] if np.ndim(res.etapa) > 1 else res.etapa],
+    })
+
+
+def clima_sintetico(forma, semilla: int = 0):
+    """Tmax ~ U(15, 30), Tmin ~ U(5, 15) y ET0 ~ U(5.25, 8.75) mm, los mismos
+    rangos que la serie del CSV; `forma` = (..., n_dias)."""
+    rng = np.random.default_rng(semilla)
+    return rng.uniform(15, 30, forma), rng.uniform(5, 15, forma), rng.uniform(5.25, 8.75, forma)
+
+
+if __name__ == "__main__":
+    # La regresión contra el CSV está en test_cultivo.py (python -m pytest)
+    import time
+    tmax, tmin, et0 = clima_sintetico((100, 100, 90), semilla=1)  # 100 campos × 100 temporadas
+    t0 = time.perf_counter()
+    res = simular_cultivo(tmax, tmin, et0)
+    print(f"10k campo-temporadas × 90 días: {1000 * (time.perf_counter() - t0):.1f} ms")
+    t0 = time.perf_counter()
+    res = simular_cultivo(tmax, tmin)
+    print(f"  con ET0 de Hargreaves: {1000 * (time.perf_counter() - t0):.1f} ms")
@@ -1,114 +1,120 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import io
-
-# Densidades en g/cm³
-densidades_base = {
-    "Agua": 1.00,
-    "Aceite": 0.92,
-    "Miel": 1.42,
-    "Alcohol": 0.79
-}
-
-colores = {
-    "Agua": "blue",
-    "Aceite": "orange",
-    "Miel": "brown",
-    "Alcohol": "green"
-}
-
-# Relaciones de miscibilidad (simplificadas)
-miscibilidad = {
-    ("Agua", "Alcohol"): "miscibles",
-    ("Agua", "Aceite"): "no miscibles",
-    ("Agua", "Miel"): "miscibles",
-    ("Aceite", "Alcohol"): "no miscibles",
-    ("Aceite", "Miel"): "no miscibles",
-    ("Alcohol", "Miel"): "miscibles"
-}
+from exportacion import formatos_disponibles, descarga_diferida, nombre_archivo, tipo_mime
+import instrumentacion
+from instrumentacion import etapa
+from mezclas import registro_base, densidad_mezcla, capas_columna, pares_miscibilidad
+
+instrumentacion.iniciar_rerun("densidad")
+
+# Registro de líquidos por sesión (densidades en g/cm³ y matriz de miscibilidad)
+registro = st.session_state.setdefault("registro_liquidos", registro_base())
 
 st.title("Simulador de densidad y estratificación de líquidos")
 
-# Selección de líquidos base
-liquidos = st.multiselect("Selecciona líquidos a mezclar", list(densidades_base.keys()), default=["Agua","Aceite","Miel"])
+# Opción para agregar líquido personalizado
+with st.expander("Agregar líquido personalizado"):
+    with st.form("liquido_personalizado"):
+        nombre_liq = st.text_input("Nombre del líquido").strip()
+        dens_liq = st.number_input("Densidad (g/cm³)", min_value=0.1, max_value=5.0, value=1.0, step=0.01)
+        misc_con = st.multiselect("Miscible con", registro.nombres)
+        no_misc_con = st.multiselect("No miscible con", registro.nombres)
+        if st.form_submit_button("Agregar"):
+            if not nombre_liq:
+                st.warning("Indica un nombre para el líquido.")
+            elif set(misc_con) & set(no_misc_con):
+                st.warning("Un líquido no puede ser miscible y no miscible a la vez.")
+            else:
+                try:
+                    registro.agregar(nombre_liq, dens_liq, "purple",
+                                     miscible_con=[m for m in misc_con if m != nombre_liq],
+                                     no_miscible_con=[m for m in no_misc_con if m != nombre_liq])
+                    st.success(f"{nombre_liq} agregado ({len(registro)} líquidos en la sesión).")
+                except ValueError as e:
+                    st.error(str(e))
+
+# Selección de líquidos
+liquidos = st.multiselect("Selecciona líquidos a mezclar", registro.nombres, default=["Agua", "Aceite", "Miel"],
+                          key="liquidos_mezcla")
 
 vols = {}
 for liq in liquidos:
     vols[liq] = st.slider(f"Volumen de {liq} (ml)", 0, 500, 100)
 
-# Opción para agregar líquido personalizado
-st.subheader("Agregar líquido personalizado")
-nombre_liq = st.text_input("Nombre del líquido")
-dens_liq = st.number_input("Densidad (g/cm³)", min_value=0.1, max_value=5.0, step=0.01)
-vol_liq = st.slider("Volumen del líquido personalizado (ml)", 0, 500, 0)
+# Cálculo de densidad mezcla (escenario único como lote de una fila)
+indices = registro.indices(liquidos)
+volumenes = np.zeros((1, len(registro)))
+volumenes[0, indices] = [vols[liq] for liq in liquidos]
+densidades_sel = registro.densidades[indices]
+vol_total = float(volumenes.sum())
+densidad_mezcla_total = float(densidad_mezcla(volumenes, registro.densidades)[0])
 
-if nombre_liq and vol_liq > 0:
-    densidades_base[nombre_liq] = dens_liq
-    colores[nombre_liq] = "purple"
-    liquidos.append(nombre_liq)
-    vols[nombre_liq] = vol_liq
-
-# Cálculo de densidad mezcla
-masa_total = sum(densidades_base[liq] * vols[liq] for liq in liquidos)
-vol_total = sum(vols.values())
-densidad_mezcla = masa_total / vol_total if vol_total > 0 else 0
-
-st.metric("Densidad resultante (g/cm³)", f"{densidad_mezcla:.3f}")
+st.metric("Densidad resultante (g/cm³)", f"{densidad_mezcla_total:.3f}")
 
 # Gráfica comparativa de densidades
 fig1 = go.Figure()
-for liq in liquidos:
-    fig1.add_trace(go.Bar(x=[liq], y=[densidades_base[liq]], name=liq, marker_color=colores.get(liq,"gray")))
-fig1.add_trace(go.Bar(x=["Mezcla"], y=[densidad_mezcla], name="Mezcla", marker_color="red"))
+for liq, i in zip(liquidos, indices):
+    fig1.add_trace(go.Bar(x=[liq], y=[registro.densidades[i]], name=liq, marker_color=registro.colores[i]))
+fig1.add_trace(go.Bar(x=["Mezcla"], y=[densidad_mezcla_total], name="Mezcla", marker_color="red"))
 fig1.update_layout(title="Comparación de densidades", yaxis_title="g/cm³")
-st.plotly_chart(fig1, use_container_width=True)
+instrumentacion.plotly_chart("plotly_chart.densidades", fig1, use_container_width=True)
+
+# Estratificación en capas: los líquidos miscibles presentes se funden en una
+# sola capa con su densidad mezclada; la columna es una única traza de barras
+# apiladas (una barra por capa con `base`), sin shapes ni anotaciones de layout.
+def figura_estratificacion(capas):
+    alturas = np.array([c.volumen for c in capas])
+    bases = np.cumsum(alturas) - alturas
+    etiquetas = [f"{' + '.join(c.nombres)} ({c.densidad:.2f} g/cm³)" for c in capas]
+    fig = go.Figure(go.Bar(
+        x=[0] * len(capas), y=alturas, base=bases, width=1,
+        marker=dict(color=[c.color for c in capas], line=dict(color="black", width=1)),
+        text=etiquetas, textposition="inside", insidetextanchor="middle",
+        textfont=dict(color="white"),
+        hovertext=[f"{e}<br>{c.volumen:.0f} ml" for e, c in zip(etiquetas, capas)],
+        hoverinfo="text", showlegend=False
+    ))
+    fig.update_yaxes(range=[0, max(float(alturas.sum()), 1e-9)], title="Altura proporcional al volumen (ml)")
+    fig.update_xaxes(visible=False)
+    fig.update_layout(title="Estratificación de líquidos (más densos abajo)", uniformtext_minsize=8,
+                      uniformtext_mode="hide")
+    return fig
+
+def figura_memo(nombre, clave, construir):
+    # Reutiliza la figura si no cambió ninguna capa (líquidos, volúmenes, densidades, colores)
+    memo = st.session_state.setdefault("figuras_memo", {})
+    if nombre not in memo or memo[nombre][0] != clave:
+        with etapa(f"figura.{nombre}"):
+            memo[nombre] = (clave, construir())
+    return memo[nombre][1]
 
-# Estratificación en capas
 st.subheader("Visualización de estratificación (torre de líquidos)")
-capas = sorted([(liq, densidades_base[liq], vols[liq]) for liq in liquidos], key=lambda x: x[1], reverse=True)
-
-fig2 = go.Figure()
-altura_total = sum(v for _,_,v in capas)
-y_base = 0
-for liq, dens, vol in capas:
-    altura = vol
-    fig2.add_shape(
-        type="rect",
-        x0=0, x1=1,
-        y0=y_base, y1=y_base+altura,
-        fillcolor=colores.get(liq,"gray"),
-        line=dict(color="black")
-    )
-    fig2.add_annotation(
-        x=0.5, y=y_base+altura/2,
-        text=f"{liq} ({dens:.2f} g/cm³)",
-        showarrow=False, font=dict(color="white")
-    )
-    y_base += altura
-
-fig2.update_yaxes(range=[0, altura_total], title="Altura proporcional al volumen (ml)")
-fig2.update_xaxes(visible=False)
-fig2.update_layout(title="Estratificación de líquidos (más densos abajo)")
-st.plotly_chart(fig2, use_container_width=True)
+capas = tuple(capas_columna(volumenes[0], registro))
+fig2 = figura_memo("estratificacion", capas, lambda: figura_estratificacion(capas))
+instrumentacion.plotly_chart("plotly_chart.estratificacion", fig2, use_container_width=True)
 
 # Simulación de miscibilidad
 st.subheader("Simulación de miscibilidad")
-pairs = [(liquidos[i], liquidos[j]) for i in range(len(liquidos)) for j in range(i+1,len(liquidos))]
-for p in pairs:
-    estado = miscibilidad.get(p) or miscibilidad.get((p[1],p[0])) or "desconocido"
-    st.write(f"{p[0]} + {p[1]} → {estado}")
+for i, j, estado in zip(*pares_miscibilidad(registro, indices)):
+    st.write(f"{registro.nombres[i]} + {registro.nombres[j]} → {estado}")
+for c in capas:
+    st.write(f"Capa: {' + '.join(c.nombres)} — {c.densidad:.3f} g/cm³, {c.volumen:.0f} ml")
 
 # Exportar resultados
 st.subheader("Exportar resultados")
-df_export = pd.DataFrame({
-    "Liquido": [liq for liq in liquidos],
-    "Volumen_ml": [vols[liq] for liq in liquidos],
-    "Densidad_gcm3": [densidades_base[liq] for liq in liquidos]
-})
-df_export.loc[len(df_export)] = ["Mezcla", vol_total, densidad_mezcla]
-
-buf = io.BytesIO()
-df_export.to_csv(buf, index=False)
-buf.seek(0)
-st.download_button("Descargar CSV", data=buf, file_name="mezcla_liquidos.csv", mime="text/csv")
+def tabla_exportacion():
+    df_export = pd.DataFrame({
+        "Liquido": [liq for liq in liquidos],
+        "Volumen_ml": [vols[liq] for liq in liquidos],
+        "Densidad_gcm3": densidades_sel
+    })
+    df_export.loc[len(df_export)] = ["Mezcla", vol_total, densidad_mezcla_total]
+    return df_export
+
+formato = st.selectbox("Formato", formatos_disponibles())
+st.download_button(f"Descargar {formato}", data=descarga_diferida(tabla_exportacion, formato),
+                   file_name=nombre_archivo("mezcla_liquidos", formato), mime=tipo_mime(formato))
+
+instrumentacion.panel()
@@ -0,0 +1,266 @@
+import atexit
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+
+try:
+    import resource
+except ImportError:  # Windows: sin límites por trabajo, solo timeout de pared
+    resource = None
+
+# =============================
+# SERVICIO DE EVALUACIÓN AISLADA
+# =============================
+# Las expresiones escritas por el usuario (parseo, derivada, integral) se
+# ejecutan en procesos aparte con límites de CPU, memoria y tiempo de pared.
+# Una entrada patológica como 10^10^10 ocupa un solo trabajador, que se
+# reinicia al agotar su límite, en lugar de bloquear el hilo del script.
+
+MARGEN_ARRANQUE_S = 10.0
+
+class ErrorEvaluacion(Exception):
+    pass
+
+
+class EvaluacionCancelada(ErrorEvaluacion):
+    pass
+
+
+def _memoria_virtual_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _aplicar_limites(limite_cpu_s, limite_memoria_mb):
+    if resource is None:
+        return
+    if limite_cpu_s:
+        uso = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_usada = uso.ru_utime + uso.ru_stime
+        _, duro = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_usada + limite_cpu_s) + 1, duro))
+    if limite_memoria_mb:
+        actual = _memoria_virtual_bytes()
+        if actual is not None:
+            _, duro = resource.getrlimit(resource.RLIMIT_AS)
+            resource.setrlimit(resource.RLIMIT_AS, (actual + limite_memoria_mb * 1024 * 1024, duro))
+
+
+def _bucle_trabajador(precargar):
+    # Se lanza con `python -c`: el canal es stdin/stdout con mensajes pickle.
+    # No se usa multiprocessing porque Streamlit reemplaza __main__ por el
+    # script de la app y un proceso "spawn" lo volvería a ejecutar.
+    entrada, salida = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr  # un print dentro de un trabajo no corrompe el canal
+    for modulo in precargar:
+        __import__(modulo)
+    while True:
+        try:
+            mensaje = pickle.load(entrada)
+        except EOFError:
+            break
+        if mensaje is None:
+            break
+        funcion, args, limite_cpu_s, limite_memoria_mb = mensaje
+        try:
+            _aplicar_limites(limite_cpu_s, limite_memoria_mb)
+            respuesta = pickle.dumps((True, funcion(*args)))
+        except MemoryError:
+            respuesta = pickle.dumps((False, "La expresión superó el límite de memoria"))
+        except BaseException as e:
+            respuesta = pickle.dumps((False, str(e) or type(e).__name__))
+        try:
+            salida.write(respuesta)
+            salida.flush()
+        except OSError:
+            break  # el proceso principal ya terminó
+
+
+class _Trabajo:
+    def __init__(self, funcion, args, clave, clave_cache, limite_pared_s, limite_cpu_s):
+        self.funcion = funcion
+        self.args = args
+        self.clave = clave
+        self.clave_cache = clave_cache
+        self.limite_pared_s = limite_pared_s
+        self.limite_cpu_s = limite_cpu_s
+        self.futuro = Future()
+        self.cancelado = threading.Event()
+
+    def cancelar(self):
+        self.cancelado.set()
+        self.futuro.cancel()
+
+
+class _Trabajador:
+    def __init__(self, precargar):
+        entorno = dict(os.environ)
+        entorno["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+        codigo = f"import evaluador; evaluador._bucle_trabajador({tuple(precargar)!r})"
+        self.proceso = subprocess.Popen([sys.executable, "-c", codigo], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, env=entorno)
+        self.respuestas = queue.Queue()
+        threading.Thread(target=self._leer, daemon=True).start()
+        self.primera = True
+
+    def _leer(self):
+        try:
+            while True:
+                self.respuestas.put(pickle.load(self.proceso.stdout))
+        except Exception:
+            self.respuestas.put(None)  # el proceso terminó (p. ej. SIGXCPU)
+
+    def enviar(self, mensaje):
+        pickle.dump(mensaje, self.proceso.stdin)
+        self.proceso.stdin.flush()
+
+    def vivo(self) -> bool:
+        return self.proceso.poll() is None
+
+    def terminar(self):
+        self.proceso.kill()
+        self.proceso.wait(1)
+
+
+class ServicioEvaluacion:
+    """Pool de procesos con límites por trabajo, cache de resultados y cancelación."""
+
+    def __init__(self, n_trabajadores: int = 2, limite_pared_s: float = 3.0, limite_cpu_s: float = 3.0,
+                 limite_memoria_mb: int = 512, max_cache: int = 256, precargar=("sympy",)):
+        self.limite_pared_s = limite_pared_s
+        self.limite_cpu_s = limite_cpu_s
+        self.limite_memoria_mb = limite_memoria_mb
+        self.max_cache = max_cache
+        self._precargar = tuple(precargar)
+        self._cola = queue.Queue()
+        self._cache = OrderedDict()
+        self._por_clave = {}
+        self._lock = threading.Lock()
+        self._cerrado = False
+        self._hilos = [
+            threading.Thread(target=self._despachar, name=f"evaluador-{i}", daemon=True)
+            for i in range(n_trabajadores)
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    # ---- API pública ----
+    def enviar(self, funcion, *args, clave=None, limite_pared_s=None, limite_cpu_s=None) -> Future:
+        """Encola funcion(*args); `funcion` debe ser importable a nivel de módulo.
+
+        Si se indica `clave` (p. ej. sesión + campo de entrada), el trabajo
+        anterior con la misma clave se cancela: el usuario ya editó la fórmula.
+        """
+        clave_cache = (funcion.__module__, funcion.__qualname__, args)
+        with self._lock:
+            if clave_cache in self._cache:
+                self._cache.move_to_end(clave_cache)
+                futuro = Future()
+                futuro.set_result(self._cache[clave_cache])
+                return futuro
+            trabajo = _Trabajo(funcion, args, clave, clave_cache,
+                               limite_pared_s or self.limite_pared_s,
+                               limite_cpu_s or self.limite_cpu_s)
+            if clave is not None:
+                anterior = self._por_clave.get(clave)
+                if anterior is not None:
+                    anterior.cancelar()
+                self._por_clave[clave] = trabajo
+        self._cola.put(trabajo)
+        return trabajo.futuro
+
+    def evaluar(self, funcion, *args, clave=None, limite_pared_s=None, limite_cpu_s=None):
+        futuro = self.enviar(funcion, *args, clave=clave, limite_pared_s=limite_pared_s,
+                             limite_cpu_s=limite_cpu_s)
+        try:
+            return futuro.result()
+        except CancelledError:
+            raise EvaluacionCancelada("Evaluación cancelada: la entrada cambió") from None
+
+    def cerrar(self):
+        self._cerrado = True
+        for _ in self._hilos:
+            self._cola.put(None)
+
+    # ---- Internos ----
+    def _guardar(self, clave_cache, valor):
+        with self._lock:
+            self._cache[clave_cache] = valor
+            self._cache.move_to_end(clave_cache)
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+
+    def _despachar(self):
+        trabajador = None
+        while True:
+            trabajo = self._cola.get()
+            if trabajo is None or self._cerrado:
+                break
+            if trabajo.cancelado.is_set() or not trabajo.futuro.set_running_or_notify_cancel():
+                continue
+            if trabajador is None or not trabajador.vivo():
+                trabajador = _Trabajador(self._precargar)
+            try:
+                trabajador.enviar((trabajo.funcion, trabajo.args, trabajo.limite_cpu_s, self.limite_memoria_mb))
+            except OSError:
+                trabajador.terminar()
+                trabajador = None
+                trabajo.futuro.set_exception(ErrorEvaluacion("No se pudo iniciar el proceso de evaluación"))
+                continue
+
+            # El primer trabajo de un proceso nuevo incluye arrancar Python e importar SymPy
+            limite = trabajo.limite_pared_s + (MARGEN_ARRANQUE_S if trabajador.primera else 0.0)
+            inicio = time.monotonic()
+            respuesta, error = None, None
+            while True:
+                if trabajo.cancelado.is_set():
+                    error = EvaluacionCancelada("Evaluación cancelada: la entrada cambió")
+                    break
+                if time.monotonic() - inicio > limite:
+                    error = ErrorEvaluacion(f"La expresión tardó más de {trabajo.limite_pared_s:.0f} s en evaluarse")
+                    break
+                try:
+                    respuesta = trabajador.respuestas.get(timeout=0.02)
+                except queue.Empty:
+                    continue
+                if respuesta is None:
+                    error = ErrorEvaluacion("La expresión superó el límite de CPU o memoria")
+                break
+            trabajador.primera = False
+            with self._lock:
+                if self._por_clave.get(trabajo.clave) is trabajo:
+                    del self._por_clave[trabajo.clave]
+
+            if error is not None:
+                trabajador.terminar()
+                trabajador = None
+                trabajo.futuro.set_exception(error)
+            elif respuesta[0]:
+                self._guardar(trabajo.clave_cache, respuesta[1])
+                trabajo.futuro.set_result(respuesta[1])
+            else:
+                trabajo.futuro.set_exception(ErrorEvaluacion(respuesta[1]))
+        if trabajador is not None:
+            trabajador.terminar()
+
+
+_servicio = None
+_servicio_lock = threading.Lock()
+
+def obtener_servicio() -> ServicioEvaluacion:
+    # Los procesos se crean la primera vez que se necesitan, no al importar
+    global _servicio
+    with _servicio_lock:
+        if _servicio is None:
+            _servicio = ServicioEvaluacion()
+            atexit.register(_servicio.cerrar)
+        return _servicio
@@ -0,0 +1,106 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from instrumentacion import instrumentado
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # Parquet y Arrow IPC solo se ofrecen si pyarrow está instalado
+    pa = None
+
+# =============================
+# EXPORTACIÓN DIFERIDA
+# =============================
+# Los bytes se generan solo cuando el usuario pulsa "Descargar" (st.download_button
+# acepta un callable) y se guardan por hash del contenido: volver a descargar
+# los mismos resultados no vuelve a serializar, aunque cambie el nombre del archivo.
+
+FORMATOS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": (".arrow", "application/vnd.apache.arrow.file"),
+}
+
+MAX_BYTES_CACHE = 64 * 1024 * 1024
+
+
+def formatos_disponibles():
+    return list(FORMATOS) if pa is not None else ["CSV"]
+
+
+def hash_contenido(df) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+@instrumentado("exportacion.serializar")
+def serializar(df, formato: str) -> bytes:
+    if formato == "CSV":
+        return df.to_csv(index=False).encode("utf-8")
+    if pa is None:
+        raise ValueError(f"El formato {formato} requiere pyarrow")
+    if formato == "Parquet":
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        return buf.getvalue()
+    if formato == "Arrow IPC":
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Formato desconocido: {formato}")
+
+
+class CacheExportaciones:
+    """LRU de bytes exportados, acotado por tamaño total."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES_CACHE):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, df, formato: str) -> bytes:
+        clave = (hash_contenido(df), formato)
+        with self._lock:
+            datos = self._entradas.get(clave)
+            if datos is not None:
+                self._entradas.move_to_end(clave)
+                return datos
+        datos = serializar(df, formato)
+        with self._lock:
+            if clave not in self._entradas:
+                self._entradas[clave] = datos
+                self._bytes += len(datos)
+            while self._bytes > self.max_bytes and len(self._entradas) > 1:
+                _, viejo = self._entradas.popitem(last=False)
+                self._bytes -= len(viejo)
+        return datos
+
+
+cache_exportaciones = CacheExportaciones()
+
+
+def descarga_diferida(construir_df, formato: str):
+    """Callable sin argumentos para st.download_button(data=...).
+
+    `construir_df` tampoco recibe argumentos: la tabla se arma en el clic,
+    no en cada rerun.
+    """
+    return lambda: cache_exportaciones.obtener(construir_df(), formato)
+
+
+def nombre_archivo(base: str, formato: str) -> str:
+    return base + FORMATOS[formato][0]
+
+
+def tipo_mime(formato: str) -> str:
+    return FORMATOS[formato][1]
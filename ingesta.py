@@ -0,0 +1,81 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# INGESTA POR BLOQUES DE RUTAS CSV
+# =============================
+COLUMNAS_REQUERIDAS = ["tramo", "distancia_m"]
+MAX_ERRORES_REPORTADOS = 20
+
+
+class RutaColumnar(NamedTuple):
+    tramo: np.ndarray          # int64
+    distancia_m: np.ndarray    # float64
+    distancia_total: float
+    n_tramos: int
+    filas_invalidas: int
+    errores: list              # [(fila de datos, motivo)], como mucho MAX_ERRORES_REPORTADOS
+
+    def a_dataframe(self):
+        return pd.DataFrame({"tramo": self.tramo, "distancia_m": self.distancia_m}, copy=False)
+
+
+class ErrorIngesta(ValueError):
+    pass
+
+
+def leer_tramos_csv(archivo, tam_bloque: int = 100_000) -> RutaColumnar:
+    """Lee un CSV de tramos bloque a bloque sin materializarlo completo.
+
+    Solo se leen las columnas `tramo` y `distancia_m`; cada bloque se valida
+    y se convierte a arreglos compactos mientras se acumulan el total de
+    distancia y el número de tramos. Las líneas vacías se ignoran; las filas
+    inválidas se reportan con su número de fila de datos (1 = la primera tras
+    la cabecera, sin contar líneas vacías), que no coincide con la línea del
+    archivo si un campo entre comillas ocupa varias líneas.
+    """
+    try:
+        lector = pd.read_csv(archivo, usecols=COLUMNAS_REQUERIDAS, dtype=str,
+                             chunksize=tam_bloque, skip_blank_lines=True)
+    except ValueError:
+        raise ErrorIngesta("El CSV debe tener columnas 'tramo' y 'distancia_m'.")
+
+    bloques_tramo, bloques_dist = [], []
+    distancia_total, n_tramos, filas_invalidas = 0.0, 0, 0
+    errores = []
+    for bloque in lector:
+        tramo = pd.to_numeric(bloque["tramo"], errors="coerce").to_numpy(dtype=float)
+        dist = pd.to_numeric(bloque["distancia_m"], errors="coerce").to_numpy(dtype=float)
+        t_no_numerico = ~np.isfinite(tramo)
+        with np.errstate(invalid="ignore"):
+            t_no_entero = ~t_no_numerico & (tramo != np.round(tramo))
+        malos = t_no_numerico | t_no_entero | ~np.isfinite(dist)
+        if malos.any():
+            filas_invalidas += int(malos.sum())
+            filas = bloque.index.to_numpy()[malos] + 1
+            for fila, sin_numero, decimal in zip(filas, t_no_numerico[malos], t_no_entero[malos]):
+                if len(errores) >= MAX_ERRORES_REPORTADOS:
+                    break
+                if sin_numero:
+                    motivo = "'tramo' vacío o no numérico"
+                elif decimal:
+                    motivo = "'tramo' debe ser un número entero"
+                else:
+                    motivo = "'distancia_m' vacío o no numérico"
+                errores.append((int(fila), motivo))
+            tramo, dist = tramo[~malos], dist[~malos]
+        bloques_tramo.append(tramo.astype(np.int64))
+        bloques_dist.append(dist)
+        distancia_total += float(dist.sum())
+        n_tramos += dist.size
+
+    return RutaColumnar(
+        tramo=np.concatenate(bloques_tramo) if bloques_tramo else np.empty(0, dtype=np.int64),
+        distancia_m=np.concatenate(bloques_dist) if bloques_dist else np.empty(0),
+        distancia_total=distancia_total,
+        n_tramos=n_tramos,
+        filas_invalidas=filas_invalidas,
+        errores=errores
+    )
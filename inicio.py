@@ -0,0 +1,18 @@
+import os
+import streamlit as st
+from lanzador import PAGINAS, DIRECTORIO, precalentar
+
+# =============================
+# PUNTO DE ENTRADA ÚNICO: streamlit run inicio.py
+# =============================
+# Una sola vez por proceso (el módulo lanzador persiste entre reruns)
+precalentar()
+
+secciones = {}
+for p in PAGINAS:
+    secciones.setdefault(p.grupo, []).append(
+        st.Page(os.path.join(DIRECTORIO, p.archivo), title=p.titulo, icon=p.icono,
+                url_path=os.path.splitext(p.archivo)[0].lower())
+    )
+
+st.navigation(secciones).run()
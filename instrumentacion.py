@@ -0,0 +1,262 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+# =============================
+# INSTRUMENTACIÓN POR RERUN (OPCIONAL)
+# =============================
+# Desactivada por defecto. Se activa para todo el proceso con
+# SIMULADORES_PERFIL=1. Con SIMULADORES_PERFIL_SESION=1 el servidor permite
+# además activarla para una sesión abriendo la página con ?perfil=1; sin esa
+# opción el parámetro se ignora (tracemalloc ralentiza a todo el proceso y
+# el log crece en el disco del servidor).
+# Cada etapa con nombre registra tiempo de pared, pico de memoria asignada
+# (tracemalloc) y bytes de carga útil (figura serializada, archivo, imagen).
+# Las mediciones se agrupan por rerun, se muestran en un panel plegable y se
+# añaden como una línea JSON a SIMULADORES_PERFIL_LOG (perfil_reruns.jsonl
+# por defecto). Desactivada, una etapa solo cuesta una consulta a un
+# atributo thread-local.
+#
+# Las memorias son del proceso entero: con varias sesiones a la vez el pico
+# de una etapa incluye lo que asignen los otros hilos en ese intervalo. Sin
+# perfil global, tracemalloc se detiene cuando ya no queda ningún rerun medido.
+
+ACTIVO_GLOBAL = os.environ.get("SIMULADORES_PERFIL", "") not in ("", "0")
+PERMITIR_SESION = os.environ.get("SIMULADORES_PERFIL_SESION", "") not in ("", "0")
+RUTA_LOG = os.environ.get("SIMULADORES_PERFIL_LOG", "perfil_reruns.jsonl")
+
+_local = threading.local()
+_lock_log = threading.Lock()
+# Reruns medidos aún abiertos; una sesión abandonada tras st.stop sale al liberarse
+_abiertos = weakref.WeakSet()
+_lock_abiertos = threading.Lock()
+
+
+class Medicion:
+    __slots__ = ("etapa", "inicio", "segundos", "pico_bytes", "carga_bytes", "_base", "_pico_abs")
+
+    def __init__(self, etapa: str):
+        self.etapa = etapa
+        self.segundos = 0.0
+        self.pico_bytes = 0
+        self.carga_bytes = None
+
+
+class _Nula:
+    # Se entrega cuando no se mide: asignar carga_bytes no tiene efecto
+    __slots__ = ("carga_bytes",)
+
+
+class _Rerun:
+    def __init__(self, pagina: str):
+        self.pagina = pagina
+        self.inicio = self.fin = time.perf_counter()
+        self.marca = time.time()
+        self.mediciones = []
+        self.pila = []
+        self.escrito = False
+
+
+def activo() -> bool:
+    """True si el hilo actual está registrando un rerun (o hay perfil global)."""
+    return getattr(_local, "rerun", None) is not None or ACTIVO_GLOBAL
+
+
+def _pedido_por_sesion() -> bool:
+    if not PERMITIR_SESION:
+        return False
+    try:
+        import streamlit as st
+        return st.query_params.get("perfil", "") not in ("", "0")
+    except Exception:
+        return False
+
+
+def _estado_sesion():
+    try:
+        import streamlit as st
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return st.session_state if get_script_run_ctx() is not None else None
+    except Exception:
+        return None
+
+
+def iniciar_rerun(pagina: str):
+    """Empieza a registrar el rerun de `pagina` si el perfil está activo.
+
+    Un rerun anterior de la sesión que no llegó a panel() (st.stop) se
+    vuelca al log aquí.
+    """
+    sesion = _estado_sesion()
+    for anterior in (getattr(_local, "rerun", None), sesion.get("_perfil_rerun") if sesion is not None else None):
+        if anterior is not None:
+            _cerrar(anterior)
+    _local.rerun = _Rerun(pagina) if (ACTIVO_GLOBAL or _pedido_por_sesion()) else None
+    if sesion is not None:
+        sesion["_perfil_rerun"] = _local.rerun
+    if _local.rerun is not None:
+        with _lock_abiertos:
+            _abiertos.add(_local.rerun)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+
+@contextmanager
+def etapa(nombre: str):
+    """Mide el bloque; se puede asignar `.carga_bytes` al objeto entregado."""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None and not ACTIVO_GLOBAL:
+        yield _Nula()
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    # Fuera de un rerun (p. ej. el callable de una descarga) la medición va sola al log
+    rerun = rerun or _Rerun(nombre)
+    m = Medicion(nombre)
+    m._base = tracemalloc.get_traced_memory()[0]
+    m._pico_abs = m._base
+    tracemalloc.reset_peak()
+    rerun.pila.append(m)
+    m.inicio = time.perf_counter()
+    try:
+        yield m
+    finally:
+        m.segundos = time.perf_counter() - m.inicio
+        m._pico_abs = max(m._pico_abs, tracemalloc.get_traced_memory()[1])
+        m.pico_bytes = m._pico_abs - m._base
+        rerun.pila.pop()
+        rerun.fin = time.perf_counter()
+        if rerun.pila:
+            # reset_peak de esta etapa borró el pico de la etapa que la contiene
+            padre = rerun.pila[-1]
+            padre._pico_abs = max(padre._pico_abs, m._pico_abs)
+        rerun.mediciones.append(m)
+        if getattr(_local, "rerun", None) is not rerun and not rerun.pila:
+            _cerrar(rerun)
+
+
+def instrumentado(nombre: str):
+    """Decorador: envuelve la función en etapa(nombre); si devuelve bytes o
+    str se toma su longitud como carga."""
+    def decorar(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            if getattr(_local, "rerun", None) is None and not ACTIVO_GLOBAL:
+                return fn(*args, **kwargs)
+            with etapa(nombre) as m:
+                resultado = fn(*args, **kwargs)
+                if isinstance(resultado, (bytes, str)):
+                    m.carga_bytes = len(resultado)
+                return resultado
+        return envoltura
+    return decorar
+
+
+def plotly_chart(nombre: str, fig, **kwargs):
+    """st.plotly_chart medido (construcción del proto incluida) con el tamaño
+    del JSON como carga; el JSON solo se recalcula si el perfil está activo."""
+    import streamlit as st
+    with etapa(nombre) as m:
+        st.plotly_chart(fig, **kwargs)
+    if isinstance(m, Medicion):
+        m.carga_bytes = len(fig.to_json())
+
+
+def _registro(rerun: _Rerun) -> dict:
+    return {
+        "ts": rerun.marca,
+        "pid": os.getpid(),
+        "hilo": threading.get_ident(),
+        "pagina": rerun.pagina,
+        "total_s": round(rerun.fin - rerun.inicio, 6),
+        "etapas": [{"etapa": m.etapa, "s": round(m.segundos, 6), "pico_bytes": m.pico_bytes,
+                    "carga_bytes": m.carga_bytes} for m in rerun.mediciones],
+    }
+
+
+def _cerrar(rerun: _Rerun):
+    """Escribe el rerun en el log (una sola vez) y, si ya no se mide ningún
+    otro y no hay perfil global, detiene tracemalloc."""
+    if rerun.escrito:
+        return
+    rerun.escrito = True
+    _escribir_log(rerun)
+    with _lock_abiertos:
+        _abiertos.discard(rerun)
+        if not _abiertos and not ACTIVO_GLOBAL and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _escribir_log(rerun: _Rerun):
+    if not RUTA_LOG:
+        return
+    linea = json.dumps(_registro(rerun), ensure_ascii=False)
+    with _lock_log:
+        try:
+            with open(RUTA_LOG, "a", encoding="utf-8") as fh:
+                fh.write(linea + "\n")
+        except OSError:
+            pass
+
+
+def resumen(registro: dict):
+    """Filas por etapa (llamadas, ms totales, pico y carga máximos)."""
+    filas = {}
+    for e in registro["etapas"]:
+        f = filas.setdefault(e["etapa"], {"Etapa": e["etapa"], "Llamadas": 0, "ms": 0.0,
+                                          "Pico KB": 0.0, "Carga KB": None})
+        f["Llamadas"] += 1
+        f["ms"] += 1000 * e["s"]
+        f["Pico KB"] = max(f["Pico KB"], e["pico_bytes"] / 1024)
+        if e["carga_bytes"] is not None:
+            f["Carga KB"] = max(f["Carga KB"] or 0.0, e["carga_bytes"] / 1024)
+    return sorted(filas.values(), key=lambda f: -f["ms"])
+
+
+def panel():
+    """Cierra el rerun: lo escribe en el log y lo muestra en un expander."""
+    rerun = getattr(_local, "rerun", None)
+    _local.rerun = None
+    if rerun is None:
+        return
+    rerun.fin = time.perf_counter()
+    registro = _registro(rerun)
+    _cerrar(rerun)
+    import pandas as pd
+    import streamlit as st
+    with st.expander(f"🛠 Perfil del rerun — {1000 * registro['total_s']:.1f} ms"):
+        st.dataframe(pd.DataFrame(resumen(registro)).round(2), width="stretch", hide_index=True)
+        st.caption(f"Registro: {os.path.abspath(RUTA_LOG)}" if RUTA_LOG else "Sin archivo de registro")
+        from cache_compartido import cache_compartido
+        est = cache_compartido.estadisticas()
+        if est["espacios"]:
+            st.caption(f"Cache compartida: {est['entradas']} entradas, {est['bytes'] / 2**20:.1f} MB en memoria"
+                       + (f", {est['disco']['entradas']} en disco" if "disco" in est else ""))
+            st.dataframe(pd.DataFrame([{"Espacio": e, **m} for e, m in sorted(est["espacios"].items())]).round(3),
+                         width="stretch", hide_index=True)
+
+
+if __name__ == "__main__":
+    # python instrumentacion.py [perfil_reruns.jsonl]: resumen por página y etapa
+    import sys
+    import pandas as pd
+    ruta = sys.argv[1] if len(sys.argv) > 1 else RUTA_LOG
+    filas = []
+    with open(ruta, encoding="utf-8") as fh:
+        for linea in fh:
+            r = json.loads(linea)
+            filas.append({"pagina": r["pagina"], "etapa": "(rerun)", "s": r["total_s"], "pico_bytes": 0,
+                          "carga_bytes": None})
+            filas.extend({"pagina": r["pagina"], **e} for e in r["etapas"])
+    df = pd.DataFrame(filas)
+    df["ms"] = 1000 * df["s"]
+    tabla = df.groupby(["pagina", "etapa"]).agg(
+        n=("ms", "size"), ms_p50=("ms", "median"), ms_p95=("ms", lambda s: s.quantile(0.95)),
+        pico_kb_max=("pico_bytes", lambda s: s.max() / 1024), carga_kb_max=("carga_bytes", lambda s: s.max() / 1024))
+    with pd.option_context("display.width", 200, "display.max_rows", 200, "display.max_columns", 10):
+        print(tabla.round(2))
@@ -0,0 +1,158 @@
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from cache_compartido import cache_compartido
+from instrumentacion import instrumentado
+
+# =============================
+# CUADRATURA GAUSS–KRONROD (G7, K15)
+# =============================
+# Nodos y pesos de QUADPACK (qk15) en [-1, 1]; el último nodo es el centro.
+_XGK = np.array([
+    0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245, 0.0
+])
+_WGK = np.array([
+    0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649, 0.209482141084727828012999174891714
+])
+_WG = np.array([
+    0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975, 0.417959183673469387755102040816327
+])
+
+NODOS_K15 = np.concatenate([-_XGK[:-1], [0.0], _XGK[-2::-1]])
+PESOS_K15 = np.concatenate([_WGK[:-1], [_WGK[-1]], _WGK[-2::-1]])
+PESOS_G7 = np.zeros(15)
+for _i, _w in zip((1, 3, 5), _WG[:-1]):
+    PESOS_G7[_i] = PESOS_G7[14 - _i] = _w
+PESOS_G7[7] = _WG[-1]
+
+
+class ResultadoIntegral(NamedTuple):
+    valor: float
+    metodo: str            # "antiderivada", "cuadratura" o "divergente"
+    error_estimado: float
+
+
+def _gauss_kronrod(f, a, b):
+    # Evalúa todos los subintervalos en una sola llamada vectorizada a f
+    centro = 0.5 * (a + b)
+    mitad = 0.5 * (b - a)
+    nodos = centro[:, None] + mitad[:, None] * NODOS_K15[None, :]
+    y = np.asarray(f(nodos.ravel()), dtype=float).reshape(nodos.shape)
+    i_k = mitad * (y @ PESOS_K15)
+    i_g = mitad * (y @ PESOS_G7)
+    return i_k, np.abs(i_k - i_g)
+
+
+def cuadratura_adaptativa(f, a: float, b: float, tol_abs: float = 1e-10, tol_rel: float = 1e-10,
+                          presupuesto_s: float = 0.25, max_intervalos: int = 50_000):
+    """Integra f en [a, b] refinando a la vez todos los subintervalos que no convergen.
+
+    Devuelve (valor, error_estimado). Si se agota el presupuesto de tiempo o de
+    subintervalos se devuelve la mejor estimación disponible.
+    """
+    if a == b:
+        return 0.0, 0.0
+    signo = 1.0
+    if a > b:
+        a, b, signo = b, a, -1.0
+
+    inicio = time.perf_counter()
+    bordes = np.linspace(a, b, 9)
+    izq, der = bordes[:-1], bordes[1:]
+    aceptado, error_aceptado = 0.0, 0.0
+    while True:
+        i_k, err = _gauss_kronrod(f, izq, der)
+        if not (np.isfinite(i_k).all() and np.isfinite(err).all()):
+            return np.nan, np.inf
+        total = aceptado + i_k.sum()
+        error_total = error_aceptado + err.sum()
+        tol = max(tol_abs, tol_rel * abs(total))
+        if (error_total <= tol
+                or time.perf_counter() - inicio > presupuesto_s
+                or 2 * len(izq) > max_intervalos):
+            return signo * total, error_total
+
+        # Cada subintervalo puede aportar error proporcional a su longitud
+        ok = err <= tol * (der - izq) / (b - a)
+        aceptado += i_k[ok].sum()
+        error_aceptado += err[ok].sum()
+        izq, der = izq[~ok], der[~ok]
+        medio = 0.5 * (izq + der)
+        izq, der = np.concatenate([izq, medio]), np.concatenate([medio, der])
+
+
+# =============================
+# INTEGRAL DEFINIDA
+# =============================
+@instrumentado("integracion.integral_definida")
+def integral_definida(entrada, a: float, b: float, presupuesto_s: float = 0.5) -> ResultadoIntegral:
+    """Integral de una EntradaSimbolica en [a, b].
+
+    Usa F(b) - F(a) con la antiderivada cacheada si existe forma cerrada y f
+    no tiene polos en [a, b]; con polos, la integral impropia por límites
+    laterales de F, o "divergente" si no existe. Si los polos no se conocen a
+    tiempo, F(b) - F(a) solo se acepta si coincide con la cuadratura; si no,
+    o si SymPy tarda más que `presupuesto_s`, se devuelve la cuadratura.
+    """
+    a, b = float(a), float(b)
+    if a == b:
+        return ResultadoIntegral(0.0, "antiderivada", 0.0)
+    # Entre sesiones solo se comparten resultados definitivos: ni una cuadratura
+    # cortada por el presupuesto ni una calculada mientras SymPy seguía
+    # trabajando (el siguiente rerun puede dar la forma cerrada o "divergente")
+    resultado, _ = cache_compartido.obtener(
+        "integracion.integral_definida", (entrada.expr_str, a, b),
+        lambda: _integral_definida(entrada, a, b, presupuesto_s),
+        cacheable=lambda r: r[1] and (r[0].metodo != "cuadratura" or convergida(r[0])))
+    return resultado
+
+
+def convergida(r: ResultadoIntegral) -> bool:
+    """True si el valor es fiable (exacto o con error relativo ≤ 1e-6)."""
+    return (r.metodo == "antiderivada"
+            or (r.metodo == "cuadratura" and r.error_estimado <= 1e-6 * max(1.0, abs(r.valor))))
+
+
+def _integral_definida(entrada, a: float, b: float, presupuesto_s: float):
+    """(ResultadoIntegral, definitivo); definitivo si el análisis simbólico
+    (antiderivada y polos) ya había terminado."""
+    inicio = time.perf_counter()
+    lo, hi = min(a, b), max(a, b)
+    signo = 1.0 if b > a else -1.0
+    _, F = entrada.antiderivada(timeout=presupuesto_s)
+    polos_listos, impropia = entrada.impropia(lo, hi, timeout=max(presupuesto_s - (time.perf_counter() - inicio), 0.05))
+    if impropia is not None and impropia[0]:
+        valor = impropia[1]
+        if not np.isfinite(valor):
+            return ResultadoIntegral(signo * valor, "divergente", float("inf")), True
+        return ResultadoIntegral(signo * valor, "antiderivada", float(np.finfo(float).eps * max(1.0, abs(valor)))), True
+    definitivo = polos_listos and entrada.antiderivada_resuelta()
+
+    F_ab = None
+    if F is not None:
+        # Muestreo barato para dominios que no cubren [a, b] (ln(x) con a < 0)
+        interior = np.linspace(a, b, 257)[1:-1]
+        if np.isfinite(entrada.f(interior)).all():
+            F_ab = F(np.array([a, b]))
+            F_ab = F_ab if np.isfinite(F_ab).all() else None
+    if F_ab is not None:
+        valor = float(F_ab[1] - F_ab[0])
+        error = float(np.finfo(float).eps * np.abs(F_ab).max())
+        if impropia is not None:
+            return ResultadoIntegral(valor, "antiderivada", error), definitivo
+
+    restante = max(presupuesto_s - (time.perf_counter() - inicio), 0.05)
+    valor_q, error_q = cuadratura_adaptativa(entrada.f, a, b, presupuesto_s=restante)
+    if F_ab is not None and abs(valor - valor_q) <= 10 * error_q + 1e-9 * max(1.0, abs(valor)):
+        # Polos desconocidos, pero la cuadratura confirma F(b) - F(a)
+        return ResultadoIntegral(valor, "antiderivada", error), definitivo
+    return ResultadoIntegral(float(valor_q), "cuadratura", float(error_q)), definitivo
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from typing import NamedTuple
+
+# =============================
+# LANZADOR MULTIPÁGINA
+# =============================
+# Todos los simuladores se sirven desde un solo proceso (`streamlit run
+# inicio.py`). Cada página es su propio script y solo se ejecuta al abrirla,
+# así que sus dependencias pesadas (sympy, matplotlib) se importan la primera
+# vez que alguien entra en ella y luego se comparten entre páginas y sesiones.
+# Este módulo no importa nada pesado a nivel de módulo.
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+class Pagina(NamedTuple):
+    archivo: str
+    titulo: str
+    icono: str
+    grupo: str
+
+
+PAGINAS = (
+    Pagina("calculo.py", "Cálculo visual", "📈", "Cálculo"),
+    Pagina("areaBajoCurva.py", "Área bajo la curva", "📐", "Cálculo"),
+    Pagina("FuncionCombinada.py", "Función combinada", "〰️", "Cálculo"),
+    Pagina("app3.py", "Simulador de tramos", "🚆", "Simuladores"),
+    Pagina("densidad.py", "Densidad de líquidos", "🧪", "Simuladores"),
+    Pagina("plantas.py", "Crecimiento de plantas", "🌱", "Simuladores"),
+)
+
+
+# =============================
+# PRECALENTAMIENTO
+# =============================
+# Cada etapa importa un grupo de dependencias y recorre una vez el camino
+# más común (primera figura Plotly, expresiones por defecto de las páginas
+# de cálculo), que es lo que más cuesta en el primer rerun. Matplotlib no
+# está en las etapas por defecto: solo se carga al abrir una página que lo usa.
+
+def _etapa_tabular():
+    import numpy  # noqa: F401
+    import pandas as pd
+    pd.DataFrame({"x": [0.0]}).to_csv()
+
+
+def _etapa_plotly():
+    import plotly.graph_objects as go
+    # Los validadores de Plotly se cargan al construir la primera traza
+    go.Figure([go.Scatter(x=[0], y=[0]), go.Bar(x=[0], y=[0]), go.Heatmap(z=[[0]])]).to_json()
+
+
+def _etapa_simbolica():
+    from simbolico import limpiar_entrada, cache_simbolico
+    # Expresiones por defecto de calculo.py y areaBajoCurva.py
+    for expr in ("x^2 - 4", "x**2 + 2"):
+        cache_simbolico.obtener(limpiar_entrada(expr))
+
+
+def _etapa_matplotlib():
+    from render import servicio_render  # noqa: F401
+
+
+ETAPAS = {
+    "tabular": _etapa_tabular,
+    "plotly": _etapa_plotly,
+    "simbolica": _etapa_simbolica,
+    "matplotlib": _etapa_matplotlib,
+}
+ETAPAS_DEFECTO = ("tabular", "plotly", "simbolica")
+
+_lock = threading.Lock()
+_tiempos = {}
+_hilo = None
+
+
+def precalentar(etapas=ETAPAS_DEFECTO, en_segundo_plano: bool = True):
+    """Ejecuta las etapas una sola vez por proceso; las siguientes llamadas
+    no hacen nada. En segundo plano no retrasa el primer rerun."""
+    global _hilo
+    with _lock:
+        pendientes = [e for e in etapas if e not in _tiempos]
+        if not pendientes or (_hilo is not None and _hilo.is_alive()):
+            return _hilo
+        for e in pendientes:
+            _tiempos[e] = None
+
+    def correr():
+        for e in pendientes:
+            t0 = time.perf_counter()
+            try:
+                ETAPAS[e]()
+                _tiempos[e] = time.perf_counter() - t0
+            except Exception as ex:  # el precalentamiento nunca debe tumbar la app
+                _tiempos[e] = ex
+
+    if not en_segundo_plano:
+        correr()
+        return None
+    _hilo = threading.Thread(target=correr, name="precalentamiento", daemon=True)
+    _hilo.start()
+    return _hilo
+
+
+def estado_precalentamiento() -> dict:
+    """Segundos por etapa; None si sigue en curso, la excepción si falló."""
+    return dict(_tiempos)
+
+
+# =============================
+# BENCHMARK DE ARRANQUE POR PÁGINA
+# =============================
+# python lanzador.py: cada página en frío en su propio proceso (equivale a un
+# servidor por simulador) frente a todas en un proceso compartido y
+# precalentado. Mide el primer rerun con AppTest y el RSS de cada proceso.
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _primer_rerun(archivo: str) -> float:
+    from streamlit.testing.v1 import AppTest
+    t0 = time.perf_counter()
+    at = AppTest.from_file(os.path.join(DIRECTORIO, archivo), default_timeout=120).run()
+    dt = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(f"{archivo}: {at.exception[0].value}")
+    return dt
+
+
+def _medir_aislada(archivo: str):
+    # Se ejecuta en un proceso hijo: import de streamlit + primer rerun de la página
+    t0 = time.perf_counter()
+    import streamlit.testing.v1  # noqa: F401
+    dt = _primer_rerun(archivo)
+    return time.perf_counter() - t0, dt, _rss_mb()
+
+
+def _medir_compartido(archivos):
+    t0 = time.perf_counter()
+    import streamlit.testing.v1  # noqa: F401
+    precalentar(en_segundo_plano=False)
+    t_pre = time.perf_counter() - t0
+    tiempos = {a: _primer_rerun(a) for a in archivos}
+    return t_pre, tiempos, _rss_mb()
+
+
+if __name__ == "__main__":
+    import multiprocessing as mp
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    archivos = [p.archivo for p in PAGINAS]
+    ctx = mp.get_context("spawn")
+
+    print("Un proceso por página (en frío):")
+    print(f"  {'página':<22}{'arranque s':>12}{'1er rerun s':>13}{'RSS MB':>9}")
+    rss_total = 0.0
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for a in archivos:
+            total, rerun, rss = pool.apply(_medir_aislada, (a,))
+            rss_total += rss
+            print(f"  {a:<22}{total:>12.2f}{rerun:>13.2f}{rss:>9.0f}")
+    print(f"  RSS sumado: {rss_total:.0f} MB")
+
+    with ctx.Pool(1) as pool:
+        t_pre, tiempos, rss = pool.apply(_medir_compartido, (archivos,))
+    print(f"Proceso compartido (precalentamiento {t_pre:.2f} s):")
+    for a, dt in tiempos.items():
+        print(f"  {a:<22}{'':>12}{dt:>13.2f}")
+    print(f"  RSS del proceso: {rss:.0f} MB ({100 * rss / rss_total:.0f} % del sumado)")
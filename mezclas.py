@@ -0,0 +1,208 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from instrumentacion import instrumentado
+
+# =============================
+# MOTOR VECTORIZADO DE MEZCLAS DE LÍQUIDOS
+# =============================
+# Los líquidos viven en un registro por sesión guardado como arreglos
+# (densidades, matriz booleana de miscibilidad). Los escenarios se evalúan en
+# lote: `volumenes` es una matriz (n_escenarios × n_liquidos) y la densidad
+# de cada escenario es un producto matriz-vector. Los grupos miscibles son
+# las componentes conexas del grafo de miscibilidad restringido a los
+# líquidos presentes en cada escenario.
+
+MAX_LIQUIDOS = 512
+MAX_ELEMENTOS_BLOQUE = 4_000_000
+
+
+class RegistroLiquidos:
+    """Líquidos de una sesión: nombres, densidades (g/cm³), colores y
+    miscibilidad (`miscible[i, j]`, solo significativa si `conocida[i, j]`)."""
+
+    def __init__(self, nombres=(), densidades=(), colores=(), max_liquidos: int = MAX_LIQUIDOS):
+        self.max_liquidos = max_liquidos
+        self.nombres = list(nombres)
+        self.densidades = np.asarray(densidades, dtype=float)
+        self.colores = list(colores)
+        n = len(self.nombres)
+        self.miscible = np.eye(n, dtype=bool)
+        self.conocida = np.eye(n, dtype=bool)
+        self._indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def indices(self, nombres) -> np.ndarray:
+        return np.array([self._indice[n] for n in nombres], dtype=np.int64)
+
+    def definir_miscibilidad(self, a: str, b: str, miscibles: bool):
+        i, j = self._indice[a], self._indice[b]
+        self.miscible[i, j] = self.miscible[j, i] = miscibles
+        self.conocida[i, j] = self.conocida[j, i] = True
+
+    def agregar(self, nombre: str, densidad: float, color: str = "purple", miscible_con=(), no_miscible_con=()):
+        """Agrega o actualiza un líquido; lanza ValueError si el registro está lleno."""
+        if nombre in self._indice:
+            i = self._indice[nombre]
+            self.densidades[i] = densidad
+            self.colores[i] = color
+        else:
+            if len(self) >= self.max_liquidos:
+                raise ValueError(f"El registro admite como máximo {self.max_liquidos} líquidos.")
+            n = len(self)
+            self.nombres.append(nombre)
+            self.colores.append(color)
+            self.densidades = np.append(self.densidades, float(densidad))
+            for nombre_m in ("miscible", "conocida"):
+                m = np.zeros((n + 1, n + 1), dtype=bool)
+                m[:n, :n] = getattr(self, nombre_m)
+                m[n, n] = True
+                setattr(self, nombre_m, m)
+            self._indice[nombre] = n
+        for otro in miscible_con:
+            self.definir_miscibilidad(nombre, otro, True)
+        for otro in no_miscible_con:
+            self.definir_miscibilidad(nombre, otro, False)
+
+
+def registro_base() -> RegistroLiquidos:
+    reg = RegistroLiquidos(["Agua", "Aceite", "Miel", "Alcohol"], [1.00, 0.92, 1.42, 0.79],
+                           ["blue", "orange", "brown", "green"])
+    for a, b, m in [("Agua", "Alcohol", True), ("Agua", "Aceite", False), ("Agua", "Miel", True),
+                    ("Aceite", "Alcohol", False), ("Aceite", "Miel", False), ("Alcohol", "Miel", True)]:
+        reg.definir_miscibilidad(a, b, m)
+    return reg
+
+
+def densidad_mezcla(volumenes, densidades) -> np.ndarray:
+    """Densidad de cada escenario (filas de `volumenes`); 0 si no hay volumen."""
+    v = np.atleast_2d(np.asarray(volumenes, dtype=float))
+    masa = v @ np.asarray(densidades, dtype=float)
+    total = v.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, masa / total, 0.0)
+
+
+def componentes_miscibles(miscible, presentes) -> np.ndarray:
+    """Etiqueta de grupo por escenario y líquido (el menor índice del grupo;
+    -1 si el líquido no está presente).
+
+    Todos los escenarios forman un solo grafo (nodo = escenario × líquido,
+    arista = par miscible con ambos presentes) que se resuelve con enganche de
+    raíces y compresión de caminos vectorizados, en O(log n) rondas.
+    """
+    patrones = np.atleast_2d(np.asarray(presentes, dtype=bool))
+    s, n = patrones.shape
+    eu, ev = np.nonzero(np.triu(np.asarray(miscible, dtype=bool), k=1))
+    origen, destino = [], []
+    tam = max(1, MAX_ELEMENTOS_BLOQUE // max(eu.size, 1))
+    for ini in range(0, s, tam):
+        p = patrones[ini:ini + tam]
+        fila, arista = np.nonzero(p[:, eu] & p[:, ev])
+        base = (ini + fila) * n
+        origen.append(base + eu[arista])
+        destino.append(base + ev[arista])
+    u = np.concatenate(origen) if origen else np.empty(0, dtype=np.int64)
+    v = np.concatenate(destino) if destino else np.empty(0, dtype=np.int64)
+
+    padre = np.arange(s * n)
+    while u.size:
+        pu, pv = padre[u], padre[v]
+        distintos = pu != pv
+        if not distintos.any():
+            break
+        # Enganchar la raíz mayor a la menor y comprimir caminos
+        np.minimum.at(padre, np.maximum(pu, pv)[distintos], np.minimum(pu, pv)[distintos])
+        while True:
+            abuelo = padre[padre]
+            if np.array_equal(abuelo, padre):
+                break
+            padre = abuelo
+        u, v = u[distintos], v[distintos]
+    return np.where(patrones, padre.reshape(s, n) % max(n, 1), -1)
+
+
+class CapasLote(NamedTuple):
+    grupo: np.ndarray            # (S, n) etiqueta de grupo por líquido; -1 si no está
+    densidad_grupo: np.ndarray   # (S, n) densidad mezclada del grupo de cada líquido
+    volumen_grupo: np.ndarray    # (S, n) volumen total del grupo de cada líquido
+
+
+@instrumentado("mezclas.capas_lote")
+def capas_lote(volumenes, registro: RegistroLiquidos) -> CapasLote:
+    """Grupos miscibles de cada escenario con su densidad y volumen combinados."""
+    v = np.atleast_2d(np.asarray(volumenes, dtype=float))
+    s, n = v.shape
+    grupo = componentes_miscibles(registro.miscible, v > 0)
+    # Sumas por (escenario, grupo) con bincount sobre índices aplanados
+    plano = np.where(grupo >= 0, grupo + n * np.arange(s)[:, None], s * n)
+    masa = np.bincount(plano.ravel(), weights=(v * registro.densidades).ravel(), minlength=s * n + 1)[:-1]
+    vol = np.bincount(plano.ravel(), weights=v.ravel(), minlength=s * n + 1)[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dens = np.where(vol > 0, masa / vol, np.nan)
+    idx = np.clip(plano, 0, s * n - 1)
+    fuera = grupo < 0
+    return CapasLote(
+        grupo=grupo,
+        densidad_grupo=np.where(fuera, np.nan, dens[idx]),
+        volumen_grupo=np.where(fuera, 0.0, vol[idx])
+    )
+
+
+class Capa(NamedTuple):
+    nombres: tuple       # líquidos fundidos en la capa
+    densidad: float      # densidad mezclada (g/cm³)
+    volumen: float       # ml
+    color: str           # color del líquido con más volumen en la capa
+
+
+def capas_columna(volumenes, registro: RegistroLiquidos) -> list:
+    """Capas de un escenario (vector de volúmenes por líquido del registro),
+    de abajo arriba: más densas primero; empates en el orden del registro."""
+    v = np.asarray(volumenes, dtype=float)
+    c = capas_lote(v[None, :], registro)
+    grupo = c.grupo[0]
+    raices = np.flatnonzero(grupo == np.arange(grupo.size))
+    orden = raices[np.argsort(-c.densidad_grupo[0, raices], kind="stable")]
+    capas = []
+    for g in orden:
+        miembros = np.flatnonzero(grupo == g)
+        dominante = miembros[np.argmax(v[miembros])]
+        capas.append(Capa(tuple(registro.nombres[k] for k in miembros), float(c.densidad_grupo[0, g]),
+                          float(c.volumen_grupo[0, g]), registro.colores[dominante]))
+    return capas
+
+
+def pares_miscibilidad(registro: RegistroLiquidos, indices):
+    """(i, j, estado) para cada par de `indices`, con estado 'miscibles',
+    'no miscibles' o 'desconocido'."""
+    indices = np.asarray(indices, dtype=np.int64)
+    a, b = np.triu_indices(indices.size, k=1)
+    i, j = indices[a], indices[b]
+    estado = np.where(~registro.conocida[i, j], "desconocido",
+                      np.where(registro.miscible[i, j], "miscibles", "no miscibles"))
+    return i, j, estado
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    n_liq, n_esc = 300, 5000
+    reg = RegistroLiquidos([f"L{k}" for k in range(n_liq)], rng.uniform(0.6, 2.0, n_liq), ["gray"] * n_liq)
+    m = rng.random((n_liq, n_liq)) < 0.01
+    reg.miscible = m | m.T | np.eye(n_liq, dtype=bool)
+    reg.conocida[:] = True
+    vols = rng.uniform(0, 500, (n_esc, n_liq)) * (rng.random((n_esc, n_liq)) < 0.03)
+    t0 = time.perf_counter()
+    d = densidad_mezcla(vols, reg.densidades)
+    t1 = time.perf_counter()
+    c = capas_lote(vols, reg)
+    t2 = time.perf_counter()
+    print(f"{n_esc} escenarios × {n_liq} líquidos: densidad {1000 * (t1 - t0):.1f} ms, "
+          f"capas {1000 * (t2 - t1):.1f} ms")
+    pres = vols > 0
+    print("grupos medios por escenario:", np.mean([np.unique(g[g >= 0]).size for g in c.grupo[:200]]),
+          "| líquidos presentes:", pres.sum(axis=1).mean())
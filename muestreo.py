@@ -0,0 +1,87 @@
+import numpy as np
+
+from instrumentacion import instrumentado
+
+# =============================
+# MUESTREO ADAPTATIVO PARA GRÁFICAS
+# =============================
+# Sustituye a np.linspace con resolución fija: parte de una malla gruesa y
+# subdivide solo los intervalos donde la curva no es casi lineal en la escala
+# de la vista. Las funciones suaves quedan con pocos puntos y las difíciles
+# (sin(1/x), tan(x), b*sin(c*x) con c grande) se refinan donde hace falta.
+
+def _evaluar(f, x):
+    # f puede devolver un arreglo o una tupla de arreglos (p. ej. f y f' fusionadas)
+    return np.atleast_2d(np.asarray(f(x), dtype=float))
+
+
+def _ventana_y(ys):
+    # Rango robusto por curva: un polo no debe aplastar la tolerancia del resto
+    ventanas = []
+    for fila in ys:
+        finitos = fila[np.isfinite(fila)]
+        if finitos.size == 0:
+            ventanas.append((-1.0, 1.0, 1.0))
+            continue
+        bajo, alto = np.percentile(finitos, [2, 98])
+        escala = alto - bajo
+        if escala <= 0:
+            escala = max(1.0, abs(float(alto)))
+        ventanas.append((bajo - escala, alto + escala, escala))
+    return (np.array(v)[:, None] for v in zip(*ventanas))
+
+
+@instrumentado("muestreo.muestrear")
+def muestrear(f, x_min: float, x_max: float, n_inicial: int = 257, max_puntos: int = 2000,
+              tol: float = 1e-3, max_niveles: int = 14):
+    """Devuelve (xs, ys) para graficar f en [x_min, x_max] con a lo sumo ~max_puntos.
+
+    Si f devuelve varias curvas a la vez, la malla se refina donde cualquiera
+    lo necesite y ys tiene una fila por curva. En los saltos que persisten hasta la subdivisión mínima (polos,
+    discontinuidades) se inserta un NaN para que Plotly y Matplotlib corten
+    el trazo en lugar de dibujar una línea vertical.
+    """
+    xs = np.linspace(x_min, x_max, n_inicial)
+    ys = _evaluar(f, xs)
+    # Lo que queda muy fuera de la vista se recorta: cerca de un polo no se
+    # gastan puntos en detalle que nunca se verá.
+    y_bajo, y_alto, escala = _ventana_y(ys)
+    ancho_total = abs(x_max - x_min)
+
+    candidatos = np.arange(len(xs) - 1)
+    for _ in range(max_niveles):
+        libres = max_puntos - len(xs)
+        if candidatos.size == 0 or libres <= 0:
+            break
+        xm = 0.5 * (xs[candidatos] + xs[candidatos + 1])
+        ym = _evaluar(f, xm)
+        izq, der = ys[:, candidatos], ys[:, candidatos + 1]
+        with np.errstate(invalid="ignore"):
+            lineal = 0.5 * (np.clip(izq, y_bajo, y_alto) + np.clip(der, y_bajo, y_alto))
+            err = np.abs(np.clip(ym, y_bajo, y_alto) - lineal) / escala
+        # Un extremo finito y otro no (o viceversa) también pide refinar
+        finitos = np.isfinite(izq) & np.isfinite(der) & np.isfinite(ym)
+        algun_finito = np.isfinite(izq) | np.isfinite(der) | np.isfinite(ym)
+        err = np.where(finitos, err, np.where(algun_finito, np.inf, 0.0)).max(axis=0)
+
+        malos = np.flatnonzero(err > tol)
+        if malos.size > libres:
+            malos = np.sort(malos[np.argsort(err[malos])[::-1][:libres]])
+        if malos.size == 0:
+            break
+        refinar = candidatos[malos]
+        xs = np.insert(xs, refinar + 1, xm[malos])
+        ys = np.insert(ys, refinar + 1, ym[:, malos], axis=1)
+        nuevos = refinar + 1 + np.arange(refinar.size)
+        candidatos = np.concatenate([nuevos - 1, nuevos])
+        candidatos.sort()
+
+    # Cortes en saltos que no se resolvieron al ancho mínimo de subdivisión
+    ancho_min = 1.01 * ancho_total / (n_inicial - 1) / 2 ** (max_niveles - 1)
+    with np.errstate(invalid="ignore"):
+        salto = (np.abs(np.diff(np.clip(ys, y_bajo, y_alto), axis=1)) > 0.5 * escala).any(axis=0)
+        saltos = np.flatnonzero(salto & (np.abs(np.diff(xs)) <= ancho_min))
+    if saltos.size:
+        xs = np.insert(xs, saltos + 1, 0.5 * (xs[saltos] + xs[saltos + 1]))
+        ys = np.insert(ys, saltos + 1, np.nan, axis=1)
+    return xs, (ys[0] if len(ys) == 1 else ys)
@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+import sympy as sp
+
+# =============================
+# NÚCLEOS NUMÉRICOS FUSIONADOS
+# =============================
+# Alternativa a sp.lambdify: el árbol SymPy (tras eliminar subexpresiones
+# comunes con sp.cse) se traduce a una lista de ufuncs de NumPy que escriben
+# con out= en buffers preasignados. Los temporales se reutilizan entre
+# llamadas y f y f' comparten las subexpresiones en una sola pasada.
+
+_FUNCIONES = {
+    sp.sin: np.sin, sp.cos: np.cos, sp.tan: np.tan,
+    sp.asin: np.arcsin, sp.acos: np.arccos, sp.atan: np.arctan,
+    sp.sinh: np.sinh, sp.cosh: np.cosh, sp.tanh: np.tanh,
+    sp.exp: np.exp, sp.log: np.log, sp.Abs: np.abs, sp.sign: np.sign
+}
+
+# Por encima de este tamaño los buffers no se conservan entre llamadas
+MAX_RETENIDO = 1 << 20
+
+
+class _Compilador:
+    def __init__(self, x):
+        self.simbolos = {x: 0}
+        self.instrucciones = []
+        self.n_slots = 1
+
+    def _emitir(self, ufunc, args, destino=None):
+        if destino is None:
+            destino = self.n_slots
+            self.n_slots += 1
+        self.instrucciones.append((ufunc, tuple(args), destino))
+        return destino
+
+    def operando(self, expr):
+        # Devuelve el índice del slot con el resultado, o un float si es constante
+        if expr in self.simbolos:
+            return self.simbolos[expr]
+        if expr.is_number:
+            return float(expr)
+        if isinstance(expr, sp.Add):
+            return self._encadenar(np.add, expr.args)
+        if isinstance(expr, sp.Mul):
+            return self._encadenar(np.multiply, expr.args)
+        if isinstance(expr, sp.Pow):
+            return self._potencia(*expr.args)
+        if expr.func in _FUNCIONES and len(expr.args) == 1:
+            return self._emitir(_FUNCIONES[expr.func], [self.operando(expr.args[0])])
+        raise NotImplementedError(f"Sin traducción para {expr.func}")
+
+    def _encadenar(self, ufunc, args):
+        ops = [self.operando(a) for a in args]
+        acumulado = self._emitir(ufunc, ops[:2])
+        for op in ops[2:]:
+            self._emitir(ufunc, [acumulado, op], destino=acumulado)
+        return acumulado
+
+    def _potencia(self, base, exponente):
+        b = self.operando(base)
+        if not exponente.is_number:
+            return self._emitir(np.power, [b, self.operando(exponente)])
+        e = float(exponente)
+        if e == 2:
+            return self._emitir(np.square, [b])
+        if e == 0.5:
+            return self._emitir(np.sqrt, [b])
+        if e == -1:
+            return self._emitir(np.reciprocal, [b])
+        if e == -0.5:
+            return self._emitir(np.reciprocal, [self._emitir(np.sqrt, [b])])
+        return self._emitir(np.power, [b, e])
+
+
+class NucleoFusionado:
+    """Evalúa varias expresiones de x en una sola pasada con buffers reutilizados."""
+
+    def __init__(self, exprs, x):
+        reemplazos, reducidas = sp.cse(list(exprs))
+        compilador = _Compilador(x)
+        for simbolo, sub in reemplazos:
+            compilador.simbolos[simbolo] = compilador.operando(sub)
+        self.salidas = [compilador.operando(e) for e in reducidas]
+        self.n_slots = compilador.n_slots
+        # Cada argumento queda como (es_slot, valor) para no inspeccionar tipos al evaluar
+        self.instrucciones = [
+            (ufunc, tuple((isinstance(a, int), a) for a in args), destino)
+            for ufunc, args, destino in compilador.instrucciones
+        ]
+        self._local = threading.local()
+
+    def _buffers(self, n):
+        if n > MAX_RETENIDO:
+            return np.empty((self.n_slots, n))
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[1] < n:
+            capacidad = max(n, 2 * buf.shape[1] if buf is not None else 0)
+            buf = self._local.buf = np.empty((self.n_slots, min(capacidad, MAX_RETENIDO)))
+        return buf[:, :n]
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        forma = x.shape
+        n = x.size
+        buf = self._buffers(n)
+        buf[0] = x.ravel()
+        try:
+            with np.errstate(all="ignore"):
+                for ufunc, args, destino in self.instrucciones:
+                    ufunc(*[buf[v] if es_slot else v for es_slot, v in args], out=buf[destino])
+        except Exception:
+            return [np.full(forma, np.nan) for _ in self.salidas]
+        resultados = []
+        for salida in self.salidas:
+            # Las salidas se copian: los buffers se reescriben en la próxima llamada
+            y = np.full(n, salida) if isinstance(salida, float) else buf[salida].copy()
+            y[~np.isfinite(y)] = np.nan
+            resultados.append(y.reshape(forma))
+        return resultados
+
+
+def compilar_nucleo(exprs, x):
+    # None si alguna expresión usa algo sin traducción (se usa lambdify)
+    try:
+        return NucleoFusionado(exprs, x)
+    except Exception:
+        return None
@@ -0,0 +1,108 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# PERFILES DE VELOCIDAD (VECTOR POR CONFIGURACIÓN)
+# =============================
+# Cada configuración guarda su perfil como un solo arreglo float64 en lugar de
+# un widget por tramo; las operaciones masivas trabajan sobre rangos de
+# posiciones (1..n, inclusivos) y devuelven un arreglo nuevo.
+
+V_MIN = 0.1
+V_MAX = 50.0
+V_DEFECTO = 8.0
+
+
+class ErrorPerfil(ValueError):
+    pass
+
+
+def perfil_uniforme(n: int, valor: float = V_DEFECTO) -> np.ndarray:
+    return np.full(int(n), float(valor))
+
+
+def _rango(v, desde: int, hasta: int) -> slice:
+    desde, hasta = int(desde), int(hasta)
+    if not 1 <= desde <= hasta <= v.size:
+        raise ErrorPerfil(f"Rango inválido: {desde}–{hasta} (la ruta tiene {v.size} tramos).")
+    return slice(desde - 1, hasta)
+
+
+def acotar(v) -> np.ndarray:
+    return np.clip(np.asarray(v, dtype=float), V_MIN, V_MAX)
+
+
+def rellenar_rango(v, desde: int, hasta: int, valor: float) -> np.ndarray:
+    v = np.array(v, dtype=float)
+    v[_rango(v, desde, hasta)] = valor
+    return acotar(v)
+
+
+def escalar_rango(v, desde: int, hasta: int, factor: float) -> np.ndarray:
+    v = np.array(v, dtype=float)
+    v[_rango(v, desde, hasta)] *= factor
+    return acotar(v)
+
+
+def _numeros(valores, origen: str) -> np.ndarray:
+    nums = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce").to_numpy(dtype=float)
+    malos = np.flatnonzero(np.isnan(nums))
+    if malos.size:
+        raise ErrorPerfil(f"{origen}: valor no numérico en la fila {malos[0] + 1}.")
+    return nums
+
+
+def _decimal(token: str) -> str:
+    # Coma decimal de hojas de cálculo en español ("8,5", "1.234,5"); con
+    # punto y también coma, el último de los dos es el separador decimal
+    if "," not in token:
+        return token
+    if "." in token and token.rfind(".") > token.rfind(","):
+        return token.replace(",", "")
+    return token.replace(".", "").replace(",", ".")
+
+
+def pegar_columna(v, texto: str, desde: int = 1) -> np.ndarray:
+    """Pega valores separados por saltos de línea, punto y coma, tabuladores
+    o espacios (p. ej. una columna copiada de una hoja de cálculo) a partir
+    de la posición `desde`; la coma se lee como separador decimal. Lo que no
+    cabe en la ruta se ignora."""
+    tokens = [_decimal(t) for t in texto.replace(";", "\n").split() if t]
+    if not tokens:
+        raise ErrorPerfil("No hay valores para pegar.")
+    nums = _numeros(tokens, "Columna pegada")
+    v = np.array(v, dtype=float)
+    sl = _rango(v, desde, desde)
+    fin = min(v.size, sl.start + nums.size)
+    v[sl.start:fin] = nums[:fin - sl.start]
+    return acotar(v)
+
+
+def importar_csv(v, archivo, tramos) -> np.ndarray:
+    """Toma velocidades de un CSV. Con columnas `tramo` y `velocidad_m_s` se
+    alinean por número de tramo (los tramos ausentes conservan su valor); si
+    no, se usa la primera columna por posición."""
+    if isinstance(archivo, (bytes, bytearray)):
+        archivo = io.BytesIO(archivo)
+    try:
+        df = pd.read_csv(archivo, dtype=str)
+    except Exception as e:
+        raise ErrorPerfil(f"No se pudo leer el CSV: {e}")
+    if df.empty:
+        raise ErrorPerfil("El CSV no tiene filas.")
+    v = np.array(v, dtype=float)
+    if {"tramo", "velocidad_m_s"} <= set(df.columns):
+        ids = _numeros(df["tramo"], "Columna 'tramo'").astype(np.int64)
+        vel = _numeros(df["velocidad_m_s"], "Columna 'velocidad_m_s'")
+        pos = pd.Index(np.asarray(tramos)).get_indexer(ids)
+        encontrados = pos >= 0
+        if not encontrados.any():
+            raise ErrorPerfil("Ningún tramo del CSV coincide con la ruta.")
+        v[pos[encontrados]] = vel[encontrados]
+        return acotar(v)
+    vel = _numeros(df.iloc[:, 0], f"Columna '{df.columns[0]}'")
+    n = min(v.size, vel.size)
+    v[:n] = vel[:n]
+    return acotar(v)
@@ -1,8 +1,12 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import io
+from render import servicio_render
+from crecimiento import ParametrosCrecimiento, RANGOS, CANTIDADES, curva, metricas, mapa_sensibilidad
+from exportacion import formatos_disponibles, descarga_diferida, nombre_archivo, tipo_mime
+import instrumentacion
+
+instrumentacion.iniciar_rerun("plantas")
 
 #  Estilo visual personalizado con tonos verdes
 st.markdown("""
@@ -49,25 +53,75 @@ dt = 1 if paso == "Diaria" else 7
 
 # 📈 Cálculo del crecimiento
 st.header("📈 Resultados del crecimiento")
+parametros = ParametrosCrecimiento(r=r, L=L, N=N, W=W, P0=P0, Pmax=Pmax, dias=dias)
 r_ajustada = r * L * N * W
-t = np.linspace(0, dias, int(dias/dt)+1)
-P = Pmax / (1 + ((Pmax - P0) / P0) * np.exp(-r_ajustada * t))
-dP_dt = r_ajustada * P * (1 - P / Pmax)
-
-# Métricas clave
-st.metric("Tamaño final estimado", f"{P[-1]:.2f} m")
-st.metric("Tasa máxima de crecimiento", f"{max(dP_dt):.3f} m/día")
-
-# 📊 Gráfica de crecimiento
-fig, ax = plt.subplots()
-ax.plot(t, P, color='#388e3c', linewidth=2)
-ax.set_facecolor('#f1f8e9')
-fig.patch.set_facecolor('#e8f5e9')
-ax.set_xlabel("Tiempo (días)")
-ax.set_ylabel("Tamaño de la planta (m)")
-ax.set_title("🌱 Curva de crecimiento logístico")
-ax.grid(True, linestyle='--', alpha=0.5)
-st.pyplot(fig)
+t, P, dP_dt = curva(parametros, dt)
+
+# Métricas clave (forma cerrada, no dependen de la resolución temporal)
+mets = metricas(parametros)
+def dias_fmt(v):
+    return "no se alcanza" if not np.isfinite(v) else f"{v:.1f} días"
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Tamaño final estimado", f"{mets['tamano_final']:.2f} m")
+c2.metric("Tasa máxima de crecimiento", f"{mets['tasa_max']:.3f} m/día")
+c3.metric("Punto de inflexión", dias_fmt(mets['dia_inflexion']))
+c4.metric("Días al 90 % de Pmax", dias_fmt(mets['dias_90']))
+
+# 📊 Gráfica de crecimiento (figura persistente; PNG en caché por parámetros)
+def preparar_crecimiento(fig):
+    ax = fig.subplots()
+    linea, = ax.plot([], [], color='#388e3c', linewidth=2)
+    ax.set_facecolor('#f1f8e9')
+    fig.patch.set_facecolor('#e8f5e9')
+    ax.set_xlabel("Tiempo (días)")
+    ax.set_ylabel("Tamaño de la planta (m)")
+    ax.set_title("🌱 Curva de crecimiento logístico")
+    ax.grid(True, linestyle='--', alpha=0.5)
+    return {"ax": ax, "linea": linea}
+
+def dibujar_crecimiento(fig, art):
+    art["linea"].set_data(t, P)
+    art["ax"].relim()
+    art["ax"].autoscale_view()
+
+st.image(servicio_render.imagen("plantas.crecimiento", (P0, Pmax, r_ajustada, dias, dt),
+                                preparar_crecimiento, dibujar_crecimiento, figsize=(6.4, 4.8)), width="stretch")
+
+# 🔬 Sensibilidad: una malla de parámetros evaluada de una vez (caché por parámetros)
+st.header("🔬 Sensibilidad")
+s1, s2, s3, s4 = st.columns(4)
+eje_x = s1.selectbox("Eje X", list(RANGOS), index=list(RANGOS).index("L"))
+eje_y = s2.selectbox("Eje Y", list(RANGOS), index=list(RANGOS).index("W"))
+cantidad = s3.selectbox("Cantidad", list(CANTIDADES), format_func=CANTIDADES.get)
+resolucion = s4.select_slider("Resolución", [100, 300, 1000], value=300, format_func=lambda n: f"{n}×{n}")
+
+if eje_x == eje_y:
+    st.warning("Elige dos parámetros distintos para los ejes.")
+else:
+    def preparar_mapa(fig):
+        ax = fig.subplots()
+        imagen = ax.imshow(np.zeros((2, 2)), origin="lower", aspect="auto", cmap="YlGn")
+        barra = fig.colorbar(imagen, ax=ax)
+        punto, = ax.plot([], [], "o", color="#c62828", ms=8)
+        fig.patch.set_facecolor('#e8f5e9')
+        return {"ax": ax, "imagen": imagen, "barra": barra, "punto": punto}
+
+    def dibujar_mapa(fig, art):
+        x_m, y_m, z_m = mapa_sensibilidad(parametros, eje_x, eje_y, cantidad, resolucion)
+        z_vista = np.where(np.isfinite(z_m), z_m, np.nan)
+        art["imagen"].set_data(z_vista)
+        art["imagen"].set_extent((x_m[0], x_m[-1], y_m[0], y_m[-1]))
+        if np.isfinite(z_vista).any():
+            art["imagen"].set_clim(np.nanmin(z_vista), np.nanmax(z_vista))
+        art["barra"].set_label(CANTIDADES[cantidad])
+        art["punto"].set_data([getattr(parametros, eje_x)], [getattr(parametros, eje_y)])
+        art["ax"].set_xlabel(eje_x)
+        art["ax"].set_ylabel(eje_y)
+        art["ax"].set_title(f"{CANTIDADES[cantidad]} según {eje_x} y {eje_y}")
+
+    st.image(servicio_render.imagen("plantas.sensibilidad", (parametros, eje_x, eje_y, cantidad, resolucion),
+                                    preparar_mapa, dibujar_mapa, figsize=(8, 5)), width="stretch")
+    st.caption("El punto rojo marca los parámetros actuales; las zonas en blanco no alcanzan el umbral.")
 
 # 📋 Tabla de resultados
 df = pd.DataFrame({
@@ -77,11 +131,10 @@ df = pd.DataFrame({
 })
 st.dataframe(df)
 
-# 💾 Exportar CSV
-buf = io.BytesIO()
-df.to_csv(buf, index=False)
-buf.seek(0)
-st.download_button("📥 Descargar resultados en CSV", data=buf, file_name="crecimiento_planta.csv", mime="text/csv")
+# 💾 Exportar resultados (los bytes se generan al pulsar el botón)
+formato = st.selectbox("Formato de exportación", formatos_disponibles())
+st.download_button(f"📥 Descargar resultados en {formato}", data=descarga_diferida(lambda: df, formato),
+                   file_name=nombre_archivo("crecimiento_planta", formato), mime=tipo_mime(formato))
 
 # 🧠 Interpretación visual
 st.header("🧠 Interpretación")
@@ -91,3 +144,5 @@ elif r_ajustada > 0.5:
     st.success("🌞 La planta crecerá rápidamente gracias a condiciones óptimas.")
 else:
     st.info("🌿 La planta tendrá un crecimiento moderado y estable.")
+
+instrumentacion.panel()
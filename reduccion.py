@@ -0,0 +1,73 @@
+import numpy as np
+
+# =============================
+# REDUCCIÓN DE DATOS PARA GRÁFICAS
+# =============================
+# Con rutas de miles de tramos no se envía cada tramo al navegador: la línea
+# se reduce con LTTB, las barras se agregan por bloques de tramos y las cajas
+# se dibujan con cuartiles precalculados. El tamaño del payload queda acotado
+# sin importar la longitud de la ruta.
+
+MAX_PUNTOS_LINEA = 1500
+MAX_BARRAS = 60
+MAX_PUNTOS_CAJA = 500
+
+
+def lttb(x, y, n_salida: int):
+    """Largest-Triangle-Three-Buckets: conserva la forma visual con n_salida puntos."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if n_salida >= n or n_salida < 3:
+        return x, y
+    bordes = np.linspace(1, n - 1, n_salida - 1).astype(int)
+    elegidos = np.empty(n_salida, dtype=int)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    a = 0
+    for i in range(n_salida - 2):
+        ini, fin = bordes[i], bordes[i + 1]
+        if i + 2 < bordes.size:
+            sig = slice(bordes[i + 1], bordes[i + 2])
+            prom_x, prom_y = x[sig].mean(), y[sig].mean()
+        else:
+            prom_x, prom_y = x[-1], y[-1]
+        area = np.abs((x[a] - prom_x) * (y[ini:fin] - y[a]) - (x[a] - x[ini:fin]) * (prom_y - y[a]))
+        a = ini + int(np.nanargmax(area)) if np.isfinite(area).any() else ini
+        elegidos[i + 1] = a
+    return x[elegidos], y[elegidos]
+
+
+def bloques(n: int, n_bloques: int):
+    # Índices de inicio de n_bloques grupos contiguos de tramos
+    return np.unique(np.linspace(0, n, n_bloques + 1).astype(int)[:-1])
+
+
+def velocidad_por_bloques(tramos, distancias, tiempos, n_bloques: int = MAX_BARRAS):
+    """Velocidad media real (distancia / tiempo) de cada bloque de tramos.
+
+    Devuelve (primer_tramo, ultimo_tramo, velocidad_m_s) por bloque.
+    """
+    tramos = np.asarray(tramos)
+    inicios = bloques(tramos.size, n_bloques)
+    d = np.add.reduceat(np.asarray(distancias, dtype=float), inicios)
+    t = np.add.reduceat(np.asarray(tiempos, dtype=float), inicios)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = np.where(np.isfinite(t) & (t > 0), d / t, 0.0)
+    finales = np.append(inicios[1:], tramos.size) - 1
+    return tramos[inicios], tramos[finales], v
+
+
+def cuartiles_caja(valores):
+    """Estadísticos de un go.Box precalculado (bigotes de Tukey a 1.5·IQR)."""
+    v = np.asarray(valores, dtype=float)
+    v = v[np.isfinite(v)]
+    if v.size == 0:
+        return None
+    q1, mediana, q3 = np.percentile(v, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = v[(v >= q1 - 1.5 * iqr) & (v <= q3 + 1.5 * iqr)]
+    return {
+        "q1": [q1], "median": [mediana], "q3": [q3],
+        "lowerfence": [dentro.min()], "upperfence": [dentro.max()],
+        "mean": [v.mean()]
+    }
@@ -0,0 +1,186 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from instrumentacion import etapa
+
+# =============================
+# SERVICIO DE RENDER DE FIGURAS MATPLOTLIB
+# =============================
+# Las figuras se crean con la API orientada a objetos (Figure + lienzo Agg),
+# no con pyplot: no quedan registradas en el estado global y no hay que
+# cerrarlas para liberarlas. Cada figura con nombre es persistente: se crea
+# una vez (`preparar` devuelve sus artistas) y en cada rerun solo se
+# actualizan los datos (`dibujar` usa set_data). Los bytes PNG/SVG se guardan
+# por hash de parámetros en un LRU acotado por tamaño.
+
+MAX_BYTES_CACHE = 32 * 1024 * 1024
+
+
+def hash_parametros(parametros) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for p in parametros:
+        if isinstance(p, np.ndarray):
+            h.update(str((p.dtype, p.shape)).encode())
+            h.update(np.ascontiguousarray(p).tobytes())
+        else:
+            h.update(repr(p).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class _FiguraPersistente:
+    def __init__(self, preparar, figsize):
+        self.figura = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figura)
+        self.artistas = preparar(self.figura)
+        self.lock = threading.Lock()
+
+
+class ServicioRender:
+    """Figuras persistentes por nombre y LRU de imágenes por parámetros."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES_CACHE):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._figuras = {}
+        self._imagenes = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _figura(self, nombre, preparar, figsize):
+        with self._lock:
+            fig = self._figuras.get(nombre)
+            if fig is None:
+                fig = self._figuras[nombre] = _FiguraPersistente(preparar, figsize)
+            return fig
+
+    def imagen(self, nombre: str, parametros, preparar, dibujar, formato: str = "png",
+               dpi: int = 100, figsize=(10, 5)) -> bytes:
+        """Bytes de la figura `nombre` para `parametros` (tupla hashable o con arreglos).
+
+        `preparar(figura) -> artistas` se llama una sola vez por nombre;
+        `dibujar(figura, artistas)` actualiza los artistas en sitio. Ambas
+        deben ser deterministas respecto a `parametros`.
+        """
+        with etapa(f"render.{nombre}") as m:
+            datos = self._imagen(nombre, parametros, preparar, dibujar, formato, dpi, figsize)
+            m.carga_bytes = len(datos)
+        return datos
+
+    def _imagen(self, nombre, parametros, preparar, dibujar, formato, dpi, figsize) -> bytes:
+        clave = (nombre, hash_parametros(parametros), formato, dpi)
+        with self._lock:
+            datos = self._imagenes.get(clave)
+            if datos is not None:
+                self._imagenes.move_to_end(clave)
+                self.hits += 1
+                return datos
+            self.misses += 1
+        fig = self._figura(nombre, preparar, figsize)
+        with fig.lock:
+            with etapa(f"render.{nombre}.dibujar"):
+                dibujar(fig.figura, fig.artistas)
+            with etapa(f"render.{nombre}.savefig"):
+                buf = io.BytesIO()
+                fig.figura.savefig(buf, format=formato, dpi=dpi, facecolor=fig.figura.get_facecolor())
+        datos = buf.getvalue()
+        with self._lock:
+            if clave not in self._imagenes:
+                self._imagenes[clave] = datos
+                self._bytes += len(datos)
+            while self._bytes > self.max_bytes and len(self._imagenes) > 1:
+                _, viejo = self._imagenes.popitem(last=False)
+                self._bytes -= len(viejo)
+        return datos
+
+    def liberar(self, nombre: str):
+        # Suelta la figura persistente y sus imágenes en caché
+        with self._lock:
+            fig = self._figuras.pop(nombre, None)
+            for clave in [c for c in self._imagenes if c[0] == nombre]:
+                self._bytes -= len(self._imagenes.pop(clave))
+        if fig is not None:
+            with fig.lock:
+                fig.figura.clear()
+
+    def limpiar(self):
+        for nombre in list(self._figuras):
+            self.liberar(nombre)
+        with self._lock:
+            self._imagenes.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"figuras": len(self._figuras), "imagenes": len(self._imagenes),
+                    "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+servicio_render = ServicioRender()
+
+
+# =============================
+# BENCHMARK DE MEMORIA
+# =============================
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == "__main__":
+    # python render.py [reruns]: RSS del patrón anterior (plt.subplots sin
+    # cerrar) frente al servicio con 10k reruns. Los 1000 parámetros no caben
+    # en el LRU de 2 MB, así que cada rerun redibuja (peor caso) y el LRU desaloja.
+    import sys
+    import time
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    reruns = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    t = np.linspace(0, 100, 101)
+
+    def curva(r):
+        return 2.0 / (1 + 19 * np.exp(-r * t))
+
+    print("plt.subplots() por rerun, sin cerrar:")
+    base = _rss_mb()
+    for k in range(300):
+        fig, ax = plt.subplots()
+        ax.plot(t, curva(0.01 + (k % 100) / 100))
+        fig.savefig(io.BytesIO(), format="png", dpi=50)
+        if (k + 1) % 100 == 0:
+            print(f"  {k + 1:>6} reruns: RSS +{_rss_mb() - base:.1f} MB")
+    plt.close("all")
+
+    def preparar(fig):
+        ax = fig.subplots()
+        linea, = ax.plot([], [], color="#388e3c", linewidth=2)
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 2.1)
+        return {"linea": linea}
+
+    servicio = ServicioRender(max_bytes=2 * 1024 * 1024)
+    print(f"ServicioRender, {reruns} reruns (1000 parámetros distintos, LRU de 2 MB):")
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    for k in range(reruns):
+        r = 0.01 + (k * 7919 % 1000) / 1000
+        servicio.imagen("bench", (r,), preparar,
+                        lambda fig, art, r=r: art["linea"].set_data(t, curva(r)), dpi=50, figsize=(6.4, 4.8))
+        if (k + 1) % (reruns // 10) == 0:
+            print(f"  {k + 1:>6} reruns: RSS +{_rss_mb() - base:.1f} MB  {servicio.estadisticas()}")
+    print(f"  {1000 * (time.perf_counter() - t0) / reruns:.2f} ms por rerun")
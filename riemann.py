@@ -0,0 +1,123 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from instrumentacion import instrumentado
+
+# =============================
+# SUMAS DE RIEMANN PARA n GRANDE
+# =============================
+# La suma se evalúa por bloques de nodos (memoria acotada hasta n = 10⁷) y,
+# en la misma pasada, se guarda el mínimo y máximo de altura por franja para
+# dibujar rutas con miles de rectángulos sin crear un parche por rectángulo.
+
+TAM_BLOQUE = 1 << 20
+MAX_FRANJAS = 2000
+METODOS_CONVERGENCIA = ["Izquierda", "Derecha", "Punto Medio", "Trapecio", "Simpson"]
+
+
+class ResultadoRiemann(NamedTuple):
+    suma: float
+    n: int
+    bordes: np.ndarray       # (n_franjas + 1,) bordes en x de cada franja
+    y_min: np.ndarray        # (n_franjas,) altura mínima de los rectángulos de la franja
+    y_max: np.ndarray
+
+
+def _evaluar(f, x):
+    return np.broadcast_to(np.asarray(f(x), dtype=float), x.shape)
+
+
+def _desplazamiento(tipo: str) -> float:
+    return {"Izquierda": 0.0, "Derecha": 1.0, "Punto Medio": 0.5}[tipo]
+
+
+@instrumentado("riemann.suma_riemann")
+def suma_riemann(f, a: float, b: float, n: int, tipo: str,
+                 n_franjas: int = MAX_FRANJAS, tam_bloque: int = TAM_BLOQUE) -> ResultadoRiemann:
+    """Suma de Riemann por bloques con alturas agregadas en `n_franjas`.
+
+    Con n ≤ n_franjas cada franja es exactamente un rectángulo.
+    """
+    n = int(n)
+    dx = (b - a) / n
+    desp = _desplazamiento(tipo)
+    n_franjas = min(n, n_franjas)
+    y_min = np.full(n_franjas, np.inf)
+    y_max = np.full(n_franjas, -np.inf)
+    parciales = []
+    for ini in range(0, n, tam_bloque):
+        k = np.arange(ini, min(n, ini + tam_bloque))
+        y = _evaluar(f, a + (k + desp) * dx)
+        parciales.append(float(np.sum(y)))
+        # Franja de cada rectángulo; k es creciente, así que reduceat agrupa
+        franja = k * n_franjas // n
+        cortes = np.flatnonzero(np.diff(franja, prepend=-1))
+        ids = franja[cortes]
+        y_min[ids] = np.fmin(y_min[ids], np.fmin.reduceat(y, cortes))
+        y_max[ids] = np.fmax(y_max[ids], np.fmax.reduceat(y, cortes))
+    bordes = a + (np.arange(n_franjas + 1) * n // n_franjas) * dx
+    return ResultadoRiemann(
+        suma=math.fsum(parciales) * dx, n=n, bordes=bordes,
+        y_min=np.where(np.isfinite(y_min), y_min, np.nan),
+        y_max=np.where(np.isfinite(y_max), y_max, np.nan)
+    )
+
+
+def secuencia_n(n_max: int, puntos: int = 25) -> np.ndarray:
+    return np.unique(np.round(np.logspace(0, np.log10(n_max), puntos)).astype(np.int64))
+
+
+@instrumentado("riemann.estudio_convergencia")
+def estudio_convergencia(f, a: float, b: float, ns, exacta: float,
+                         tam_bloque: int = TAM_BLOQUE) -> dict:
+    """Error absoluto de cada método para cada n de `ns`.
+
+    Los nodos de todos los n (bordes y puntos medios) se concatenan en un
+    solo arreglo, se evalúan en una pasada por bloques y se reducen por
+    segmento con np.add.reduceat. Simpson se obtiene como (T + 2M) / 3, que es
+    la regla de Simpson compuesta sobre los 2n subintervalos.
+    """
+    ns = np.asarray(ns, dtype=np.int64)
+    # Por cada n: n+1 bordes seguidos de n puntos medios
+    largos = 2 * ns + 1
+    inicios = np.concatenate([[0], np.cumsum(largos)[:-1]])
+    total = int(largos.sum())
+    extremos = np.empty((ns.size, 2))
+
+    y = np.empty(total)
+    for ini in range(0, total, tam_bloque):
+        j = np.arange(ini, min(total, ini + tam_bloque))
+        grupo = np.searchsorted(inicios, j, side="right") - 1
+        local = j - inicios[grupo]
+        n_g = ns[grupo]
+        # local ≤ n → borde local; local > n → punto medio (local - n - 1) + 1/2
+        pos = np.where(local <= n_g, local, local - n_g - 0.5)
+        y[ini:ini + j.size] = _evaluar(f, a + pos * (b - a) / n_g)
+
+    # Cortes alternados: [bordes de n₀][medios de n₀][bordes de n₁]...
+    segmentos = np.add.reduceat(y, np.column_stack([inicios, inicios + ns + 1]).ravel())
+    sumas_bordes, sumas_medios = segmentos[0::2], segmentos[1::2]
+    extremos[:, 0] = y[inicios]
+    extremos[:, 1] = y[inicios + ns]
+
+    h = (b - a) / ns
+    izquierda = (sumas_bordes - extremos[:, 1]) * h
+    derecha = (sumas_bordes - extremos[:, 0]) * h
+    medio = sumas_medios * h
+    trapecio = (izquierda + derecha) / 2
+    simpson = (trapecio + 2 * medio) / 3
+    aproximaciones = dict(zip(METODOS_CONVERGENCIA, [izquierda, derecha, medio, trapecio, simpson]))
+    return {m: np.abs(v - exacta) for m, v in aproximaciones.items()}
+
+
+def orden_observado(ns, errores) -> float:
+    """Pendiente de log(error) contra log(n) en los últimos puntos que aún
+    están por encima del ruido de redondeo."""
+    ns = np.asarray(ns, dtype=float)
+    e = np.asarray(errores, dtype=float)
+    ok = np.flatnonzero(np.isfinite(e) & (e > 1e-11))[-6:]
+    if ok.size < 2:
+        return float("nan")
+    return float(-np.polyfit(np.log(ns[ok]), np.log(e[ok]), 1)[0])
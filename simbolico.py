@@ -0,0 +1,282 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+import sympy as sp
+from sympy.parsing.sympy_parser import (
+    parse_expr,
+    standard_transformations,
+    implicit_multiplication_application,
+    convert_xor
+)
+
+from cache_compartido import AUSENTE, cache_compartido
+from evaluador import ErrorEvaluacion, obtener_servicio
+from instrumentacion import etapa, instrumentado
+from nucleos import compilar_nucleo
+
+# =============================
+# PARSER ROBUSTO
+# =============================
+X = sp.Symbol("x")
+
+TRANSFORMATIONS = (
+    standard_transformations +
+    (implicit_multiplication_application, convert_xor)
+)
+
+SAFE_FUNCTIONS = {
+    "sin": sp.sin, "cos": sp.cos, "tan": sp.tan,
+    "exp": sp.exp, "ln": sp.log, "log": sp.log,
+    "sqrt": sp.sqrt, "abs": sp.Abs, "pi": sp.pi, "e": sp.E
+}
+
+def limpiar_entrada(expr: str) -> str:
+    expr = expr.lower().strip()
+    reemplazos = {"sen": "sin", "π": "pi", "^": "**", "|x|": "abs(x)"}
+    for k, v in reemplazos.items():
+        expr = expr.replace(k, v)
+    return expr
+
+def parsear_funcion(expr_str: str):
+    try:
+        expr = parse_expr(
+            expr_str,
+            local_dict=SAFE_FUNCTIONS | {"x": X},
+            transformations=TRANSFORMATIONS,
+            evaluate=True
+        )
+        if not expr.has(X) and not expr.is_number:
+            raise ValueError("La función debe depender de x")
+        return expr, None
+    except Exception as e:
+        return None, str(e)
+
+@instrumentado("simbolico.lambdify_seguro")
+def lambdify_seguro(expr, backend="numpy"):
+    # backend="fusionado": núcleo de ufuncs con buffers reutilizados (nucleos.py);
+    # si la expresión no se puede traducir se usa lambdify como siempre.
+    if backend == "fusionado":
+        nucleo = compilar_nucleo([expr], X)
+        if nucleo is not None:
+            return lambda x: nucleo(x)[0]
+    try:
+        f = sp.lambdify(X, expr, modules=["numpy"])
+        def wrapper(x):
+            try:
+                y = f(x)
+                y = np.array(y, dtype=float)
+                if y.shape == (): y = np.full_like(x, y) # Manejar funciones constantes
+                y[~np.isfinite(y)] = np.nan
+                return y
+            except:
+                return np.full_like(x, np.nan)
+        return wrapper
+    except:
+        return None
+
+# =============================
+# TRABAJOS AISLADOS
+# =============================
+# Se ejecutan en los procesos de evaluador.py: reciben la cadena normalizada
+# y devuelven expresiones SymPy (serializables), nunca funciones numéricas.
+LIMITE_ANTIDERIVADA_S = 15.0
+
+def trabajo_analizar(expr_str: str):
+    f_sym, error = parsear_funcion(expr_str)
+    if error:
+        return None, None, error
+    try:
+        d_sym = sp.diff(f_sym, X)
+    except Exception:
+        d_sym = None
+    return f_sym, d_sym, None
+
+def trabajo_antiderivada(expr_str: str):
+    f_sym, error = parsear_funcion(expr_str)
+    if error:
+        return None
+    F_sym = sp.integrate(f_sym, X)
+    return None if F_sym.has(sp.Integral) else F_sym
+
+def trabajo_impropia(expr_str: str, a: float, b: float):
+    """(polos de f en [a, b], integral sumando límites laterales de F entre ellos).
+
+    Sin polos el valor es None (basta F(b) - F(a)); ±inf o nan si diverge.
+    Devuelve None si SymPy no puede determinar los polos o la antiderivada.
+    """
+    f_sym, error = parsear_funcion(expr_str)
+    if error:
+        return None
+    try:
+        polos = sp.singularities(f_sym, X, sp.Interval(a, b))
+    except Exception:
+        return None
+    if not isinstance(polos, (sp.FiniteSet, type(sp.S.EmptySet))) or not all(p.is_real for p in polos):
+        return None
+    if not polos:
+        return (), None
+    F_sym = sp.integrate(f_sym, X)
+    if F_sym.has(sp.Integral):
+        return None
+    # Límites en los polos exactos (pi/2, no 1.5707963...) desde dentro de cada tramo
+    puntos = sorted(set(polos) | {sp.Float(a), sp.Float(b)}, key=float)
+    total = sp.S.Zero
+    for izq, der in zip(puntos[:-1], puntos[1:]):
+        total += sp.limit(F_sym, X, der, "-") - sp.limit(F_sym, X, izq, "+")
+    if total.is_finite:
+        valor = complex(total)
+        valor = valor.real if valor.imag == 0 else float("nan")
+    else:
+        valor = float(total) if total in (sp.oo, -sp.oo) else float("nan")
+    return tuple(float(p) for p in sorted(polos, key=float)), valor
+
+# =============================
+# MEMOIZACIÓN DEL PIPELINE
+# =============================
+class EntradaSimbolica:
+    """Resultados de parsear, derivar, compilar e integrar una expresión normalizada."""
+
+    def __init__(self, expr_str: str, clave=None):
+        self.expr_str = expr_str
+        self.f_sym = self.d_sym = self.error = None
+        self.f = self.df = self.f_df = None
+        # Solo se guarda en cache lo determinista (resultado o error de sintaxis):
+        # una cancelación, un límite agotado o un fallo del trabajador no
+        self.cacheable = True
+        self._lock = threading.Lock()
+        self._futuro_antiderivada = None
+        self._F = None
+        try:
+            # parsear_funcion + derivada en el proceso trabajador (incluye el viaje IPC),
+            # una sola vez por expresión entre todas las sesiones
+            with etapa("simbolico.parsear_funcion"):
+                self.f_sym, self.d_sym, self.error = cache_compartido.obtener(
+                    "simbolico.analizar", expr_str,
+                    lambda: obtener_servicio().evaluar(trabajo_analizar, expr_str, clave=clave))
+        except ErrorEvaluacion as e:
+            # Incluye EvaluacionCancelada; con el servidor cargado la misma
+            # fórmula puede terminar a tiempo en el siguiente rerun
+            self.error, self.cacheable = str(e), False
+        if self.error:
+            return
+        self.f = lambdify_seguro(self.f_sym, backend="fusionado")
+        if self.d_sym is not None:
+            self.df = lambdify_seguro(self.d_sym, backend="fusionado")
+            # f y f' en una sola pasada compartiendo subexpresiones
+            self.f_df = compilar_nucleo([self.f_sym, self.d_sym], X)
+            if self.f_df is None and self.f is not None and self.df is not None:
+                # Fuera de los núcleos (cot, floor, Piecewise...): f y f' por separado
+                f, df = self.f, self.df
+                self.f_df = lambda x: (f(x), df(x))
+
+    def antiderivada(self, timeout=None):
+        """Devuelve (F_sym, F) o (None, None) si no hay forma cerrada o se agota el tiempo.
+
+        El cálculo sigue en el proceso trabajador tras un timeout, así que un
+        rerun posterior encuentra la antiderivada ya lista.
+        """
+        if self.error:
+            return None, None
+        with self._lock:
+            if self._futuro_antiderivada is None:
+                F_sym = cache_compartido.consultar("simbolico.antiderivada", self.expr_str)
+                if F_sym is AUSENTE:
+                    self._futuro_antiderivada = obtener_servicio().enviar(
+                        trabajo_antiderivada, self.expr_str,
+                        limite_pared_s=LIMITE_ANTIDERIVADA_S, limite_cpu_s=LIMITE_ANTIDERIVADA_S
+                    )
+                    self._futuro_antiderivada.add_done_callback(self._guardar_antiderivada)
+                else:
+                    self._futuro_antiderivada = Future()
+                    self._futuro_antiderivada.set_result(F_sym)
+        try:
+            F_sym = self._futuro_antiderivada.result(timeout=timeout)
+        except (TimeoutError, ErrorEvaluacion):
+            return None, None
+        if F_sym is None:
+            return None, None
+        with self._lock:
+            if self._F is None:
+                self._F = lambdify_seguro(F_sym, backend="fusionado")
+        return F_sym, self._F
+
+    def antiderivada_resuelta(self) -> bool:
+        """True si la antiderivada ya terminó (con o sin forma cerrada)."""
+        futuro = self._futuro_antiderivada
+        return futuro is not None and futuro.done() and not futuro.cancelled() and futuro.exception() is None
+
+    def impropia(self, a: float, b: float, timeout=None):
+        """(terminado, resultado de trabajo_impropia en [a, b]); (False, None)
+        si no está listo a tiempo o el trabajo falló."""
+        if self.error:
+            return False, None
+        futuro = obtener_servicio().enviar(trabajo_impropia, self.expr_str, float(a), float(b),
+                                           limite_pared_s=LIMITE_ANTIDERIVADA_S, limite_cpu_s=LIMITE_ANTIDERIVADA_S)
+        try:
+            return True, futuro.result(timeout=timeout)
+        except (TimeoutError, ErrorEvaluacion):
+            return False, None
+
+    def _guardar_antiderivada(self, futuro):
+        # Solo resultados completos: un límite agotado o un fallo se reintentan
+        if not futuro.cancelled() and futuro.exception() is None:
+            cache_compartido.guardar("simbolico.antiderivada", self.expr_str, futuro.result())
+
+    @property
+    def F_sym(self):
+        return self.antiderivada()[0]
+
+    @property
+    def F(self):
+        return self.antiderivada()[1]
+
+
+class CacheSimbolico:
+    """Cache LRU de EntradaSimbolica por expresión normalizada, con contadores."""
+
+    def __init__(self, max_entradas: int = 128):
+        self.max_entradas = max_entradas
+        self.hits = 0
+        self.misses = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, expr_str: str, clave=None) -> EntradaSimbolica:
+        with self._lock:
+            entrada = self._entradas.get(expr_str)
+            if entrada is not None:
+                self._entradas.move_to_end(expr_str)
+                self.hits += 1
+                return entrada
+            self.misses += 1
+        # Se construye fuera del lock para no bloquear a otras sesiones
+        entrada = EntradaSimbolica(expr_str, clave=clave)
+        if not entrada.cacheable:
+            return entrada
+        with self._lock:
+            self._entradas[expr_str] = entrada
+            self._entradas.move_to_end(expr_str)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return entrada
+
+    def estadisticas(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entradas": len(self._entradas),
+            "hits": self.hits,
+            "misses": self.misses,
+            "tasa_acierto": self.hits / total if total else 0.0
+        }
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Instancia compartida por todas las ejecuciones del script
+cache_simbolico = CacheSimbolico()
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from consultas import COLUMNA_BBCH, COLUMNA_DIA, COLUMNAS_METRICAS, AlmacenConsultas, EscritorCorridas
+
+
+def _almacen(directorio, bbch, etiquetas=None, dias=None, n_corridas=1):
+    n_dias = len(bbch)
+    columnas = {c: np.tile(np.arange(n_dias, dtype=float), (n_corridas, 1)) for c in COLUMNAS_METRICAS}
+    if dias is not None:
+        columnas[COLUMNA_DIA] = np.tile(dias, (n_corridas, 1))
+    with EscritorCorridas(str(directorio)) as escritor:
+        escritor.agregar_arreglos(columnas, np.tile(bbch, (n_corridas, 1)), etiquetas)
+    return AlmacenConsultas(str(directorio))
+
+
+def test_codigo_sin_etiqueta_no_toma_la_de_otro(tmp_path):
+    almacen = _almacen(tmp_path, [10, 30, 60], {10: "a", 60: "c"})
+    assert list(almacen.corrida(0)[COLUMNA_BBCH]) == ["a", "30", "c"]
+
+
+def test_sin_etiquetas_se_muestran_los_codigos(tmp_path):
+    almacen = _almacen(tmp_path, [10, 10, 30])
+    assert list(almacen.corrida(0)[COLUMNA_BBCH]) == ["10", "10", "30"]
+
+
+def test_bbch_no_monotono_en_uint8(tmp_path):
+    almacen = _almacen(tmp_path, [10, 30, 20, 20])
+    assert not almacen.monotona[COLUMNA_BBCH]
+    assert list(almacen.primer_dia(COLUMNA_BBCH, 25)) == [2]
+
+
+@pytest.mark.parametrize("dias", [[1, 2, 3, 4, 5], [5, 1, 4, 2, 3]])
+def test_rango_dias_con_dias_desordenados(tmp_path, dias):
+    almacen = _almacen(tmp_path, [10] * 5, dias=np.array(dias))
+    assert almacen.monotona[COLUMNA_DIA] == (dias == sorted(dias))
+    assert sorted(almacen.rango_dias(0, 2, 4)[COLUMNA_DIA]) == [2, 3, 4]
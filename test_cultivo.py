@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cultivo import ParametrosCultivo, a_dataframe, clima_sintetico, simular_cultivo
+
+# =============================
+# REGRESIÓN CONTRA simulacion_crecimiento_resultados.csv
+# =============================
+RUTA_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulacion_crecimiento_resultados.csv")
+# Tolerancias: el CSV guarda dos decimales y el GDD se recalcula desde las
+# temperaturas ya redondeadas (deriva acumulada ≤ 0.03 en 90 días). La ET del
+# CSV usó una ET0 aleatoria que no se puede recuperar; se verifica que la ET0
+# implícita (ET / Kc) caiga en el rango U(5.25, 8.75) del generador.
+TOLERANCIAS = {"GDD_Acumulado": 0.05, "Altura (cm)": 0.05, "LAI (m2/m2)": 0.011, "Luz_Interceptada (f)": 0.011}
+RANGO_ET0 = (5.25, 8.75)
+
+
+@pytest.fixture(scope="module")
+def referencia():
+    ref = pd.read_csv(RUTA_CSV)
+    tmax, tmin = ref["Tmax"].to_numpy(), ref["Tmin"].to_numpy()
+    res = simular_cultivo(tmax, tmin, et0=np.full(len(ref), np.mean(RANGO_ET0)))
+    return ref, res, a_dataframe(res, tmax, tmin)
+
+
+@pytest.mark.parametrize("columna", sorted(TOLERANCIAS))
+def test_columna_dentro_de_tolerancia(referencia, columna):
+    ref, _, sim = referencia
+    diferencia = float(np.abs(sim[columna] - ref[columna]).max())
+    assert diferencia <= TOLERANCIAS[columna], f"{columna}: diferencia {diferencia:.4f} > {TOLERANCIAS[columna]}"
+
+
+def test_bbch_coincide(referencia):
+    ref, _, sim = referencia
+    assert (sim["BBCH"] == ref["BBCH"]).all()
+
+
+def test_et0_implicita_en_rango(referencia):
+    # Margen por el redondeo de ET a dos decimales en el CSV
+    ref, res, _ = referencia
+    kc = res.lai / ParametrosCultivo().lai_max
+    et0_implicita = ref["ET_Diaria (mm)"].to_numpy() / kc
+    margen = 0.005 / kc
+    assert np.all(et0_implicita + margen >= RANGO_ET0[0])
+    assert np.all(et0_implicita - margen <= RANGO_ET0[1])
+
+
+def test_lote_igual_a_series_sueltas():
+    tmax, tmin, et0 = clima_sintetico((3, 4, 90), semilla=2)
+    lote = simular_cultivo(tmax, tmin, et0)
+    suelta = simular_cultivo(tmax[1, 2], tmin[1, 2], et0[1, 2])
+    for campo in lote._fields:
+        np.testing.assert_allclose(getattr(lote, campo)[1, 2], getattr(suelta, campo))
@@ -0,0 +1,30 @@
+import io
+
+from ingesta import leer_tramos_csv
+
+
+def _leer(texto, **kw):
+    return leer_tramos_csv(io.StringIO(texto), **kw)
+
+
+def test_lineas_vacias_se_ignoran():
+    ruta = _leer("tramo,distancia_m\n1,100\n\n2,200\n\n")
+    assert ruta.tramo.tolist() == [1, 2]
+    assert ruta.filas_invalidas == 0
+
+
+def test_fila_con_campos_vacios_se_reporta():
+    ruta = _leer("tramo,distancia_m\n1,100\n,\n")
+    assert ruta.errores == [(2, "'tramo' vacío o no numérico")]
+
+
+def test_tramo_no_entero_se_rechaza():
+    ruta = _leer("tramo,distancia_m\n1,100\n1.7,30\n3.0,50\n")
+    assert ruta.tramo.tolist() == [1, 3]
+    assert ruta.errores == [(2, "'tramo' debe ser un número entero")]
+
+
+def test_filas_numeradas_entre_bloques_y_campos_multilinea():
+    texto = 'tramo,distancia_m,nota\n1,100,"dos\nlineas"\n2,200,a\nx,5,b\n'
+    ruta = _leer(texto, tam_bloque=2)
+    assert ruta.errores == [(3, "'tramo' vacío o no numérico")]
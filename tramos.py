@@ -0,0 +1,216 @@
+import hashlib
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from cache_compartido import AUSENTE, cache_compartido
+from instrumentacion import instrumentado
+
+# =============================
+# SIMULADOR DE TRAMOS (NÚCLEO SIN STREAMLIT)
+# =============================
+def generar_tramos_ejemplo(preset):
+    if preset == "Ruta urbana":
+        return pd.DataFrame({"tramo": [1,2,3,4,5], "distancia_m": [120, 300, 80, 200, 150]})
+    if preset == "Ruta deportiva":
+        return pd.DataFrame({"tramo": [1,2,3,4], "distancia_m": [500, 800, 400, 600]})
+    if preset == "Ruta mixta":
+        return pd.DataFrame({"tramo": [1,2,3,4,5,6], "distancia_m": [100, 250, 50, 400, 180, 220]})
+    return pd.DataFrame({"tramo":[1,2,3], "distancia_m":[100,100,100]})
+
+
+class ResultadosLote(NamedTuple):
+    velocidades: np.ndarray    # (n_configs, n_tramos) en m/s; 0 -> NaN
+    tiempos: np.ndarray        # (n_configs, n_tramos) en s; velocidad nula -> inf
+    tiempo_acum: np.ndarray    # (n_configs, n_tramos)
+    tiempo_total: np.ndarray   # (n_configs,) suma de los tiempos finitos
+    velocidad_media: np.ndarray
+    velocidad_max: np.ndarray
+    velocidad_min: np.ndarray
+
+
+@instrumentado("tramos.simular_lote")
+def simular_lote(distancias, velocidades) -> ResultadosLote:
+    """Tiempos y métricas de muchas configuraciones a la vez.
+
+    `velocidades` es una matriz (n_configs × n_tramos) o un solo vector; el
+    resultado reproduce calcular_tiempos/resumen_metrics fila por fila.
+    """
+    d = np.asarray(distancias, dtype=float)
+    v = np.atleast_2d(np.asarray(velocidades, dtype=float))
+    v = np.where(v == 0, np.nan, v)  # proteger división por cero
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = d / v
+    t = np.where(np.isnan(t), np.inf, t)
+    acum = np.cumsum(t, axis=1)
+    total = np.where(np.isfinite(t), t, 0.0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = np.where(total > 0, d.sum() / total, 0.0)
+    return ResultadosLote(
+        velocidades=v,
+        tiempos=t,
+        tiempo_acum=acum,
+        tiempo_total=total,
+        velocidad_media=media,
+        velocidad_max=np.fmax.reduce(v, axis=1),
+        velocidad_min=np.fmin.reduce(v, axis=1)
+    )
+
+
+@instrumentado("tramos.metricas_lote")
+def metricas_lote(lote: ResultadosLote, i: int) -> dict:
+    return {
+        "Tiempo total (s)": float(lote.tiempo_total[i]),
+        "Velocidad media (m/s)": float(lote.velocidad_media[i]),
+        "Velocidad máxima (m/s)": float(lote.velocidad_max[i]),
+        "Velocidad mínima (m/s)": float(lote.velocidad_min[i])
+    }
+
+
+def resultado_df(df, lote: ResultadosLote, i: int):
+    # Tabla con las mismas columnas que calcular_tiempos, solo cuando se necesita mostrarla
+    df = df.copy()
+    df["velocidad_m_s"] = lote.velocidades[i]
+    df["tiempo_s"] = lote.tiempos[i]
+    df["tiempo_acum_s"] = lote.tiempo_acum[i]
+    df["velocidad_kmh"] = lote.velocidades[i] * 3.6
+    return df
+
+
+@instrumentado("tramos.calcular_tiempos")
+def calcular_tiempos(df, velocidades_m_s):
+    lote = simular_lote(df["distancia_m"].to_numpy(), velocidades_m_s)
+    return resultado_df(df, lote, 0)
+
+
+@instrumentado("tramos.resumen_metrics")
+def resumen_metrics(df):
+    total_time = df["tiempo_s"].replace(np.inf, np.nan).sum()
+    avg_speed = (df["distancia_m"].sum() / total_time) if total_time and total_time>0 else 0
+    max_speed = df["velocidad_m_s"].max()
+    min_speed = df["velocidad_m_s"].min()
+    return {
+        "Tiempo total (s)": total_time if not np.isnan(total_time) else float("nan"),
+        "Velocidad media (m/s)": avg_speed,
+        "Velocidad máxima (m/s)": max_speed,
+        "Velocidad mínima (m/s)": min_speed
+    }
+
+# =============================
+# RESULTADOS INCREMENTALES
+# =============================
+def huella(*arreglos) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for a in arreglos:
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype, a.shape)).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+class AlmacenResultados:
+    """Resultados por configuración indexados por (huella de ruta, huella de velocidades).
+
+    Solo se simulan las configuraciones cuya clave no está guardada, y los
+    derivados costosos (reducciones para gráficas, tablas) se memorizan por
+    clave, así que renombrar una configuración o cambiar de tabla no recalcula.
+    """
+
+    def __init__(self, max_entradas: int = 32):
+        self.max_entradas = max_entradas
+        self.recalculos = 0
+        self._entradas = OrderedDict()
+
+    @instrumentado("tramos.AlmacenResultados.calcular")
+    def calcular(self, tramos, distancias, velocidades, modelo=None) -> list:
+        """Claves de cada configuración, simulando solo las nuevas.
+
+        Con `modelo=(ParametrosCinematicos, pendiente)` se usa el modelo
+        cinemático de cinematica.py; los parámetros forman parte de la clave.
+        """
+        h_ruta = huella(tramos, distancias)
+        if modelo is not None:
+            h_ruta = (h_ruta, repr(tuple(modelo)))
+        velocidades = [np.asarray(v, dtype=float) for v in velocidades]
+        claves = [(h_ruta, huella(v)) for v in velocidades]
+        sucias = {}
+        for i, c in enumerate(claves):
+            if c not in self._entradas and c not in sucias:
+                sucias[c] = i
+        # Las rutas predefinidas coinciden entre sesiones: se buscan primero en
+        # la cache compartida y solo se simula lo que falte en todo el proceso
+        espacio = "tramos.lote" if modelo is None else "tramos.cinematico"
+        faltan = {}
+        for clave, i in sucias.items():
+            guardado = cache_compartido.consultar(espacio, clave)
+            if guardado is AUSENTE:
+                faltan[clave] = i
+            else:
+                self._entradas[clave] = dict(guardado, derivados={})
+        if faltan and modelo is None:
+            nuevo = simular_lote(distancias, [velocidades[i] for i in faltan.values()])
+            for fila, clave in enumerate(faltan):
+                entrada = {"lote": ResultadosLote(*(campo[fila:fila+1].copy() for campo in nuevo))}
+                cache_compartido.guardar(espacio, clave, entrada)
+                self._entradas[clave] = dict(entrada, derivados={})
+        elif faltan:
+            from cinematica import simular_cinematico, a_lote
+            parametros, pendiente = modelo
+            for clave, i in faltan.items():
+                res = simular_cinematico(distancias, velocidades[i], pendiente, parametros)
+                entrada = {"lote": a_lote(distancias, res), "cinematico": res}
+                cache_compartido.guardar(espacio, clave, entrada)
+                self._entradas[clave] = dict(entrada, derivados={})
+        self.recalculos += len(faltan)
+        for c in claves:
+            self._entradas.move_to_end(c)
+        while len(self._entradas) > max(self.max_entradas, len(claves)):
+            self._entradas.popitem(last=False)
+        return claves
+
+    def fila(self, clave) -> ResultadosLote:
+        return self._entradas[clave]["lote"]
+
+    def cinematico(self, clave):
+        return self._entradas[clave].get("cinematico")
+
+    def derivado(self, clave, nombre, construir):
+        derivados = self._entradas[clave]["derivados"]
+        if nombre not in derivados:
+            derivados[nombre] = construir(self.fila(clave))
+        return derivados[nombre]
+
+# =============================
+# BARRIDO DE PERFILES
+# =============================
+@instrumentado("tramos.barrido_perfiles")
+def barrido_perfiles(distancias, n_candidatos: int, v_min: float, v_max: float, top_k: int = 5,
+                     semilla: int = 42, tiempo_objetivo=None, tam_bloque: int = 4096):
+    """Evalúa perfiles aleatorios de velocidad (uniformes en [v_min, v_max]) y
+    devuelve los top_k: menor tiempo total o, con `tiempo_objetivo`, los más
+    cercanos a ese tiempo.
+
+    Los candidatos se generan por bloques para acotar la memoria; con la
+    misma semilla el resultado es reproducible.
+    """
+    d = np.asarray(distancias, dtype=float)
+    rng = np.random.default_rng(int(semilla))
+    mejores_v = np.empty((0, d.size))
+    mejores_score = np.empty(0)
+    restantes = int(n_candidatos)
+    while restantes > 0:
+        n = min(tam_bloque, restantes)
+        restantes -= n
+        v = rng.uniform(v_min, v_max, size=(n, d.size))
+        total = (d / v).sum(axis=1)
+        score = total if tiempo_objetivo is None else np.abs(total - tiempo_objetivo)
+        # Mantener solo los top_k acumulados entre bloques
+        mejores_v = np.concatenate([mejores_v, v])
+        mejores_score = np.concatenate([mejores_score, score])
+        if mejores_score.size > top_k:
+            idx = np.argpartition(mejores_score, top_k - 1)[:top_k]
+            mejores_v, mejores_score = mejores_v[idx], mejores_score[idx]
+    orden = np.argsort(mejores_score, kind="stable")
+    return simular_lote(d, mejores_v[orden])